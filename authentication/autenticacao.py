@@ -0,0 +1,123 @@
+"""
+Autenticação JWT com cache do token verificado e do usuário.
+
+O ``JWTAuthentication`` do simplejwt verifica a assinatura do access token e
+busca o ``User`` no banco a cada requisição. Aqui, o resultado fica no cache:
+
+- o token verificado, pela digest SHA-256 do token recebido, até o ``exp``
+  (nenhum token diferente produz a mesma chave, então um acerto dispensa a
+  verificação da assinatura);
+- um retrato do usuário ativo (campos de ``CAMPOS_USUARIO``), por id, por
+  ``JWT_AUTH_CACHE_TIMEOUT`` segundos, removido por sinal sempre que o
+  usuário é salvo ou excluído. Só com cache compartilhado entre os workers
+  (``tokens.cache_compartilhado``): em um cache por processo, o sinal só
+  limparia o worker que salvou e os outros continuariam aceitando um usuário
+  desativado. Nesse caso o usuário é buscado no banco a cada requisição.
+
+O usuário é remontado com ``User.from_db``; os campos fora do retrato (como
+``password``) ficam adiados e são buscados só se acessados, e um ``save()``
+grava apenas os campos carregados.
+"""
+
+import hashlib
+import time
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from . import tokens
+
+CAMPOS_USUARIO = (
+    "id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+    "date_joined",
+)
+
+
+def cache_autenticacao_ativo():
+    return settings.JWT_AUTH_CACHE_TIMEOUT > 0
+
+
+def chave_token(raw_token):
+    return "auth:jwt:%s" % hashlib.sha256(raw_token).hexdigest()
+
+
+def chave_usuario(user_id):
+    return f"auth:usuario:{user_id}"
+
+
+def invalidar_usuario(user_id):
+    cache.delete(chave_usuario(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` sem queries no estado estacionário."""
+
+    def authenticate(self, request):
+        if not cache_autenticacao_ativo():
+            return super().authenticate(request)
+
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.obter_token(raw_token)
+        return self.get_user(validated_token), validated_token
+
+    def obter_token(self, raw_token):
+        chave = chave_token(raw_token)
+        indice = cache.get(chave)
+        if indice is not None:
+            return api_settings.AUTH_TOKEN_CLASSES[indice](raw_token, verify=False)
+
+        validated_token = self.get_validated_token(raw_token)
+        restante = int(validated_token["exp"] - time.time())
+        if restante > 0:
+            cache.set(
+                chave,
+                api_settings.AUTH_TOKEN_CLASSES.index(type(validated_token)),
+                restante,
+            )
+        return validated_token
+
+    def get_user(self, validated_token):
+        if (
+            not cache_autenticacao_ativo()
+            or api_settings.CHECK_REVOKE_TOKEN
+            or not tokens.cache_compartilhado()
+        ):
+            return super().get_user(validated_token)
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        retrato = cache.get(chave_usuario(user_id))
+        if retrato is not None:
+            # from_db espera os valores na ordem dos campos do modelo.
+            campos = [
+                campo.attname
+                for campo in self.user_model._meta.concrete_fields
+                if campo.attname in retrato
+            ]
+            return self.user_model.from_db(
+                DEFAULT_DB_ALIAS, campos, [retrato[campo] for campo in campos]
+            )
+
+        user = super().get_user(validated_token)
+        cache.set(
+            chave_usuario(user_id),
+            {campo: getattr(user, campo) for campo in CAMPOS_USUARIO},
+            settings.JWT_AUTH_CACHE_TIMEOUT,
+        )
+        return user
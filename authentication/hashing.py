@@ -0,0 +1,175 @@
+"""
+Hash de senhas em um pool de threads limitado.
+
+O PBKDF2 custa dezenas de milissegundos de CPU por senha. Executado na thread
+da requisição, uma rajada de logins e registros ocupa todas as threads dos
+workers e atrasa as demais rotas. Aqui o cálculo vai para um pool com
+``TRABALHADORES`` threads (o ``hashlib.pbkdf2_hmac`` libera o GIL, então as
+outras threads do worker seguem atendendo) e no máximo ``MAX_FILA`` pedidos
+aguardando. Com a fila cheia, o pedido é recusado na hora com 503 e
+``Retry-After``, em vez de esperar e prender mais uma thread. Nas views do
+DRF quem responde é o handler de exceções; fora dele (login do admin),
+``HashingIndisponivelMiddleware``.
+
+``PooledPBKDF2PasswordHasher`` mantém o algoritmo ``pbkdf2_sha256``: os hashes
+existentes continuam válidos e os novos são idênticos aos do hasher padrão.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.http import HttpResponse
+
+
+class HashingIndisponivel(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Serviço de autenticação sobrecarregado. Tente novamente."
+    default_code = "hashing_indisponivel"
+    # O handler de exceções do DRF devolve ``wait`` no cabeçalho Retry-After.
+    wait = 1
+
+
+class PoolHashing:
+    """
+    Executor limitado: ``trabalhadores`` threads e ``max_fila`` pedidos em
+    espera. ``executar`` recusa com ``HashingIndisponivel`` quando não há vaga
+    ou quando o resultado não sai em ``timeout`` segundos.
+    """
+
+    def __init__(self, trabalhadores, max_fila, timeout):
+        self.trabalhadores = trabalhadores
+        self.max_fila = max_fila
+        self.timeout = timeout
+        self._vagas = threading.BoundedSemaphore(trabalhadores + max_fila)
+        self._executor = ThreadPoolExecutor(
+            max_workers=trabalhadores, thread_name_prefix="hashing"
+        )
+        self._lock = threading.Lock()
+        self.pendentes = 0
+        self.limpar()
+
+    def limpar(self):
+        with self._lock:
+            self.executados = 0
+            self.recusados = 0
+            self.expirados = 0
+            self.espera_total = 0.0
+            self.espera_max = 0.0
+            self.duracao_total = 0.0
+            self.duracao_max = 0.0
+            self.desde = time.time()
+
+    def executar(self, funcao, *args):
+        if not self._vagas.acquire(blocking=False):
+            with self._lock:
+                self.recusados += 1
+            raise HashingIndisponivel()
+
+        with self._lock:
+            self.pendentes += 1
+        enfileirado = time.perf_counter()
+
+        def tarefa():
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args)
+            finally:
+                fim = time.perf_counter()
+                with self._lock:
+                    self.pendentes -= 1
+                    self.executados += 1
+                    self.espera_total += inicio - enfileirado
+                    self.espera_max = max(self.espera_max, inicio - enfileirado)
+                    self.duracao_total += fim - inicio
+                    self.duracao_max = max(self.duracao_max, fim - inicio)
+                self._vagas.release()
+
+        futuro = self._executor.submit(tarefa)
+        try:
+            return futuro.result(timeout=self.timeout)
+        except TimeoutError:
+            # A tarefa continua no pool e libera a vaga ao terminar.
+            with self._lock:
+                self.expirados += 1
+            raise HashingIndisponivel()
+
+    def instantaneo(self):
+        with self._lock:
+            executados = self.executados or 1
+            return {
+                "pid": os.getpid(),
+                "desde": self.desde,
+                "trabalhadores": self.trabalhadores,
+                "max_fila": self.max_fila,
+                "pendentes": self.pendentes,
+                "executados": self.executados,
+                "recusados": self.recusados,
+                "expirados": self.expirados,
+                "espera_media_ms": round(self.espera_total / executados * 1e3, 2),
+                "espera_max_ms": round(self.espera_max * 1e3, 2),
+                "duracao_media_ms": round(self.duracao_total / executados * 1e3, 2),
+                "duracao_max_ms": round(self.duracao_max * 1e3, 2),
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool():
+    """Pool do processo, criado no primeiro uso (depois do fork do gunicorn)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                configuracao = settings.PASSWORD_HASHING_POOL
+                _pool = PoolHashing(
+                    configuracao["TRABALHADORES"],
+                    configuracao["MAX_FILA"],
+                    configuracao["TIMEOUT"],
+                )
+    return _pool
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """``PBKDF2PasswordHasher`` que calcula o hash no pool limitado."""
+
+    def encode(self, password, salt, iterations=None):
+        return obter_pool().executar(super().encode, password, salt, iterations)
+
+
+class HashingIndisponivelMiddleware:
+    """
+    Converte ``HashingIndisponivel`` levantada fora do DRF (login do admin,
+    views do Django) no mesmo 503 com ``Retry-After`` da API, em vez de 500.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, HashingIndisponivel):
+            return None
+        response = HttpResponse(
+            exception.detail,
+            status=exception.status_code,
+            content_type="text/plain; charset=utf-8",
+        )
+        response["Retry-After"] = str(exception.wait)
+        return response
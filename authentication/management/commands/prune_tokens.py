@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.tokens import remover_expirados
+
+
+class Command(BaseCommand):
+    help = (
+        "Apaga em lotes os refresh tokens expirados (OutstandingToken) e suas "
+        "entradas na blacklist."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tamanho-lote", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options["tamanho_lote"] < 1:
+            raise CommandError("--tamanho-lote deve ser positivo.")
+
+        def ao_concluir_lote(numero, outstanding, blacklisted):
+            self.stdout.write(
+                f"Lote {numero}: {outstanding} tokens e {blacklisted} entradas "
+                "da blacklist apagados até agora"
+            )
+
+        outstanding, blacklisted = remover_expirados(
+            options["tamanho_lote"], ao_concluir_lote
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Limpeza concluída: {outstanding} tokens expirados e "
+                f"{blacklisted} entradas da blacklist apagados."
+            )
+        )
@@ -0,0 +1,57 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Upper
+
+
+def verificar_emails_duplicados(apps, schema_editor):
+    """
+    Interrompe a migração se já houver emails repetidos (sem diferenciar
+    maiúsculas): o índice único falharia no meio do ``migrate`` com um erro do
+    banco pouco claro. Os conflitos são listados para serem resolvidos antes.
+    """
+    User = apps.get_model("auth", "User")
+    duplicados = (
+        User.objects.exclude(email="")
+        .annotate(chave=Upper("email"))
+        .values("chave")
+        .annotate(total=Count("id"))
+        .filter(total__gt=1)
+        .values_list("chave", flat=True)
+    )
+    conflitos = []
+    for chave in duplicados:
+        usuarios = (
+            User.objects.annotate(chave=Upper("email"))
+            .filter(chave=chave)
+            .order_by("id")
+            .values_list("username", flat=True)
+        )
+        conflitos.append(f"  {chave.lower()}: {', '.join(usuarios)}")
+    if conflitos:
+        raise RuntimeError(
+            "Não é possível criar o índice único de email: há emails repetidos "
+            "(sem diferenciar maiúsculas). Altere ou remova os usuários abaixo "
+            "e rode o migrate de novo.\n" + "\n".join(conflitos)
+        )
+
+
+class Migration(migrations.Migration):
+    """
+    Email único sem diferenciar maiúsculas (UPPER, a mesma expressão usada pelo
+    lookup ``iexact`` no PostgreSQL). Emails vazios ficam de fora do índice.
+    """
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunPython(verificar_emails_duplicados, migrations.RunPython.noop),
+        migrations.RunSQL(
+            sql=(
+                "CREATE UNIQUE INDEX auth_user_email_upper_unico "
+                "ON auth_user (UPPER(email)) WHERE email <> ''"
+            ),
+            reverse_sql="DROP INDEX auth_user_email_upper_unico",
+        ),
+    ]
@@ -1,8 +1,36 @@
+from contextlib import contextmanager
+
 from rest_framework import serializers
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .autenticacao import CachedJWTAuthentication
+from .tokens import CachedRefreshToken
+
+MENSAGENS_UNICIDADE = {
+    "username": "Este nome de usuário já está em uso.",
+    "email": "Este email já está em uso.",
+}
+# Índice único de UPPER(email), criado na migração 0001_email_unico.
+INDICE_EMAIL = "auth_user_email_upper_unico"
+
+
+@contextmanager
+def mapear_unicidade():
+    """Converte a violação de unicidade do banco no erro de campo da API."""
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as exc:
+        campo = "email" if INDICE_EMAIL in str(exc) else "username"
+        raise serializers.ValidationError({campo: [MENSAGENS_UNICIDADE[campo]]})
 
 
 class UsuarioRegistroSerializer(serializers.ModelSerializer):
@@ -19,25 +47,34 @@ class UsuarioRegistroSerializer(serializers.ModelSerializer):
             "senha",
             "confirmar_senha",
         )
-
-    def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("Este email já está em uso.")
-        return value
-
-    def validate_username(self, value):
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError("Este nome de usuário já está em uso.")
-        return value
+        # A unicidade é verificada em validate(), numa única query, e garantida
+        # pelas constraints do banco.
+        extra_kwargs = {"username": {"validators": [UnicodeUsernameValidator()]}}
 
     def validate(self, attrs):
         if attrs["password"] != attrs["confirmar_senha"]:
             raise serializers.ValidationError("As senhas não coincidem.")
+
+        condicao = Q(username=attrs["username"])
+        if attrs.get("email"):
+            condicao |= Q(email__iexact=attrs["email"])
+        erros = {}
+        for username, email in User.objects.filter(condicao).values_list(
+            "username", "email"
+        ):
+            if username == attrs["username"]:
+                erros["username"] = [MENSAGENS_UNICIDADE["username"]]
+            if attrs.get("email") and email.upper() == attrs["email"].upper():
+                erros["email"] = [MENSAGENS_UNICIDADE["email"]]
+        if erros:
+            raise serializers.ValidationError(erros)
         return attrs
 
     def create(self, validated_data):
         validated_data.pop("confirmar_senha")
-        user = User.objects.create_user(**validated_data)
+        # Cadastros simultâneos passam juntos pela validação; o banco decide.
+        with mapear_unicidade():
+            user = User.objects.create_user(**validated_data)
         return user
 
 
@@ -68,3 +105,36 @@ class UsuarioPerfilSerializer(serializers.ModelSerializer):
         model = User
         fields = ("id", "username", "email", "first_name", "last_name", "date_joined")
         read_only_fields = ("id", "username", "date_joined")
+
+    def update(self, instance, validated_data):
+        with mapear_unicidade():
+            return super().update(instance, validated_data)
+
+
+class TokenAtualizarSerializer(TokenRefreshSerializer):
+    """
+    Refresh com a blacklist em cache e o usuário carregado uma única vez
+    (pelo mesmo cache da autenticação), em vez de uma busca por etapa.
+    """
+
+    token_class = CachedRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        try:
+            refresh.usuario = CachedJWTAuthentication().get_user(refresh)
+        except AuthenticationFailed:
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+
+        data = {"access": str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+        return data
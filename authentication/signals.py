@@ -0,0 +1,28 @@
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .autenticacao import invalidar_usuario
+from .tokens import registrar_emitido, registrar_revogado
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidar_cache_usuario(sender, instance, **kwargs):
+    invalidar_usuario(instance.pk)
+
+
+@receiver(post_save, sender=OutstandingToken)
+def registrar_token_emitido(sender, instance, created, **kwargs):
+    if created:
+        registrar_emitido(instance)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def registrar_token_revogado(sender, instance, **kwargs):
+    registrar_revogado(instance.token)
@@ -1,10 +1,38 @@
+import threading
+import time
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from unittest.mock import patch
+
 from rest_framework import status
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from django.apps import apps
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher,
+    check_password,
+    make_password,
+)
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+
+from .hashing import HashingIndisponivel, PoolHashing
+from .serializers import UsuarioRegistroSerializer
+from .test_mixins import AuthenticatedTestMixin
+from .tokens import CachedRefreshToken
 
 
 class AuthenticationAPITest(APITestCase):
@@ -126,3 +154,383 @@ class AuthenticationAPITest(APITestCase):
         data = {"refresh": str(refresh)}
         response = self.client.post(self.logout_url, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(JWT_AUTH_CACHE_TIMEOUT=300)
+class CachedJWTAuthenticationTest(AuthenticatedTestMixin, APITestCase):
+    """Testes para o cache da autenticação JWT"""
+
+    def setUp(self):
+        cache.clear()
+        # O retrato do usuário só é guardado em cache compartilhado (Redis).
+        compartilhado = patch(
+            "authentication.tokens.cache_compartilhado", return_value=True
+        )
+        compartilhado.start()
+        self.addCleanup(compartilhado.stop)
+        self.profile_url = reverse("auth-perfil")
+        self.user = self.authenticate_user()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_requisicoes_seguintes_sem_queries(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.profile_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.profile_url)
+        self.assertEqual(response.data["username"], "testuser")
+        self.assertEqual(response.data["email"], "test@example.com")
+
+    def test_usuario_alterado_invalida_cache(self):
+        self.client.get(self.profile_url)
+        self.user.first_name = "Novo"
+        self.user.save()
+        response = self.client.get(self.profile_url)
+        self.assertEqual(response.data["first_name"], "Novo")
+
+    def test_usuario_desativado_perde_acesso(self):
+        self.client.get(self.profile_url)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.profile_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_atualizar_perfil_com_usuario_do_cache(self):
+        self.client.get(self.profile_url)
+        response = self.client.patch(self.profile_url, {"last_name": "Cache"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_name, "Cache")
+        # A senha (fora do retrato) não é sobrescrita
+        self.assertTrue(self.user.check_password("testpass123"))
+
+    def test_token_invalido_nao_e_cacheado(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer token.invalido.x")
+        response = self.client.get(self.profile_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(
+    JWT_AUTH_CACHE_TIMEOUT=300,
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "teste-autenticacao-locmem",
+        }
+    },
+)
+class CachedJWTAuthenticationLocMemTest(AuthenticatedTestMixin, APITestCase):
+    """Cache por processo: o usuário não é guardado entre requisições"""
+
+    def setUp(self):
+        cache.clear()
+        self.profile_url = reverse("auth-perfil")
+        self.user = self.authenticate_user()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_desativado_em_outro_worker_perde_acesso(self):
+        self.assertEqual(self.client.get(self.profile_url).status_code, 200)
+        # update() não dispara post_save, como uma alteração feita em outro
+        # worker, cujo sinal não alcança o cache local deste.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.get(self.profile_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_usuario_buscado_a_cada_requisicao(self):
+        self.client.get(self.profile_url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.profile_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class BlacklistCacheTest(APITestCase):
+    """Testes para a blacklist de refresh tokens em cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.refresh_url = reverse("token-atualizar")
+        self.logout_url = reverse("auth-sair")
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"  # nosec B106
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def atualizar(self, refresh):
+        return self.client.post(self.refresh_url, {"refresh": str(refresh)})
+
+    def test_refresh_rotaciona_e_revoga_token_anterior(self):
+        refresh = RefreshToken.for_user(self.user)
+        response = self.atualizar(refresh)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("access", response.data)
+        self.assertTrue(
+            BlacklistedToken.objects.filter(token__jti=refresh["jti"]).exists()
+        )
+        self.assertTrue(
+            OutstandingToken.objects.filter(
+                jti=RefreshToken(response.data["refresh"])["jti"], user=self.user
+            ).exists()
+        )
+
+        response = self.atualizar(refresh)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_revogado_recusado_pelo_cache(self):
+        refresh = RefreshToken.for_user(self.user)
+        self.atualizar(refresh)
+        with self.assertNumQueries(0):
+            response = self.atualizar(refresh)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_revoga_token(self):
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.client.post(self.logout_url, {"refresh": str(refresh)})
+        self.client.credentials()
+        with self.assertNumQueries(0):
+            response = self.atualizar(refresh)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revogacao_fora_da_api_atualiza_cache(self):
+        refresh = RefreshToken.for_user(self.user)
+        RefreshToken(str(refresh)).blacklist()
+        response = self.atualizar(refresh)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_conflito_apagado_em_paralelo_nao_gera_erro(self):
+        refresh = RefreshToken.for_user(self.user)
+        token = CachedRefreshToken(str(refresh))
+        self.assertIsNotNone(token.outstanding_id)
+        # O INSERT conflita com uma linha que a limpeza apaga antes da leitura.
+        with patch.object(
+            BlacklistedToken.objects, "create", side_effect=IntegrityError
+        ):
+            blacklisted, criado = token.blacklist()
+        self.assertTrue(criado)
+        self.assertEqual(blacklisted.token.jti, refresh["jti"])
+
+    @override_settings(JWT_AUTH_CACHE_TIMEOUT=300)
+    def test_refresh_com_cache_compartilhado_sem_leituras(self):
+        with patch("authentication.tokens.cache_compartilhado", return_value=True):
+            response = self.atualizar(RefreshToken.for_user(self.user))
+            with CaptureQueriesContext(connection) as contexto:
+                response = self.atualizar(response.data["refresh"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Só as escritas: revogar o token usado e emitir o novo.
+        leituras = [
+            query["sql"]
+            for query in contexto.captured_queries
+            if query["sql"].upper().startswith("SELECT")
+        ]
+        self.assertEqual(leituras, [])
+
+    def test_usuario_inativo_nao_atualiza(self):
+        refresh = RefreshToken.for_user(self.user)
+        self.user.is_active = False
+        self.user.save()
+        response = self.atualizar(refresh)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PruneTokensCommandTest(TestCase):
+    """Testes para o comando prune_tokens"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser")
+
+    def criar_token(self, jti, expirado, revogado=False):
+        agora = timezone.now()
+        token = OutstandingToken.objects.create(
+            user=self.user,
+            jti=jti,
+            token=jti,
+            created_at=agora,
+            expires_at=agora + timedelta(days=-1 if expirado else 1),
+        )
+        if revogado:
+            BlacklistedToken.objects.create(token=token)
+        return token
+
+    def test_apaga_apenas_tokens_expirados_em_lotes(self):
+        for i in range(5):
+            self.criar_token(f"expirado-{i}", expirado=True, revogado=i % 2 == 0)
+        self.criar_token("valido", expirado=False, revogado=True)
+
+        saida = StringIO()
+        call_command("prune_tokens", "--tamanho-lote", "2", stdout=saida)
+
+        self.assertEqual(
+            list(OutstandingToken.objects.values_list("jti", flat=True)), ["valido"]
+        )
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+        self.assertIn("Lote 3", saida.getvalue())
+        self.assertIn("5 tokens expirados e 3 entradas", saida.getvalue())
+
+    def test_tamanho_lote_invalido(self):
+        with self.assertRaises(CommandError):
+            call_command("prune_tokens", "--tamanho-lote", "0", stdout=StringIO())
+
+
+class PoolHashingTest(TestCase):
+    """Testes para o pool limitado de hash de senhas"""
+
+    def test_hash_compativel_com_hasher_padrao(self):
+        codificada = make_password("testpass123", hasher="pbkdf2_sha256")
+        self.assertTrue(codificada.startswith("pbkdf2_sha256$"))
+        padrao = PBKDF2PasswordHasher()
+        self.assertTrue(padrao.verify("testpass123", codificada))
+        self.assertTrue(
+            check_password("testpass123", padrao.encode("testpass123", "sal"))
+        )
+
+    def test_registra_metricas(self):
+        pool = PoolHashing(trabalhadores=1, max_fila=1, timeout=5)
+        self.assertEqual(pool.executar(sum, [1, 2]), 3)
+        dados = pool.instantaneo()
+        self.assertEqual(dados["executados"], 1)
+        self.assertEqual(dados["pendentes"], 0)
+        self.assertEqual(dados["recusados"], 0)
+
+    def test_fila_cheia_recusa_na_hora(self):
+        pool = PoolHashing(trabalhadores=1, max_fila=0, timeout=5)
+        liberar = threading.Event()
+        ocupado = threading.Thread(target=pool.executar, args=(liberar.wait,))
+        ocupado.start()
+        try:
+            while pool.instantaneo()["pendentes"] == 0:
+                time.sleep(0.001)
+            with self.assertRaises(HashingIndisponivel):
+                pool.executar(sum, [1])
+        finally:
+            liberar.set()
+            ocupado.join()
+        self.assertEqual(pool.instantaneo()["recusados"], 1)
+        self.assertEqual(pool.executar(sum, [1]), 1)
+
+    def test_login_sobrecarregado_responde_503(self):
+        User.objects.create_user(username="testuser", password="testpass123")
+        with patch.object(PoolHashing, "executar", side_effect=HashingIndisponivel):
+            response = self.client.post(
+                reverse("auth-entrar"),
+                {"nome_usuario": "testuser", "senha": "testpass123"},
+            )
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_login_do_admin_sobrecarregado_responde_503(self):
+        User.objects.create_superuser(username="admin", password="testpass123")
+        with patch.object(PoolHashing, "executar", side_effect=HashingIndisponivel):
+            response = self.client.post(
+                reverse("admin:login"),
+                {"username": "admin", "password": "testpass123"},
+            )
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "1")
+
+
+class RegistroUnicidadeTest(APITestCase):
+    """Testes para a unicidade de username e email no registro"""
+
+    def setUp(self):
+        self.register_url = reverse("auth-registrar")
+        User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+
+    def dados(self, **kwargs):
+        return {
+            "username": "newuser",
+            "email": "newuser@example.com",
+            "senha": "newpass123",
+            "confirmar_senha": "newpass123",
+            **kwargs,
+        }
+
+    def test_username_e_email_duplicados_em_uma_query(self):
+        serializer = UsuarioRegistroSerializer(
+            data=self.dados(username="testuser", email="TEST@example.com")
+        )
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+        self.assertEqual(
+            serializer.errors["username"], ["Este nome de usuário já está em uso."]
+        )
+        self.assertEqual(serializer.errors["email"], ["Este email já está em uso."])
+
+    def test_registro_valido_consulta_usuarios_uma_vez(self):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.post(self.register_url, self.dados())
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        leituras = [
+            query["sql"]
+            for query in contexto.captured_queries
+            if query["sql"].startswith("SELECT") and '"auth_user"' in query["sql"]
+        ]
+        self.assertEqual(len(leituras), 1)
+
+    def test_email_vazio_nao_conflita(self):
+        User.objects.create_user(username="semEmail")
+        response = self.client.post(self.register_url, self.dados(email=""))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_corrida_mapeada_para_erro_do_campo(self):
+        # Simula um cadastro concorrente que passou pela validação ao mesmo tempo.
+        with patch.object(
+            UsuarioRegistroSerializer, "validate", side_effect=lambda attrs: attrs
+        ):
+            response = self.client.post(
+                self.register_url, self.dados(email="Test@Example.com")
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data, {"email": ["Este email já está em uso."]})
+
+            response = self.client.post(
+                self.register_url, self.dados(username="testuser")
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(
+                response.data, {"username": ["Este nome de usuário já está em uso."]}
+            )
+
+    def test_perfil_com_email_em_uso(self):
+        outro = User.objects.create_user(username="outro", email="outro@example.com")
+        refresh = RefreshToken.for_user(outro)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        response = self.client.patch(
+            reverse("auth-perfil"), {"email": "TEST@EXAMPLE.COM"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {"email": ["Este email já está em uso."]})
+
+
+class MigracaoEmailUnicoTest(TestCase):
+    """Verificação dos emails existentes antes do índice único"""
+
+    migracao = import_module("authentication.migrations.0001_email_unico")
+
+    def setUp(self):
+        # Base anterior à migração: sem o índice (DDL desfeito no rollback).
+        with connection.cursor() as cursor:
+            cursor.execute("DROP INDEX auth_user_email_upper_unico")
+
+    def verificar(self):
+        self.migracao.verificar_emails_duplicados(apps, connection.schema_editor())
+
+    def test_sem_duplicados(self):
+        User.objects.create_user(username="ana", email="ana@example.com")
+        User.objects.create_user(username="semEmail1")
+        User.objects.create_user(username="semEmail2")
+        self.verificar()
+
+    def test_duplicados_interrompem_com_os_conflitos(self):
+        User.objects.create_user(username="ana", email="ana@example.com")
+        User.objects.create_user(username="ana2", email="ANA@Example.com")
+        User.objects.create_user(username="bia", email="bia@example.com")
+        with self.assertRaisesMessage(RuntimeError, "ana@example.com: ana, ana2"):
+            self.verificar()
@@ -0,0 +1,171 @@
+"""
+Refresh tokens com a pertinência à blacklist em cache.
+
+Com ``ROTATE_REFRESH_TOKENS`` e ``BLACKLIST_AFTER_ROTATION``, cada refresh do
+simplejwt consulta ``BlacklistedToken`` (join com ``OutstandingToken``), busca
+o usuário três vezes e faz dois ``get_or_create`` antes de emitir o novo
+token. Aqui o estado de cada ``jti`` fica no cache até o ``exp`` do token:
+
+- ``True``: token revogado (sempre pode ser cacheado, é definitivo);
+- o id do ``OutstandingToken``: token emitido e ainda não revogado.
+
+As entradas são gravadas por sinal na criação de ``OutstandingToken`` e
+``BlacklistedToken``, então um token recém-emitido já chega ao primeiro
+refresh com o estado em cache. O estado "não revogado" só é cacheado quando o
+cache é compartilhado entre os processos: com ``LocMemCache`` um worker não
+veria a revogação feita por outro. Uma falta no cache sempre cai no banco.
+
+Tirar um token da blacklist (pelo admin) não atualiza o cache: o token segue
+recusado até a entrada expirar junto com ele.
+"""
+
+import time
+
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+REVOGADO = True
+
+
+def chave_jti(jti):
+    return f"auth:blacklist:{jti}"
+
+
+def cache_compartilhado():
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def _restante(expires_at):
+    return int(expires_at.timestamp() - time.time())
+
+
+def registrar_emitido(outstanding):
+    """Grava no cache que o token de ``outstanding`` não está revogado."""
+    restante = _restante(outstanding.expires_at)
+    if restante > 0 and cache_compartilhado():
+        cache.add(chave_jti(outstanding.jti), outstanding.pk, restante)
+
+
+def registrar_revogado(outstanding):
+    """Grava no cache que o token de ``outstanding`` está revogado."""
+    restante = _restante(outstanding.expires_at)
+    if restante > 0:
+        cache.set(chave_jti(outstanding.jti), REVOGADO, restante)
+
+
+class CachedRefreshToken(RefreshToken):
+    """
+    ``RefreshToken`` que consulta a blacklist pelo cache.
+
+    ``usuario`` pode ser preenchido por quem já carregou o dono do token, para
+    que ``blacklist()`` e ``outstand()`` não o busquem de novo.
+    """
+
+    outstanding_id = None
+    usuario = None
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        estado = cache.get(chave_jti(jti))
+        if estado is None:
+            estado = self._consultar_blacklist(jti)
+        if estado is REVOGADO:
+            raise TokenError(_("Token is blacklisted"))
+        self.outstanding_id = estado
+
+    def _consultar_blacklist(self, jti):
+        # Uma query responde se o token foi emitido e se foi revogado.
+        linha = (
+            OutstandingToken.objects.filter(jti=jti)
+            .values_list("pk", "expires_at", "blacklistedtoken__id")
+            .first()
+        )
+        if linha is None:
+            return None
+        outstanding_id, expires_at, blacklisted_id = linha
+        outstanding = OutstandingToken(
+            pk=outstanding_id, jti=jti, expires_at=expires_at
+        )
+        if blacklisted_id is not None:
+            registrar_revogado(outstanding)
+            return REVOGADO
+        registrar_emitido(outstanding)
+        return outstanding_id
+
+    def blacklist(self):
+        if self.outstanding_id is None:
+            return super().blacklist()
+        # O OutstandingToken já é conhecido: a instância só precisa do que o
+        # sinal de post_save usa para atualizar o cache.
+        outstanding = OutstandingToken(
+            pk=self.outstanding_id,
+            jti=self.payload[api_settings.JTI_CLAIM],
+            expires_at=datetime_from_epoch(self.payload["exp"]),
+        )
+        # O cache indicou que o token não está revogado: tenta o INSERT direto.
+        try:
+            with transaction.atomic():
+                return BlacklistedToken.objects.create(token=outstanding), True
+        except IntegrityError:
+            try:
+                return BlacklistedToken.objects.get(token=outstanding), False
+            except BlacklistedToken.DoesNotExist:
+                # A linha em conflito sumiu entre o INSERT e a leitura (ex.:
+                # apagada pelo prune_tokens): refaz pelo get_or_create padrão.
+                return super().blacklist()
+
+    def outstand(self):
+        if self.usuario is None:
+            return super().outstand()
+        # Chamado logo após set_jti(): o jti é novo, não há o que buscar.
+        outstanding = OutstandingToken.objects.create(
+            user=self.usuario,
+            jti=self.payload[api_settings.JTI_CLAIM],
+            token=str(self),
+            created_at=self.current_time,
+            expires_at=datetime_from_epoch(self.payload["exp"]),
+        )
+        self.outstanding_id = outstanding.pk
+        return outstanding, True
+
+
+def remover_expirados(tamanho_lote=5000, ao_concluir_lote=None):
+    """
+    Apaga, em lotes, os tokens emitidos já expirados e suas entradas na
+    blacklist (em cascata). Cada lote é uma transação curta, então a limpeza
+    pode rodar com a aplicação no ar sem travar as tabelas.
+
+    Retorna ``(outstanding, blacklisted)`` com o total de linhas apagadas.
+    """
+    agora = timezone.now()
+    total_outstanding = total_blacklisted = 0
+    numero = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=agora)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:tamanho_lote]
+        )
+        if not ids:
+            break
+        with transaction.atomic():
+            _, apagados = OutstandingToken.objects.filter(pk__in=ids).delete()
+        numero += 1
+        total_outstanding += apagados.get(OutstandingToken._meta.label, 0)
+        total_blacklisted += apagados.get(BlacklistedToken._meta.label, 0)
+        if ao_concluir_lote:
+            ao_concluir_lote(numero, total_outstanding, total_blacklisted)
+    return total_outstanding, total_blacklisted
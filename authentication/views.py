@@ -17,6 +17,7 @@ from .serializers import (
     UsuarioPerfilSerializer,
     UsuarioRegistroSerializer,
 )
+from .tokens import CachedRefreshToken
 
 
 @swagger_auto_schema(
@@ -143,7 +144,7 @@ def sair(request):
     try:
         refresh_token = request.data.get("refresh")
         if refresh_token:
-            token = RefreshToken(refresh_token)
+            token = CachedRefreshToken(refresh_token)
             token.blacklist()
         return Response(
             {"mensagem": "Logout realizado com sucesso!"}, status=status.HTTP_200_OK
@@ -0,0 +1,218 @@
+"""
+Benchmark de implantação: gunicorn WSGI (sync e gthread) x ASGI (uvicorn).
+
+Sobe cada configuração de servidor com ``--workers`` workers sobre o mesmo
+banco de teste e dispara ``--requisicoes`` requisições HTTP com
+``--concorrencia`` clientes, alternando entre listagem e detalhe de
+profissionais, listagem de consultas por profissional e ``/health/``. O cache
+da listagem fica desligado e ``--latencia-ms`` acrescenta um atraso fixo a
+cada query (round trip até o Postgres), que é o que prende um worker síncrono.
+
+Requer ``uvicorn-worker`` instalado. Uso::
+
+    DATABASE_URL=sqlite:///bench.sqlite3 \\
+        python -m benchmarks.bench_asgi --concorrencia 32 --latencia-ms 5
+"""
+
+import argparse
+import http.client
+import os
+import subprocess  # nosec B404
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, urlunparse
+
+from benchmarks.utils import banco_de_teste, configurar_django, imprimir_tabela, resumo
+
+SERVIDORES = {
+    "WSGI sync": ("benchmarks.servidor:wsgi", ["--worker-class", "sync"], False),
+    "WSGI gthread (4 threads)": (
+        "benchmarks.servidor:wsgi",
+        ["--worker-class", "gthread", "--threads", "4"],
+        False,
+    ),
+    "ASGI uvicorn": (
+        "benchmarks.servidor:asgi",
+        ["--worker-class", "uvicorn_worker.UvicornWorker"],
+        True,
+    ),
+}
+
+
+def popular(profissionais, consultas_por_profissional):
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from consultas.models import Consulta
+    from profissionais.models import Profissional
+
+    Profissional.objects.bulk_create(
+        Profissional(
+            nome=f"Profissional {i}",
+            especialidade="Clínica Geral",
+            email=f"bench{i}@exemplo.com",
+            telefone="(11)99999-9999",
+        )
+        for i in range(profissionais)
+    )
+    ids = list(Profissional.objects.values_list("id", flat=True))
+    inicio = timezone.now() + timedelta(days=1)
+    Consulta.objects.bulk_create(
+        Consulta(
+            profissional_id=profissional_id,
+            paciente_nome=f"Paciente {j}",
+            data_hora=inicio + timedelta(hours=j),
+        )
+        for profissional_id in ids
+        for j in range(consultas_por_profissional)
+    )
+    return ids
+
+
+def url_do_banco(nome):
+    url = urlparse(os.environ["DATABASE_URL"])
+    if url.scheme == "sqlite":
+        return f"sqlite:///{nome}"
+    return urlunparse(url._replace(path="/" + nome))
+
+
+def iniciar(aplicacao, opcoes, asgi, porta, workers, banco, latencia_ms):
+    ambiente = {
+        **os.environ,
+        "DATABASE_URL": banco,
+        "DEBUG": "False",
+        "SECURE_SSL_REDIRECT": "False",
+        "ASGI_MODE": str(asgi),
+        "PROFISSIONAIS_LIST_CACHE_TIMEOUT": "0",
+        "BENCH_LATENCIA_MS": str(latencia_ms),
+    }
+    processo = subprocess.Popen(  # nosec B603
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--bind",
+            f"127.0.0.1:{porta}",
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            *opcoes,
+            aplicacao,
+        ],
+        env=ambiente,
+    )
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite:
+        try:
+            if requisitar(porta, "/health/")[0] == 200:
+                return processo
+        except OSError:
+            time.sleep(0.2)
+    processo.terminate()
+    raise RuntimeError("O servidor não respondeu em 30s.")
+
+
+def requisitar(porta, caminho):
+    conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=60)
+    try:
+        inicio = time.perf_counter()
+        conexao.request("GET", caminho)
+        resposta = conexao.getresponse()
+        resposta.read()
+        return resposta.status, time.perf_counter() - inicio
+    finally:
+        conexao.close()
+
+
+def executar(porta, caminhos, concorrencia, requisicoes):
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        resultados = list(
+            executor.map(
+                lambda indice: requisitar(porta, caminhos[indice % len(caminhos)]),
+                range(requisicoes),
+            )
+        )
+    total = time.perf_counter() - inicio
+    erros = sum(1 for status, _ in resultados if status != 200)
+    dados = resumo([duracao for _, duracao in resultados], total)
+    return {
+        "req_s": dados["req_s"],
+        "p50_ms": dados["p50_ms"],
+        "p99_ms": dados["p99_ms"],
+        "erros": erros,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concorrencia", type=int, default=32)
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--latencia-ms", type=float, default=5.0)
+    parser.add_argument("--profissionais", type=int, default=50)
+    parser.add_argument("--consultas", type=int, default=20)
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument(
+        "--servidores", nargs="+", choices=list(SERVIDORES), default=list(SERVIDORES)
+    )
+    args = parser.parse_args()
+
+    configurar_django()
+    from django.db import connection
+
+    if connection.vendor == "sqlite":
+        # Os servidores são outros processos: o banco de teste precisa ser um
+        # arquivo, não o SQLite em memória.
+        connection.settings_dict["TEST"]["NAME"] = os.path.abspath(
+            "bench_asgi_teste.sqlite3"
+        )
+    with banco_de_teste() as nome:
+        ids = popular(args.profissionais, args.consultas)
+        connection.close()
+        caminhos = []
+        for profissional_id in ids:
+            caminhos += [
+                "/api/profissionais/",
+                f"/api/profissionais/{profissional_id}/",
+                f"/api/consultas/?profissional_id={profissional_id}",
+                "/health/",
+            ]
+
+        linhas = []
+        for nome_servidor in args.servidores:
+            aplicacao, opcoes, asgi = SERVIDORES[nome_servidor]
+            processo = iniciar(
+                aplicacao,
+                opcoes,
+                asgi,
+                args.porta,
+                args.workers,
+                url_do_banco(nome),
+                args.latencia_ms,
+            )
+            try:
+                linhas.append(
+                    {
+                        "servidor": nome_servidor,
+                        **executar(
+                            args.porta, caminhos, args.concorrencia, args.requisicoes
+                        ),
+                    }
+                )
+            finally:
+                processo.terminate()
+                processo.wait()
+
+        imprimir_tabela(
+            f"{args.requisicoes} requisições, {args.concorrencia} clientes, "
+            f"{args.workers} workers, latência {args.latencia_ms} ms/query",
+            linhas,
+        )
+
+
+if __name__ == "__main__":
+    main()
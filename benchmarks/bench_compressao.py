@@ -0,0 +1,161 @@
+"""
+Benchmark da compressão das respostas: banda economizada x CPU gasta.
+
+Renderiza as listagens de profissionais e de consultas como a API entrega e,
+para cada codificação e nível, mede o tamanho comprimido, o tempo de
+comprimir (servidor) e de descomprimir (cliente). A latência estimada de
+entrega soma esses tempos ao tempo de transferência em cada banda de
+``--mbps``; a linha ``identity`` é a resposta sem compressão. Uma segunda
+tabela compara, no middleware, comprimir a cada resposta com servir a mesma
+versão (mesmo ``ETag``) do LRU de corpos comprimidos.
+
+Uso::
+
+    DATABASE_URL=sqlite:///bench.sqlite3 \\
+        python -m benchmarks.bench_compressao --volumes 100 1000 10000 --mbps 10 100
+"""
+
+import argparse
+import gzip
+import statistics
+
+from benchmarks.bench_json import payloads, popular
+from benchmarks.utils import banco_de_teste, configurar_django, imprimir_tabela, medir
+
+# (codificação, nível): extremos e o padrão de API_COMPRESSAO_OPCOES
+NIVEIS = [
+    ("gzip", 1),
+    ("gzip", 6),
+    ("gzip", 9),
+    ("br", 1),
+    ("br", 4),
+    ("br", 11),
+    ("zstd", 1),
+    ("zstd", 3),
+    ("zstd", 19),
+]
+
+
+def descompressores():
+    from core.compressao import brotli, zstandard
+
+    resultado = {"gzip": gzip.decompress}
+    if brotli is not None:
+        resultado["br"] = brotli.decompress
+    if zstandard is not None:
+        resultado["zstd"] = zstandard.ZstdDecompressor().decompress
+    return resultado
+
+
+def comparar(corpo, repeticoes, bandas):
+    from core.compressao import CODIFICADORES
+
+    def tempo(funcao):
+        return statistics.median(medir(funcao, repeticoes)) * 1000
+
+    def entrega(tamanho, servidor_ms, cliente_ms):
+        # Transferência: bytes * 8 / (Mbit/s * 1000) = ms
+        cpu_ms = servidor_ms + cliente_ms
+        return {
+            f"total_{mbps:g}mbps_ms": cpu_ms + tamanho * 8 / (mbps * 1000)
+            for mbps in bandas
+        }
+
+    linhas = [
+        {
+            "codificacao": "identity",
+            "nivel": "-",
+            "kb": len(corpo) / 1024,
+            "razao": 1.0,
+            "comprimir_ms": 0.0,
+            "descomprimir_ms": 0.0,
+            **entrega(len(corpo), 0, 0),
+        }
+    ]
+    descomprimir = descompressores()
+    for codificacao, nivel in NIVEIS:
+        if codificacao not in CODIFICADORES:
+            continue
+        unico = CODIFICADORES[codificacao][0]
+        comprimido = unico(corpo, nivel)
+        if descomprimir[codificacao](comprimido) != corpo:
+            raise AssertionError(f"{codificacao} {nivel} não reproduz o corpo")
+        comprimir_ms = tempo(lambda: unico(corpo, nivel))
+        descomprimir_ms = tempo(lambda: descomprimir[codificacao](comprimido))
+        linhas.append(
+            {
+                "codificacao": codificacao,
+                "nivel": nivel,
+                "kb": len(comprimido) / 1024,
+                "razao": len(corpo) / len(comprimido),
+                "comprimir_ms": comprimir_ms,
+                "descomprimir_ms": descomprimir_ms,
+                **entrega(len(comprimido), comprimir_ms, descomprimir_ms),
+            }
+        )
+    return linhas
+
+
+def cache(corpo, repeticoes):
+    """Custo de servir a mesma versão pelo middleware: compressão x LRU."""
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+
+    from core.compressao import CompressaoMiddleware
+
+    request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+
+    def resposta(etag):
+        response = HttpResponse(corpo, content_type="application/json")
+        if etag:
+            response["ETag"] = '"v1"'
+        return response
+
+    sem_etag = CompressaoMiddleware(lambda request: resposta(False))
+    com_etag = CompressaoMiddleware(lambda request: resposta(True))
+    com_etag(request)
+    return {
+        "sem_etag_ms": statistics.median(medir(lambda: sem_etag(request), repeticoes))
+        * 1000,
+        "cache_ms": statistics.median(medir(lambda: com_etag(request), repeticoes))
+        * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--volumes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--mbps", type=float, nargs="+", default=[10, 100])
+    parser.add_argument("--repeticoes", type=int, default=10)
+    args = parser.parse_args()
+
+    configurar_django()
+    from rest_framework.renderers import JSONRenderer
+
+    with banco_de_teste():
+        linhas, linhas_cache = [], []
+        for volume in sorted(args.volumes):
+            popular(volume)
+            for nome, dados in payloads(volume).items():
+                corpo = JSONRenderer().render(dados)
+                for linha in comparar(corpo, args.repeticoes, args.mbps):
+                    linhas.append({"payload": nome, "itens": volume, **linha})
+                linhas_cache.append(
+                    {
+                        "payload": nome,
+                        "itens": volume,
+                        **cache(corpo, args.repeticoes),
+                    }
+                )
+        imprimir_tabela(
+            f"Compressão das listagens (mediana de {args.repeticoes} execuções)",
+            linhas,
+        )
+        imprimir_tabela(
+            "Middleware com gzip: compressão a cada resposta x corpo do LRU (ETag)",
+            linhas_cache,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark de memória da exportação de consultas.
+
+Compara o pico de memória (``tracemalloc``) de serializar todas as consultas
+de uma vez, como a listagem JSON faz, com o da exportação em streaming, para
+volumes crescentes. Na exportação o pico deve ficar estável.
+
+Uso::
+
+    DATABASE_URL=sqlite:///bench.sqlite3 \\
+        python -m benchmarks.bench_consultas_exportacao --volumes 10000 50000
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import timedelta
+
+from benchmarks.utils import banco_de_teste, configurar_django, imprimir_tabela
+
+
+def popular(total):
+    from django.utils import timezone
+
+    from consultas.models import Consulta
+    from profissionais.models import Profissional
+
+    profissional, _ = Profissional.objects.get_or_create(
+        email="bench-export@exemplo.com",
+        defaults={
+            "nome": "Profissional Export",
+            "especialidade": "Clínica Geral",
+            "telefone": "(11)99999-9999",
+        },
+    )
+    existentes = Consulta.objects.count()
+    inicio = timezone.now() + timedelta(days=1)
+    Consulta.objects.bulk_create(
+        (
+            Consulta(
+                profissional=profissional,
+                paciente_nome=f"Paciente {i}",
+                data_hora=inicio + timedelta(minutes=30 * i),
+                observacoes="Retorno",
+            )
+            for i in range(existentes, total)
+        ),
+        batch_size=5000,
+    )
+
+
+def serializar_tudo():
+    import json
+
+    from consultas.models import Consulta
+    from consultas.serializers import ConsultaSerializer
+
+    dados = ConsultaSerializer(Consulta.objects.all(), many=True).data
+    return len(json.dumps(dados, default=str))
+
+
+def exportar_streaming():
+    from consultas.exportacao import consultas_para_exportar, exportar
+
+    return sum(len(bloco) for bloco in exportar(consultas_para_exportar(), "ndjson"))
+
+
+def medir_pico(funcao):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcao()
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duracao, pico / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--volumes", type=int, nargs="+", default=[10000, 50000])
+    args = parser.parse_args()
+
+    configurar_django()
+    with banco_de_teste():
+        linhas = []
+        for volume in sorted(args.volumes):
+            popular(volume)
+            for nome, funcao in (
+                ("serializer.data (lista)", serializar_tudo),
+                ("exportação (streaming)", exportar_streaming),
+            ):
+                duracao, pico = medir_pico(funcao)
+                linhas.append(
+                    {
+                        "consultas": volume,
+                        "implementacao": nome,
+                        "tempo_s": duracao,
+                        "pico_mb": pico,
+                    }
+                )
+        imprimir_tabela("Pico de memória exportando todas as consultas", linhas)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark da listagem de consultas filtrada por ``profissional_id``.
+
+Compara a implementação anterior (``EXISTS`` seguido da busca da página, dois
+round trips) com a atual (uma única query, com o 404 derivado da página) sob
+carga concorrente. Como o custo dominante em produção é o round trip até o
+Postgres, ``--latencia-ms`` acrescenta um atraso fixo a cada query.
+
+Uso::
+
+    DATABASE_URL=sqlite:///bench.sqlite3 \\
+        python -m benchmarks.bench_consultas_listagem --threads 8 --latencia-ms 2
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from benchmarks.utils import (
+    banco_de_teste,
+    configurar_django,
+    imprimir_tabela,
+    latencia_simulada,
+    resumo,
+    sem_throttle,
+)
+
+
+def popular(profissionais, consultas_por_profissional):
+    from django.utils import timezone
+
+    from consultas.models import Consulta
+    from profissionais.models import Profissional
+
+    Profissional.objects.bulk_create(
+        Profissional(
+            nome=f"Profissional {i}",
+            especialidade="Clínica Geral",
+            email=f"bench{i}@exemplo.com",
+            telefone="(11)99999-9999",
+        )
+        for i in range(profissionais)
+    )
+    inicio = timezone.now() + timedelta(days=1)
+    ids = list(Profissional.objects.values_list("id", flat=True))
+    for profissional_id in ids:
+        Consulta.objects.bulk_create(
+            Consulta(
+                profissional_id=profissional_id,
+                paciente_nome=f"Paciente {j}",
+                data_hora=inicio + timedelta(hours=j),
+            )
+            for j in range(consultas_por_profissional)
+        )
+    return ids
+
+
+def montar_views():
+    from rest_framework.exceptions import NotFound
+    from rest_framework.response import Response
+
+    from consultas.views import ConsultaViewSet
+
+    class ConsultaViewSetLegado(ConsultaViewSet):
+        """Listagem como era antes: EXISTS + página."""
+
+        def paginate_queryset(self, queryset):
+            return super(ConsultaViewSet, self).paginate_queryset(queryset)
+
+        def list(self, request, *args, **kwargs):
+            queryset = self.filter_queryset(self.get_queryset())
+            if request.query_params.get("profissional_id") and not queryset.exists():
+                raise NotFound(
+                    detail="Nenhuma consulta encontrada para o profissional informado."
+                )
+            page = self.paginate_queryset(queryset)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+    return {
+        "legado (EXISTS + página)": sem_throttle(ConsultaViewSetLegado).as_view(
+            {"get": "list"}
+        ),
+        "atual (uma query)": sem_throttle(ConsultaViewSet).as_view({"get": "list"}),
+    }
+
+
+def executar(view, ids, threads, requisicoes, latencia):
+    from rest_framework.test import APIRequestFactory
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    factory = APIRequestFactory()
+
+    def requisicao(indice):
+        profissional_id = ids[indice % len(ids)]
+        request = factory.get("/api/consultas/", {"profissional_id": profissional_id})
+        with latencia_simulada(latencia), CaptureQueriesContext(connection) as ctx:
+            inicio = time.perf_counter()
+            response = view(request)
+            response.render()
+            duracao = time.perf_counter() - inicio
+        return duracao, len(ctx.captured_queries)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        resultados = list(executor.map(requisicao, range(requisicoes)))
+    total = time.perf_counter() - inicio
+
+    duracoes = [duracao for duracao, _ in resultados]
+    queries = sum(qtd for _, qtd in resultados) / len(resultados)
+    return {**resumo(duracoes, total), "queries_req": queries}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profissionais", type=int, default=50)
+    parser.add_argument("--consultas", type=int, default=40)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--latencia-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    configurar_django()
+    with banco_de_teste():
+        ids = popular(args.profissionais, args.consultas)
+        linhas = []
+        for nome, view in montar_views().items():
+            linhas.append(
+                {
+                    "implementacao": nome,
+                    **executar(
+                        view,
+                        ids,
+                        args.threads,
+                        args.requisicoes,
+                        args.latencia_ms / 1000,
+                    ),
+                }
+            )
+        imprimir_tabela(
+            f"GET /api/consultas/?profissional_id=... "
+            f"({args.threads} threads, latência {args.latencia_ms} ms/query)",
+            linhas,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Teste de carga: rajada de logins concorrendo com a listagem de profissionais.
+
+Simula um worker gunicorn ``gthread`` com ``--threads`` threads de requisição.
+No instante zero chegam ``--logins`` logins de uma vez; em seguida chegam
+listagens a cada ``--intervalo-ms``. Compara o hash de senha na própria
+thread da requisição (hasher padrão do Django) com o pool limitado
+(``PooledPBKDF2PasswordHasher``), medindo a latência das listagens desde a
+chegada (inclui a espera por uma thread livre) e o resultado dos logins.
+
+Uso::
+
+    DATABASE_URL=sqlite:///bench.sqlite3 \\
+        python -m benchmarks.bench_hashing --threads 4 --logins 24
+"""
+
+import argparse
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.utils import (
+    banco_de_teste,
+    configurar_django,
+    imprimir_tabela,
+    resumo,
+    sem_throttle,
+)
+
+SENHA = "senha-do-benchmark"  # nosec B105
+
+
+def popular(profissionais):
+    from django.contrib.auth.models import User
+
+    from profissionais.models import Profissional
+
+    User.objects.create_user(username="bench", password=SENHA)
+    Profissional.objects.bulk_create(
+        Profissional(
+            nome=f"Profissional {i}",
+            especialidade="Clínica Geral",
+            email=f"bench{i}@exemplo.com",
+            telefone="(11)99999-9999",
+        )
+        for i in range(profissionais)
+    )
+
+
+def montar_views():
+    from authentication.views import entrar
+    from profissionais.views import ProfissionalViewSet
+
+    return (
+        sem_throttle(entrar.cls).as_view(),
+        sem_throttle(ProfissionalViewSet).as_view({"get": "list"}),
+    )
+
+
+def executar(threads, logins, listagens, intervalo):
+    from rest_framework.test import APIRequestFactory
+
+    from django.db import connection
+
+    view_login, view_listagem = montar_views()
+    factory = APIRequestFactory()
+
+    def login(chegada):
+        request = factory.post(
+            "/api/auth/entrar/",
+            {"nome_usuario": "bench", "senha": SENHA},
+            format="json",
+        )
+        response = view_login(request)
+        connection.close()
+        return response.status_code, time.perf_counter() - chegada
+
+    def listagem(chegada):
+        response = view_listagem(factory.get("/api/profissionais/"))
+        response.render()
+        connection.close()
+        return response.status_code, time.perf_counter() - chegada
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futuros_login = [
+            executor.submit(login, time.perf_counter()) for _ in range(logins)
+        ]
+        futuros_listagem = []
+        for _ in range(listagens):
+            futuros_listagem.append(executor.submit(listagem, time.perf_counter()))
+            time.sleep(intervalo)
+        resultados_login = [futuro.result() for futuro in futuros_login]
+        resultados_listagem = [futuro.result() for futuro in futuros_listagem]
+    total = time.perf_counter() - inicio
+
+    status_login = Counter(status for status, _ in resultados_login)
+    aceitos = [duracao for status, duracao in resultados_login if status == 200]
+    dados = resumo([duracao for _, duracao in resultados_listagem])
+    return {
+        "listagem_p50_ms": dados["p50_ms"],
+        "listagem_p99_ms": dados["p99_ms"],
+        "logins_200": status_login.get(200, 0),
+        "logins_503": status_login.get(503, 0),
+        "login_max_ms": max(aceitos) * 1000 if aceitos else 0.0,
+        "total_s": total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--logins", type=int, default=24)
+    parser.add_argument("--listagens", type=int, default=200)
+    parser.add_argument("--intervalo-ms", type=float, default=20.0)
+    parser.add_argument("--trabalhadores", type=int, default=1)
+    parser.add_argument("--max-fila", type=int, default=2)
+    parser.add_argument("--profissionais", type=int, default=100)
+    args = parser.parse_args()
+
+    configurar_django()
+    from django.db import connection
+    from django.test import override_settings
+
+    from authentication import hashing
+
+    cenarios = {
+        "hash na thread da requisição": [
+            "django.contrib.auth.hashers.PBKDF2PasswordHasher"
+        ],
+        f"pool ({args.trabalhadores} thread, fila {args.max_fila})": [
+            "authentication.hashing.PooledPBKDF2PasswordHasher"
+        ],
+    }
+    if connection.vendor == "sqlite":
+        # O SQLite em memória compartilhada trava a tabela inteira nas escritas
+        # concorrentes dos logins (OutstandingToken); um arquivo usa locks do banco.
+        connection.settings_dict["TEST"]["NAME"] = "bench_hashing_teste.sqlite3"
+    with banco_de_teste(), override_settings(PROFISSIONAIS_LIST_CACHE_TIMEOUT=0):
+        popular(args.profissionais)
+        linhas = []
+        for nome, hashers in cenarios.items():
+            hashing._pool = hashing.PoolHashing(
+                args.trabalhadores, args.max_fila, timeout=30
+            )
+            with override_settings(PASSWORD_HASHERS=hashers):
+                linhas.append(
+                    {
+                        "cenario": nome,
+                        **executar(
+                            args.threads,
+                            args.logins,
+                            args.listagens,
+                            args.intervalo_ms / 1000,
+                        ),
+                    }
+                )
+        imprimir_tabela(
+            f"{args.logins} logins simultâneos + {args.listagens} listagens "
+            f"({args.threads} threads de requisição)",
+            linhas,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark do JSON da API: ``JSONRenderer``/``JSONParser`` do DRF x orjson.
+
+Monta as listagens de profissionais e de consultas com os serializers da API
+(os mesmos dados que as views entregam ao renderer) e mede, para cada volume,
+o tempo de renderizar a lista e de ler o mesmo corpo com o parser. Confere
+antes que as duas saídas são idênticas.
+
+Uso::
+
+    DATABASE_URL=sqlite:///bench.sqlite3 \\
+        python -m benchmarks.bench_json --volumes 100 1000 10000
+"""
+
+import argparse
+import io
+import statistics
+from datetime import timedelta
+
+from benchmarks.utils import banco_de_teste, configurar_django, imprimir_tabela, medir
+
+
+def popular(total):
+    from django.utils import timezone
+
+    from consultas.models import Consulta
+    from profissionais.models import Profissional
+
+    existentes = Profissional.objects.count()
+    Profissional.objects.bulk_create(
+        (
+            Profissional(
+                nome=f"Profissional {i}",
+                nome_social=f"Nome Social {i}" if i % 3 == 0 else None,
+                especialidade="Clínica Geral",
+                email=f"bench{i}@exemplo.com",
+                telefone="(11)99999-9999",
+            )
+            for i in range(existentes, total)
+        ),
+        batch_size=5000,
+    )
+    profissionais = list(Profissional.objects.values_list("id", flat=True)[:50])
+    inicio = timezone.now() + timedelta(days=1)
+    existentes = Consulta.objects.count()
+    Consulta.objects.bulk_create(
+        (
+            Consulta(
+                profissional_id=profissionais[i % len(profissionais)],
+                paciente_nome=f"Paciente {i}",
+                data_hora=inicio + timedelta(minutes=30 * i),
+                observacoes="Retorno — trazer exames",
+            )
+            for i in range(existentes, total)
+        ),
+        batch_size=5000,
+    )
+
+
+def payloads(total):
+    from consultas.models import Consulta
+    from consultas.serializers import ConsultaSerializer
+    from profissionais.models import Profissional
+    from profissionais.serializers import ProfissionalListSerializer
+
+    return {
+        "profissionais": ProfissionalListSerializer(
+            Profissional.objects.order_by("id")[:total], many=True
+        ).data,
+        "consultas": ConsultaSerializer(
+            Consulta.objects.select_related("profissional").order_by("id")[:total],
+            many=True,
+        ).data,
+    }
+
+
+def comparar(dados, repeticoes):
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from core.json_rapido import OrjsonParser, OrjsonRenderer
+
+    corpo = JSONRenderer().render(dados)
+    if OrjsonRenderer().render(dados) != corpo:
+        raise AssertionError("Saída do OrjsonRenderer difere do JSONRenderer")
+
+    def tempo(funcao):
+        return statistics.median(medir(funcao, repeticoes)) * 1000
+
+    render_drf = tempo(lambda: JSONRenderer().render(dados))
+    render_orjson = tempo(lambda: OrjsonRenderer().render(dados))
+    parse_drf = tempo(lambda: JSONParser().parse(io.BytesIO(corpo)))
+    parse_orjson = tempo(lambda: OrjsonParser().parse(io.BytesIO(corpo)))
+    return {
+        "kb": len(corpo) / 1024,
+        "render_drf_ms": render_drf,
+        "render_orjson_ms": render_orjson,
+        "render_x": render_drf / render_orjson,
+        "parse_drf_ms": parse_drf,
+        "parse_orjson_ms": parse_orjson,
+        "parse_x": parse_drf / parse_orjson,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--volumes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    configurar_django()
+    with banco_de_teste():
+        linhas = []
+        for volume in sorted(args.volumes):
+            popular(volume)
+            for nome, dados in payloads(volume).items():
+                linhas.append(
+                    {
+                        "payload": nome,
+                        "itens": volume,
+                        **comparar(dados, args.repeticoes),
+                    }
+                )
+        imprimir_tabela(
+            f"Renderização e parsing JSON (mediana de {args.repeticoes} execuções)",
+            linhas,
+        )
+
+
+if __name__ == "__main__":
+    main()
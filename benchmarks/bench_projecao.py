@@ -0,0 +1,94 @@
+"""
+Benchmark das listagens: serializer x projeção com ``values_list``.
+
+Para cada volume, monta a listagem de profissionais e a de consultas como as
+views faziam (queryset do modelo passado ao serializer) e como fazem agora
+(``Projecao`` da view), incluindo a query. Confere antes que as duas saídas
+são idênticas e mostra o custo por linha de cada caminho.
+
+Uso::
+
+    DATABASE_URL=sqlite:///bench.sqlite3 \\
+        python -m benchmarks.bench_projecao --volumes 100 1000 10000
+"""
+
+import argparse
+import statistics
+
+from benchmarks.bench_json import popular
+from benchmarks.utils import banco_de_teste, configurar_django, imprimir_tabela, medir
+
+
+def listagens(total):
+    from consultas.models import Consulta
+    from consultas.serializers import ConsultaSerializer
+    from consultas.views import ConsultaViewSet
+    from profissionais.models import Profissional
+    from profissionais.serializers import ProfissionalListSerializer
+    from profissionais.views import ProfissionalViewSet
+
+    return {
+        "profissionais": (
+            ProfissionalListSerializer,
+            ProfissionalViewSet.projecao_listagem,
+            Profissional.objects.order_by("id")[:total],
+        ),
+        "consultas": (
+            ConsultaSerializer,
+            ConsultaViewSet.projecao_listagem,
+            Consulta.objects.order_by("id")[:total],
+        ),
+    }
+
+
+def comparar(serializer_class, projecao, queryset, repeticoes):
+    def serializar():
+        return serializer_class(queryset.all(), many=True).data
+
+    def projetar():
+        return projecao.dados(projecao.aplicar(queryset.all()))
+
+    if [list(item.items()) for item in projetar()] != [
+        list(item.items()) for item in serializar()
+    ]:
+        raise AssertionError(f"Projeção difere de {serializer_class.__name__}")
+
+    linhas = queryset.count()
+    serializer_ms = statistics.median(medir(serializar, repeticoes)) * 1000
+    projecao_ms = statistics.median(medir(projetar, repeticoes)) * 1000
+    return {
+        "serializer_ms": serializer_ms,
+        "projecao_ms": projecao_ms,
+        "serializer_us_linha": serializer_ms * 1000 / linhas,
+        "projecao_us_linha": projecao_ms * 1000 / linhas,
+        "x": serializer_ms / projecao_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--volumes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    configurar_django()
+    with banco_de_teste():
+        linhas = []
+        for volume in sorted(args.volumes):
+            popular(volume)
+            for nome, caso in listagens(volume).items():
+                linhas.append(
+                    {
+                        "listagem": nome,
+                        "itens": volume,
+                        **comparar(*caso, args.repeticoes),
+                    }
+                )
+        imprimir_tabela(
+            f"Montagem das listagens (mediana de {args.repeticoes} execuções)",
+            linhas,
+        )
+
+
+if __name__ == "__main__":
+    main()
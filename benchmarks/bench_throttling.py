@@ -0,0 +1,118 @@
+"""
+Microbenchmark dos throttles: lista de timestamps do DRF x janela deslizante.
+
+Para cada implementação, ``--chaves`` clientes fazem ``--requisicoes``
+requisições cada (por padrão o limite inteiro de ``listing: 500/hour``),
+medindo o tempo de cada ``allow_request``, o número de acessos ao cache
+compartilhado e o tamanho do valor gravado por chave. A janela deslizante é
+medida com e sem o pré-filtro local. Não usa banco de dados.
+
+Uso::
+
+    python -m benchmarks.bench_throttling --chaves 20 --requisicoes 500
+"""
+
+import argparse
+import pickle
+import time
+
+from benchmarks.utils import configurar_django, imprimir_tabela, resumo
+
+
+class CacheContado:
+    """Repassa as chamadas ao cache padrão contando os acessos."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.acessos = 0
+
+    def get(self, *args, **kwargs):
+        self.acessos += 1
+        return self.cache.get(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        self.acessos += 1
+        return self.cache.set(*args, **kwargs)
+
+
+def montar_throttles(taxa):
+    from rest_framework.throttling import AnonRateThrottle
+
+    from core.throttling import AnonSlidingWindowThrottle
+
+    def com_taxa(classe, **atributos):
+        return type(
+            classe.__name__, (classe,), {"scope": "bench", "rate": taxa, **atributos}
+        )
+
+    return {
+        "DRF SimpleRateThrottle (lista)": com_taxa(AnonRateThrottle),
+        "janela deslizante": com_taxa(AnonSlidingWindowThrottle),
+        "janela deslizante + pré-filtro local": com_taxa(
+            AnonSlidingWindowThrottle, pre_filtro_local=True
+        ),
+    }
+
+
+def executar(classe, chaves, requisicoes):
+    from rest_framework.test import APIRequestFactory
+
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.cache import cache
+
+    from core.throttling import pre_filtro
+
+    cache.clear()
+    pre_filtro.limpar()
+    classe.cache = contado = CacheContado(cache)
+    factory = APIRequestFactory()
+    pedidos = []
+    for indice in range(chaves):
+        request = factory.get("/", REMOTE_ADDR=f"10.0.{indice // 256}.{indice % 256}")
+        request.user = AnonymousUser()
+        pedidos.append(request)
+
+    duracoes = []
+    negadas = 0
+    for _ in range(requisicoes):
+        for request in pedidos:
+            throttle = classe()
+            inicio = time.perf_counter()
+            permitida = throttle.allow_request(request, None)
+            duracoes.append(time.perf_counter() - inicio)
+            negadas += not permitida
+
+    bytes_por_chave = len(pickle.dumps(cache.get(throttle.key)))
+    dados = resumo(duracoes)
+    return {
+        "n": dados["n"],
+        "media_us": dados["media_ms"] * 1000,
+        "p50_us": dados["p50_ms"] * 1000,
+        "p99_us": dados["p99_ms"] * 1000,
+        "negadas": negadas,
+        "acessos_cache": contado.acessos,
+        "bytes_chave": bytes_por_chave,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chaves", type=int, default=20)
+    parser.add_argument("--requisicoes", type=int, default=500)
+    parser.add_argument("--taxa", default="500/hour")
+    args = parser.parse_args()
+
+    configurar_django()
+    linhas = [
+        {"implementacao": nome, **executar(classe, args.chaves, args.requisicoes)}
+        for nome, classe in montar_throttles(args.taxa).items()
+    ]
+    imprimir_tabela(
+        f"allow_request com {args.taxa}, {args.chaves} chaves x "
+        f"{args.requisicoes} requisições (LocMemCache)",
+        linhas,
+    )
+
+
+if __name__ == "__main__":
+    main()
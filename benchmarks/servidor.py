@@ -0,0 +1,40 @@
+"""
+Aplicações WSGI/ASGI usadas pelo ``bench_asgi`` nos servidores gunicorn.
+
+Iguais a ``core.wsgi``/``core.asgi``, com duas diferenças para o benchmark:
+o throttle das listagens fica sem limite e, com ``BENCH_LATENCIA_MS``, cada
+query ganha um atraso fixo (o round trip até um Postgres remoto).
+"""
+
+import os
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+
+def _preparar():
+    from django.db.backends.signals import connection_created
+
+    from core.throttling import ListingRateThrottle
+
+    ListingRateThrottle.rate = "1000000/hour"
+
+    latencia = float(os.environ.get("BENCH_LATENCIA_MS", "0")) / 1000
+    if latencia:
+
+        def atrasar(execute, sql, params, many, context):
+            time.sleep(latencia)
+            return execute(sql, params, many, context)
+
+        def instalar(sender, connection, **kwargs):
+            connection.execute_wrappers.append(atrasar)
+
+        connection_created.connect(instalar, weak=False)
+
+
+from django.core.asgi import get_asgi_application  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+wsgi = get_wsgi_application()
+asgi = get_asgi_application()
+_preparar()
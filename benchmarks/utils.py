@@ -0,0 +1,112 @@
+"""
+Utilitários compartilhados pelos benchmarks.
+
+Cada benchmark cria o próprio banco de teste (como o ``manage.py test``) a
+partir do ``DATABASE_URL`` configurado, popula os dados e o destrói ao final.
+Execute a partir da raiz do projeto, por exemplo::
+
+    DATABASE_URL=sqlite:///bench.sqlite3 python -m benchmarks.bench_consultas_listagem
+"""
+
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+
+def configurar_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def banco_de_teste():
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    nome_original = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection.settings_dict["NAME"]
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+        teardown_test_environment()
+
+
+def sem_throttle(viewset_class):
+    """Subclasse do viewset sem throttling, para medir apenas a view."""
+    return type(
+        f"{viewset_class.__name__}SemThrottle",
+        (viewset_class,),
+        {"get_throttles": lambda self: []},
+    )
+
+
+@contextmanager
+def latencia_simulada(segundos):
+    """
+    Acrescenta ``segundos`` a cada query da conexão da thread atual, simulando
+    o round trip de rede até um Postgres remoto.
+    """
+    from django.db import connection
+
+    def atrasar(execute, sql, params, many, context):
+        time.sleep(segundos)
+        return execute(sql, params, many, context)
+
+    if not segundos:
+        yield
+        return
+    with connection.execute_wrapper(atrasar):
+        yield
+
+
+def medir(funcao, repeticoes):
+    duracoes = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        duracoes.append(time.perf_counter() - inicio)
+    return duracoes
+
+
+def resumo(duracoes, total_segundos=None):
+    ordenadas = sorted(duracoes)
+    p99 = ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.99))]
+    dados = {
+        "n": len(duracoes),
+        "media_ms": statistics.fmean(duracoes) * 1000,
+        "p50_ms": statistics.median(duracoes) * 1000,
+        "p99_ms": p99 * 1000,
+    }
+    if total_segundos:
+        dados["req_s"] = len(duracoes) / total_segundos
+    return dados
+
+
+def imprimir_tabela(titulo, linhas):
+    """Imprime uma lista de dicionários como tabela alinhada."""
+    print(f"\n{titulo}")
+    if not linhas:
+        return
+    colunas = list(linhas[0])
+    larguras = {
+        coluna: max(len(coluna), *(len(_formatar(linha[coluna])) for linha in linhas))
+        for coluna in colunas
+    }
+    print("  ".join(coluna.ljust(larguras[coluna]) for coluna in colunas))
+    for linha in linhas:
+        print(
+            "  ".join(
+                _formatar(linha[coluna]).ljust(larguras[coluna]) for coluna in colunas
+            )
+        )
+
+
+def _formatar(valor):
+    if isinstance(valor, float):
+        return f"{valor:.2f}"
+    return str(valor)
@@ -0,0 +1,120 @@
+"""
+Exportação de consultas em NDJSON ou CSV, sem montar a resposta em memória.
+
+As linhas são lidas com ``.iterator(chunk_size=...)`` (cursor do servidor no
+PostgreSQL) como tuplas de ``values_list``, sem instanciar modelos, e
+escritas em blocos de até ``chunk_size`` linhas. O consumo de memória
+depende apenas do tamanho do bloco, não da quantidade de consultas.
+"""
+
+import csv
+import io
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from rest_framework import serializers
+
+from django.conf import settings
+
+from .models import Consulta
+
+CAMPOS = ["id", "profissional_id", "paciente_nome", "data_hora", "observacoes"]
+
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def consultas_para_exportar(profissional_id=None, inicio=None, fim=None):
+    """Consultas em ordem cronológica, filtradas por profissional e período."""
+    queryset = Consulta.objects.all()
+    if profissional_id is not None:
+        queryset = queryset.filter(profissional_id=profissional_id)
+    if inicio is not None:
+        queryset = queryset.filter(data_hora__gte=inicio)
+    if fim is not None:
+        queryset = queryset.filter(data_hora__lt=fim)
+    return queryset.order_by("data_hora", "id").values_list(*CAMPOS)
+
+
+def _formatador(formato):
+    """Cabeçalho e função que converte uma linha em texto no ``formato``."""
+    # Mesmo formato de data/hora da API.
+    data_hora = serializers.DateTimeField()
+    indice_data_hora = CAMPOS.index("data_hora")
+
+    if formato == "ndjson":
+
+        def formatar(linha):
+            registro = dict(zip(CAMPOS, linha))
+            registro["data_hora"] = data_hora.to_representation(linha[indice_data_hora])
+            return json.dumps(registro, ensure_ascii=False) + "\n"
+
+        return "", formatar
+
+    if formato == "csv":
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+
+        def formatar(linha):
+            linha = list(linha)
+            linha[indice_data_hora] = data_hora.to_representation(
+                linha[indice_data_hora]
+            )
+            escritor.writerow(linha)
+            conteudo = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return conteudo
+
+        return formatar(CAMPOS), formatar
+
+    raise ValueError(f"Formato não suportado: {formato}")
+
+
+def exportar(queryset, formato, chunk_size=None):
+    """
+    Gera o conteúdo da exportação em blocos de texto.
+
+    ``queryset`` deve ser um ``values_list`` com as colunas de ``CAMPOS``.
+    """
+    chunk_size = chunk_size or settings.CONSULTAS_EXPORTACAO_CHUNK_SIZE
+    cabecalho, formatar = _formatador(formato)
+    if cabecalho:
+        yield cabecalho
+
+    bloco = []
+    for linha in queryset.iterator(chunk_size=chunk_size):
+        bloco.append(formatar(linha))
+        if len(bloco) >= chunk_size:
+            yield "".join(bloco)
+            bloco = []
+    if bloco:
+        yield "".join(bloco)
+
+
+async def aexportar(queryset, formato, chunk_size=None):
+    """
+    Versão assíncrona de ``exportar`` para o modo ASGI.
+
+    O ``StreamingHttpResponse`` do Django consome um iterador síncrono sob
+    ASGI com ``sync_to_async(list)``, ou seja, monta a exportação inteira em
+    memória antes de enviar. Aqui cada bloco de ``chunk_size`` linhas é lido
+    e formatado em ``sync_to_async`` (sempre na mesma thread, a do cursor) e
+    enviado em seguida. O ``aiterator`` do ORM não serve: com
+    ``values_list`` ele executa a query no event loop.
+    """
+    chunk_size = chunk_size or settings.CONSULTAS_EXPORTACAO_CHUNK_SIZE
+    cabecalho, formatar = _formatador(formato)
+    if cabecalho:
+        yield cabecalho
+
+    linhas = queryset.iterator(chunk_size=chunk_size)
+
+    def proximo_bloco():
+        return "".join(formatar(linha) for linha in islice(linhas, chunk_size))
+
+    while bloco := await sync_to_async(proximo_bloco)():
+        yield bloco
@@ -0,0 +1,89 @@
+"""
+Criação de consultas em lote.
+
+Os itens são validados individualmente (sem queries), os profissionais do
+lote são resolvidos em uma única query e os conflitos de horário, tanto com
+consultas existentes quanto dentro do próprio lote, são detectados em uma
+única passada. As consultas válidas são inseridas com ``bulk_create`` em uma
+transação.
+"""
+
+from django.db import IntegrityError, transaction
+
+from profissionais.models import Profissional
+
+from .models import Consulta
+from .serializers import ConsultaLoteItemSerializer, ConsultaSerializer
+
+
+class ConflitoConcorrente(Exception):
+    """Outra requisição ocupou um dos horários entre a verificação e a inserção."""
+
+
+def _erro(indice, erros):
+    return {"indice": indice, "status": "erro", "erros": erros}
+
+
+def criar_consultas_em_lote(itens):
+    """
+    Cria as consultas válidas de ``itens`` e retorna o resultado de cada item,
+    na mesma ordem do lote.
+    """
+    resultados = [None] * len(itens)
+    candidatos = []
+    for indice, item in enumerate(itens):
+        serializer = ConsultaLoteItemSerializer(data=item)
+        if serializer.is_valid():
+            candidatos.append((indice, serializer.validated_data))
+        else:
+            resultados[indice] = _erro(indice, serializer.errors)
+
+    profissional_ids = {dados["profissional_id"] for _, dados in candidatos}
+    existentes = set(
+        Profissional.objects.filter(pk__in=profissional_ids)
+        .order_by()
+        .values_list("pk", flat=True)
+    )
+    ocupados = set(
+        Consulta.objects.filter(
+            profissional_id__in=existentes,
+            data_hora__in={dados["data_hora"] for _, dados in candidatos},
+        )
+        .order_by()
+        .values_list("profissional_id", "data_hora")
+    )
+
+    novas = []
+    reservados = set()
+    for indice, dados in candidatos:
+        horario = (dados["profissional_id"], dados["data_hora"])
+        if dados["profissional_id"] not in existentes:
+            resultados[indice] = _erro(
+                indice, {"profissional_id": ["Profissional não encontrado."]}
+            )
+        elif horario in ocupados:
+            resultados[indice] = _erro(
+                indice,
+                {"data_hora": ["O profissional já possui consulta neste horário."]},
+            )
+        elif horario in reservados:
+            resultados[indice] = _erro(
+                indice, {"data_hora": ["Horário repetido em outro item do lote."]}
+            )
+        else:
+            reservados.add(horario)
+            novas.append((indice, Consulta(**dados)))
+
+    try:
+        with transaction.atomic():
+            Consulta.objects.bulk_create([consulta for _, consulta in novas])
+    except IntegrityError as exc:
+        raise ConflitoConcorrente() from exc
+
+    for indice, consulta in novas:
+        resultados[indice] = {
+            "indice": indice,
+            "status": "criada",
+            "consulta": ConsultaSerializer(consulta).data,
+        }
+    return resultados
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from consultas.exportacao import FORMATOS, consultas_para_exportar, exportar
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta consultas em NDJSON ou CSV, lendo o banco em blocos "
+        "(memória constante independentemente do volume)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--formato", choices=list(FORMATOS), default="ndjson")
+        parser.add_argument("--profissional", type=int, help="ID do profissional")
+        parser.add_argument("--inicio", help="Data/hora ISO 8601 inicial (inclusiva)")
+        parser.add_argument("--fim", help="Data/hora ISO 8601 final (exclusiva)")
+        parser.add_argument(
+            "--saida", default="-", help="Arquivo de saída ou '-' para stdout"
+        )
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        queryset = consultas_para_exportar(
+            profissional_id=options["profissional"],
+            inicio=self._data_hora(options["inicio"], "--inicio"),
+            fim=self._data_hora(options["fim"], "--fim"),
+        )
+        blocos = exportar(queryset, options["formato"], options["chunk_size"])
+
+        if options["saida"] == "-":
+            for bloco in blocos:
+                self.stdout.write(bloco, ending="")
+            return
+
+        with open(options["saida"], "w", encoding="utf-8", newline="") as saida:
+            for bloco in blocos:
+                saida.write(bloco)
+        self.stderr.write(
+            self.style.SUCCESS(f"Exportação gravada em {options['saida']}.")
+        )
+
+    def _data_hora(self, valor, opcao):
+        if valor is None:
+            return None
+        try:
+            data_hora = parse_datetime(valor)
+        except ValueError:
+            data_hora = None
+        if data_hora is None:
+            raise CommandError(f"{opcao} deve ser uma data/hora ISO 8601.")
+        if timezone.is_naive(data_hora):
+            data_hora = timezone.make_aware(data_hora)
+        return data_hora
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-17 13:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("consultas", "0002_alter_consulta_options_consulta_atualizado_em_and_more"),
+        ("profissionais", "0004_profissional_busca"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="consulta",
+            name="consultas_c_data_ho_20c880_idx",
+        ),
+        migrations.AddIndex(
+            model_name="consulta",
+            index=models.Index(
+                fields=["-data_hora", "-id"], name="consulta_cursor_idx"
+            ),
+        ),
+    ]
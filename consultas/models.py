@@ -31,7 +31,8 @@ class Consulta(models.Model):
         ]
         indexes = [
             models.Index(fields=["profissional", "data_hora"]),
-            models.Index(fields=["data_hora"]),
+            # Mesma ordem do cursor da listagem (ConsultaCursorPagination).
+            models.Index(fields=["-data_hora", "-id"], name="consulta_cursor_idx"),
         ]
 
     def clean(self):
@@ -55,3 +55,34 @@ class ConsultaDetalheSerializer(serializers.ModelSerializer):
             "paciente_nome",
             "observacoes",
         ]
+
+
+class ConsultaLoteItemSerializer(ConsultaSerializer):
+    """
+    Item de uma criação em lote.
+
+    O profissional é resolvido e os conflitos de horário são verificados para
+    o lote inteiro de uma vez (ver ``lote.py``), então aqui não há queries.
+    """
+
+    profissional_id = serializers.IntegerField(min_value=1)
+
+    class Meta(ConsultaSerializer.Meta):
+        validators = []
+
+
+class ConsultaExportacaoParametrosSerializer(serializers.Serializer):
+    """Parâmetros da exportação de consultas (query string)."""
+
+    formato = serializers.ChoiceField(choices=["ndjson", "csv"], default="ndjson")
+    profissional_id = serializers.IntegerField(min_value=1, required=False)
+    inicio = serializers.DateTimeField(required=False)
+    fim = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        inicio, fim = attrs.get("inicio"), attrs.get("fim")
+        if inicio and fim and fim <= inicio:
+            raise serializers.ValidationError(
+                {"fim": "O fim do período deve ser posterior ao início."}
+            )
+        return attrs
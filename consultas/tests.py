@@ -1,14 +1,22 @@
+import csv
+import json
 from datetime import timedelta
+from io import StringIO
 
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from django.core.management import call_command
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.http import http_date
 
 from authentication.test_mixins import AuthenticatedTestMixin
+from core.pagination import ConsultaCursorPagination
+from core.test_mixins import QueryCountTestMixin
 from profissionais.models import Profissional
 
+from .exportacao import consultas_para_exportar, exportar
 from .models import Consulta
 
 
@@ -39,13 +47,13 @@ class ConsultaAPITest(AuthenticatedTestMixin, APITestCase):
     def test_listar_consultas(self):
         resp = self.client.get(self.list_url)
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(resp.data), 1)
+        self.assertEqual(len(resp.data["results"]), 1)
 
     def test_listar_consultas_vazio(self):
         Consulta.objects.all().delete()
         resp = self.client.get(self.list_url)
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(resp.data), 0)
+        self.assertEqual(len(resp.data["results"]), 0)
 
     def test_filtrar_consultas_por_profissional(self):
         # Cria outra consulta de outro prof
@@ -63,8 +71,8 @@ class ConsultaAPITest(AuthenticatedTestMixin, APITestCase):
         )
         resp = self.client.get(f"{self.list_url}?profissional_id={self.prof.pk}")
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(resp.data), 1)
-        self.assertEqual(resp.data[0]["paciente_nome"], "Paciente A")
+        self.assertEqual(len(resp.data["results"]), 1)
+        self.assertEqual(resp.data["results"][0]["paciente_nome"], "Paciente A")
 
     def test_detalhe_consulta(self):
         resp = self.client.get(self.detail_url)
@@ -168,3 +176,393 @@ class ConsultaAPITest(AuthenticatedTestMixin, APITestCase):
         }
         resp = self.client.post(self.list_url, data, format="json")
         self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+
+
+class ConsultaPaginacaoTest(APITestCase):
+    """Testes para a paginação por cursor da listagem de consultas"""
+
+    def setUp(self):
+        self.prof = Profissional.objects.create(
+            nome="Prof Paginação",
+            especialidade="Teste",
+            email="paginacao@teste.com",
+            telefone="(11)11111-1111",
+        )
+        inicio = timezone.now() + timedelta(days=1)
+        Consulta.objects.bulk_create(
+            Consulta(
+                profissional=self.prof,
+                paciente_nome=f"Paciente {i}",
+                data_hora=inicio + timedelta(hours=i),
+            )
+            for i in range(5)
+        )
+        self.list_url = reverse("consulta-list")
+
+    def test_resposta_paginada_com_cursor(self):
+        resp = self.client.get(self.list_url, {"page_size": 2})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data["results"]), 2)
+        self.assertIsNotNone(resp.data["next"])
+        self.assertIsNone(resp.data["previous"])
+        self.assertIn("cursor=", resp.data["next"])
+
+    def test_percorrer_todas_as_paginas(self):
+        url = f"{self.list_url}?page_size=2"
+        vistos = []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            vistos.extend(item["id"] for item in resp.data["results"])
+            url = resp.data["next"]
+
+        esperados = list(
+            Consulta.objects.order_by("-data_hora", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(vistos, esperados)
+
+    def test_page_size_limitado(self):
+        resp = self.client.get(self.list_url, {"page_size": 1000000})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(
+            len(resp.data["results"]), ConsultaCursorPagination.max_page_size
+        )
+
+    def test_cursor_invalido(self):
+        resp = self.client.get(self.list_url, {"cursor": "nao-e-um-cursor"})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConsultaGetCondicionalTest(APITestCase):
+    """Testes para ETag / Last-Modified nas consultas"""
+
+    def setUp(self):
+        self.prof = Profissional.objects.create(
+            nome="Prof ETag",
+            especialidade="Teste",
+            email="etag@teste.com",
+            telefone="(11)11111-1111",
+        )
+        self.consulta = Consulta.objects.create(
+            profissional=self.prof,
+            paciente_nome="Paciente A",
+            data_hora=timezone.now() + timedelta(days=1),
+        )
+        self.list_url = reverse("consulta-list")
+        self.detail_url = reverse("consulta-detail", kwargs={"pk": self.consulta.pk})
+
+    def test_listagem_retorna_validadores(self):
+        resp = self.client.get(self.list_url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", resp)
+
+    def test_listagem_nao_modificada(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        resp = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp["ETag"], etag)
+        self.assertEqual(resp.content, b"")
+
+    def test_listagem_muda_etag_apos_escrita(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        Consulta.objects.create(
+            profissional=self.prof,
+            paciente_nome="Paciente B",
+            data_hora=timezone.now() + timedelta(days=2),
+        )
+        resp = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp["ETag"], etag)
+
+    def test_etag_depende_dos_parametros(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        resp = self.client.get(
+            self.list_url,
+            {"profissional_id": self.prof.pk},
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_detalhe_nao_modificado(self):
+        resp = self.client.get(self.detail_url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        resp = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detalhe_if_modified_since(self):
+        last_modified = self.client.get(self.detail_url)["Last-Modified"]
+        resp = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detalhe_muda_com_o_profissional(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        self.prof.nome = "Prof Renomeado"
+        self.prof.especialidade = "Outra"
+        self.prof.save()
+
+        resp = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["profissional_nome"], "Prof Renomeado")
+        self.assertEqual(resp.data["profissional_especialidade"], "Outra")
+        self.assertEqual(
+            resp["Last-Modified"],
+            http_date(int(self.prof.atualizado_em.timestamp())),
+        )
+
+
+class ConsultaQueryCountTest(QueryCountTestMixin, APITestCase):
+    """Fixa o número de queries por endpoint para evitar regressões N+1"""
+
+    def setUp(self):
+        inicio = timezone.now() + timedelta(days=1)
+        consultas = []
+        for i in range(3):
+            prof = Profissional.objects.create(
+                nome=f"Prof {i}",
+                nome_social=f"Social {i}" if i % 2 else None,
+                especialidade="Teste",
+                email=f"prof{i}@queries.com",
+                telefone="(11)11111-1111",
+            )
+            consultas.extend(
+                Consulta(
+                    profissional=prof,
+                    paciente_nome=f"Paciente {i}-{j}",
+                    data_hora=inicio + timedelta(days=i, hours=j),
+                )
+                for j in range(4)
+            )
+        Consulta.objects.bulk_create(consultas)
+        self.prof = prof
+        self.consulta = Consulta.objects.filter(profissional=prof).first()
+        self.list_url = reverse("consulta-list")
+
+    def test_listagem(self):
+        # só a página: o ETag é derivado das linhas buscadas
+        resp = self.assertEndpointQueries(1, self.list_url)
+        self.assertEqual(len(resp.data["results"]), 12)
+
+    def test_listagem_filtrada_por_profissional(self):
+        # só a página: nem EXISTS nem agregação separada
+        resp = self.assertEndpointQueries(
+            1, self.list_url, data={"profissional_id": self.prof.pk}
+        )
+        self.assertEqual(len(resp.data["results"]), 4)
+
+    def test_listagem_filtrada_sem_resultados(self):
+        outro = Profissional.objects.create(
+            nome="Sem Consultas",
+            especialidade="Teste",
+            email="semconsultas@queries.com",
+            telefone="(11)11111-1111",
+        )
+        resp = self.assertEndpointQueries(
+            1, self.list_url, data={"profissional_id": outro.pk}
+        )
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_detalhe(self):
+        url = reverse("consulta-detail", kwargs={"pk": self.consulta.pk})
+        resp = self.assertEndpointQueries(1, url)
+        self.assertEqual(resp.data["profissional_nome"], "Prof 2")
+        self.assertEqual(resp.data["profissional_especialidade"], "Teste")
+
+
+class ConsultaLoteTest(AuthenticatedTestMixin, APITestCase):
+    """Testes para a criação de consultas em lote"""
+
+    def setUp(self):
+        self.prof = Profissional.objects.create(
+            nome="Prof Lote",
+            especialidade="Teste",
+            email="lote@teste.com",
+            telefone="(11)11111-1111",
+        )
+        self.outro = Profissional.objects.create(
+            nome="Outro Lote",
+            especialidade="Teste",
+            email="outrolote@teste.com",
+            telefone="(11)11111-1111",
+        )
+        self.inicio = (timezone.now() + timedelta(days=1)).replace(microsecond=0)
+        self.url = reverse("consulta-bulk")
+        self.authenticate_user()
+
+    def _item(self, profissional, horas, nome="Paciente"):
+        return {
+            "profissional_id": profissional.pk,
+            "paciente_nome": nome,
+            "data_hora": (self.inicio + timedelta(hours=horas)).isoformat(),
+        }
+
+    def test_criar_lote(self):
+        itens = [self._item(self.prof, i) for i in range(3)]
+        itens.append(self._item(self.outro, 0))
+        resp = self.client.post(self.url, itens, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data["criadas"], 4)
+        self.assertEqual(Consulta.objects.count(), 4)
+        self.assertEqual(
+            [resultado["status"] for resultado in resp.data["resultados"]],
+            ["criada"] * 4,
+        )
+        self.assertIsNotNone(resp.data["resultados"][0]["consulta"]["id"])
+
+    def test_lote_com_queries_fixas(self):
+        itens = [self._item(self.prof, i) for i in range(50)]
+        # usuário do JWT + profissionais + conflitos + insert (entre savepoints)
+        with self.assertNumQueries(6):
+            resp = self.client.post(self.url, itens, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+
+    def test_conflitos_e_erros_por_item(self):
+        Consulta.objects.create(
+            profissional=self.prof,
+            paciente_nome="Existente",
+            data_hora=self.inicio,
+        )
+        itens = [
+            self._item(self.prof, 0),  # conflita com consulta existente
+            self._item(self.prof, 1),
+            self._item(self.prof, 1),  # repetido no lote
+            {
+                "profissional_id": 999999,
+                "paciente_nome": "Paciente",
+                "data_hora": (self.inicio + timedelta(hours=3)).isoformat(),
+            },
+            self._item(self.prof, 2, nome="  "),  # nome inválido
+        ]
+        resp = self.client.post(self.url, itens, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_207_MULTI_STATUS)
+        resultados = resp.data["resultados"]
+        self.assertEqual(
+            [resultado["status"] for resultado in resultados],
+            ["erro", "criada", "erro", "erro", "erro"],
+        )
+        self.assertIn("data_hora", resultados[0]["erros"])
+        self.assertIn("data_hora", resultados[2]["erros"])
+        self.assertIn("profissional_id", resultados[3]["erros"])
+        self.assertIn("paciente_nome", resultados[4]["erros"])
+        self.assertEqual(Consulta.objects.count(), 2)
+
+    def test_lote_sem_nenhuma_valida(self):
+        resp = self.client.post(self.url, [self._item(self.prof, -48)], format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.data["criadas"], 0)
+
+    def test_lote_vazio_ou_invalido(self):
+        resp = self.client.post(self.url, [], format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.post(self.url, {"consulta": 1}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_lote_acima_do_limite(self):
+        with self.settings(CONSULTAS_LOTE_MAX_ITENS=2):
+            itens = [self._item(self.prof, i) for i in range(3)]
+            resp = self.client.post(self.url, itens, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Consulta.objects.count(), 0)
+
+    def test_lote_exige_autenticacao(self):
+        self.clear_authentication()
+        resp = self.client.post(self.url, [self._item(self.prof, 0)], format="json")
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ConsultaExportacaoTest(AuthenticatedTestMixin, APITestCase):
+    """Testes para a exportação de consultas em streaming"""
+
+    def setUp(self):
+        self.prof = Profissional.objects.create(
+            nome="Prof Export",
+            especialidade="Teste",
+            email="export@teste.com",
+            telefone="(11)11111-1111",
+        )
+        self.outro = Profissional.objects.create(
+            nome="Outro Export",
+            especialidade="Teste",
+            email="outroexport@teste.com",
+            telefone="(11)11111-1111",
+        )
+        self.inicio = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        for i in range(5):
+            Consulta.objects.create(
+                profissional=self.prof,
+                paciente_nome=f"Paciente {i}",
+                data_hora=self.inicio + timedelta(hours=i),
+                observacoes="linha 1\nlinha 2, com vírgula" if i == 0 else "",
+            )
+        Consulta.objects.create(
+            profissional=self.outro,
+            paciente_nome="Paciente Outro",
+            data_hora=self.inicio,
+        )
+        self.url = reverse("consulta-exportar")
+        self.authenticate_user()
+
+    def _conteudo(self, resp):
+        self.assertTrue(resp.streaming)
+        return b"".join(resp.streaming_content).decode()
+
+    def test_exportar_ndjson(self):
+        resp = self.client.get(self.url, {"profissional_id": self.prof.pk})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp["Content-Type"].startswith("application/x-ndjson"))
+        registros = [json.loads(linha) for linha in self._conteudo(resp).splitlines()]
+        self.assertEqual(
+            [registro["paciente_nome"] for registro in registros],
+            [f"Paciente {i}" for i in range(5)],
+        )
+        self.assertEqual(registros[0]["observacoes"], "linha 1\nlinha 2, com vírgula")
+        self.assertEqual(registros[0]["profissional_id"], self.prof.pk)
+
+    def test_exportar_csv_por_periodo(self):
+        resp = self.client.get(
+            self.url,
+            {
+                "formato": "csv",
+                "inicio": (self.inicio + timedelta(hours=1)).isoformat(),
+                "fim": (self.inicio + timedelta(hours=3)).isoformat(),
+            },
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertIn("consultas.csv", resp["Content-Disposition"])
+        linhas = list(csv.DictReader(StringIO(self._conteudo(resp))))
+        self.assertEqual(
+            [linha["paciente_nome"] for linha in linhas], ["Paciente 1", "Paciente 2"]
+        )
+
+    def test_exportar_em_blocos(self):
+        queryset = consultas_para_exportar()
+        blocos = list(exportar(queryset, "ndjson", chunk_size=2))
+        self.assertEqual(len(blocos), 3)
+        self.assertEqual(sum(bloco.count("\n") for bloco in blocos), 6)
+
+    def test_parametros_invalidos(self):
+        resp = self.client.get(self.url, {"formato": "xml"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.get(
+            self.url,
+            {"inicio": self.inicio.isoformat(), "fim": self.inicio.isoformat()},
+        )
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_exportar_sem_autenticacao(self):
+        self.clear_authentication()
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_comando_export_consultas(self):
+        saida = StringIO()
+        call_command(
+            "export_consultas",
+            "--formato=csv",
+            f"--profissional={self.outro.pk}",
+            stdout=saida,
+        )
+        linhas = list(csv.DictReader(StringIO(saida.getvalue())))
+        self.assertEqual(len(linhas), 1)
+        self.assertEqual(linhas[0]["paciente_nome"], "Paciente Outro")
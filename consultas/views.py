@@ -1,20 +1,39 @@
-from rest_framework import viewsets
-from rest_framework.exceptions import NotFound
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
 
+from core.assincrono import AsyncViewSetMixin
+from core.conditional import ConditionalGetMixin
+from core.pagination import ConsultaCursorPagination
+from core.projecao import Projecao
+from core.replicas import LeituraReplicaMixin
 from core.throttling import ConsultaCreateRateThrottle, ListingRateThrottle
 
+from .exportacao import FORMATOS, aexportar, consultas_para_exportar, exportar
+from .lote import ConflitoConcorrente, criar_consultas_em_lote
 from .models import Consulta
-from .serializers import ConsultaDetalheSerializer, ConsultaSerializer
+from .serializers import (
+    ConsultaDetalheSerializer,
+    ConsultaExportacaoParametrosSerializer,
+    ConsultaLoteItemSerializer,
+    ConsultaSerializer,
+)
 
 
-class ConsultaViewSet(viewsets.ModelViewSet):
+class ConsultaViewSet(
+    LeituraReplicaMixin, AsyncViewSetMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     queryset = Consulta.objects.all()
     serializer_class = ConsultaSerializer
+    pagination_class = ConsultaCursorPagination
+    projecao_listagem = Projecao(ConsultaSerializer)
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
 
     def get_permissions(self):
@@ -25,9 +44,9 @@ class ConsultaViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
 
     def get_throttles(self):
-        if self.action == "list":
+        if self.action in ["list", "exportar"]:
             throttle_classes = [ListingRateThrottle]
-        elif self.action in ["create", "update", "partial_update"]:
+        elif self.action in ["create", "update", "partial_update", "bulk"]:
             throttle_classes = [ConsultaCreateRateThrottle]
         else:
             throttle_classes = []
@@ -35,28 +54,107 @@ class ConsultaViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = super().get_queryset()
+        # A listagem lê só as colunas de projecao_listagem (values_list).
+        if self.action == "retrieve":
+            queryset = queryset.select_related("profissional").only(
+                "id",
+                "data_hora",
+                "paciente_nome",
+                "observacoes",
+                "atualizado_em",
+                "profissional__id",
+                "profissional__nome",
+                "profissional__nome_social",
+                "profissional__especialidade",
+                "profissional__atualizado_em",
+            )
         profissional_id = self.request.query_params.get("profissional_id")
         if profissional_id:
             queryset = queryset.filter(profissional_id=profissional_id)
         return queryset
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
+    def modificacoes_objeto(self, consulta):
+        # O detalhe embute nome e especialidade do profissional.
+        return [consulta.atualizado_em, consulta.profissional.atualizado_em]
 
-        if self.request.query_params.get("profissional_id") and not queryset.exists():
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        # A página já buscada responde se há consultas: sem cursor, página
+        # vazia significa que o filtro não encontrou nada (sem EXISTS extra).
+        if (
+            not page
+            and self.request.query_params.get("profissional_id")
+            and not self.request.query_params.get(self.paginator.cursor_query_param)
+        ):
             raise NotFound(
                 detail="Nenhuma consulta encontrada para o profissional informado."
             )
-
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return page
 
     def get_serializer_class(self):
         if self.action == "retrieve":
             return ConsultaDetalheSerializer
+        elif self.action == "bulk":
+            return ConsultaLoteItemSerializer
         return ConsultaSerializer
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        itens = request.data
+        if not isinstance(itens, list) or not itens:
+            raise ValidationError({"detail": "Envie uma lista não vazia de consultas."})
+        if len(itens) > settings.CONSULTAS_LOTE_MAX_ITENS:
+            raise ValidationError(
+                {
+                    "detail": "O lote pode ter no máximo "
+                    f"{settings.CONSULTAS_LOTE_MAX_ITENS} consultas."
+                }
+            )
+
+        try:
+            resultados = criar_consultas_em_lote(itens)
+        except ConflitoConcorrente:
+            return Response(
+                {
+                    "detail": "Um dos horários foi ocupado durante a importação. "
+                    "Nenhuma consulta foi criada; reenvie o lote."
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        criadas = sum(1 for resultado in resultados if resultado["status"] == "criada")
+        if criadas == len(resultados):
+            codigo = status.HTTP_201_CREATED
+        elif criadas:
+            codigo = status.HTTP_207_MULTI_STATUS
+        else:
+            codigo = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {
+                "criadas": criadas,
+                "com_erro": len(resultados) - criadas,
+                "resultados": resultados,
+            },
+            status=codigo,
+        )
+
+    @action(detail=False, methods=["get"])
+    def exportar(self, request):
+        parametros = ConsultaExportacaoParametrosSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        dados = parametros.validated_data
+        formato = dados["formato"]
+
+        queryset = consultas_para_exportar(
+            profissional_id=dados.get("profissional_id"),
+            inicio=dados.get("inicio"),
+            fim=dados.get("fim"),
+        )
+        # Sob ASGI, um iterador síncrono seria lido inteiro antes do envio.
+        gerar = aexportar if self.assincrona else exportar
+        response = StreamingHttpResponse(
+            gerar(queryset, formato),
+            content_type=f"{FORMATOS[formato]}; charset=utf-8",
+        )
+        response["Content-Disposition"] = f'attachment; filename="consultas.{formato}"'
+        return response
@@ -0,0 +1,82 @@
+"""
+Views assíncronas para os viewsets do DRF no modo ASGI.
+
+O DRF só despacha views síncronas; sob ASGI, o Django as executa em uma
+thread e cada requisição lenta no banco segura essa thread. Com
+``ASGI_MODE`` ligado, os viewsets com ``AsyncViewSetMixin`` viram views
+``async``: autenticação, permissões e throttles (síncronos no DRF) rodam em
+``sync_to_async`` e as ações de ``acoes_assincronas`` usam as versões
+``a<acao>`` (``alist``, ``aretrieve``), que acessam o banco pelo ORM
+assíncrono. As demais ações continuam síncronas, executadas em
+``sync_to_async``. Sem ``ASGI_MODE`` nada muda: o viewset segue síncrono.
+"""
+
+import functools
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+
+
+class AsyncViewSetMixin:
+    acoes_assincronas = ("list", "retrieve")
+    assincrona = False
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        if not settings.ASGI_MODE:
+            return super().as_view(actions, **initkwargs)
+
+        view = super().as_view(actions, assincrona=True, **initkwargs)
+
+        # O Django decide entre sync e async pela função da view.
+        async def view_assincrona(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)
+
+        return functools.update_wrapper(view_assincrona, view)
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.assincrona:
+            return self.adispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """Equivalente assíncrono de ``APIView.dispatch``."""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await self.handler_assincrono(request)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    def handler_assincrono(self, request):
+        metodo = request.method.lower()
+        if metodo not in self.http_method_names:
+            return sync_to_async(self.http_method_not_allowed)
+        if self.action in self.acoes_assincronas:
+            return getattr(self, f"a{self.action}")
+        return sync_to_async(getattr(self, metodo, self.http_method_not_allowed))
+
+    async def aget_object(self):
+        """Equivalente assíncrono de ``GenericAPIView.get_object``."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filtro = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filtro)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(
+                "No %s matches the given query." % queryset.model._meta.object_name
+            )
+        self.check_object_permissions(self.request, obj)
+        return obj
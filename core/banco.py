@@ -0,0 +1,43 @@
+"""
+Estatísticas do pool de conexões do PostgreSQL.
+
+Com ``DATABASE_POOL`` ligado, cada worker mantém um ``psycopg_pool.ConnectionPool``
+por alias (ver ``DATABASE_POOL_OPTIONS`` em ``core.settings``). O próprio pool
+conta os pedidos de conexão, o tempo de espera por uma conexão livre e o tempo
+de uso de cada conexão; aqui esses contadores viram o resumo exibido nos
+health checks. São cumulativos desde a abertura do pool, por processo.
+"""
+
+from django.db import connections
+
+
+def estatisticas_pool():
+    """Resumo dos pools de conexão do processo, por alias (vazio sem pool)."""
+    estatisticas = {}
+    for alias in connections:
+        conexao = connections[alias]
+        if conexao.vendor != "postgresql" or not conexao.settings_dict.get(
+            "OPTIONS", {}
+        ).get("pool"):
+            continue
+        estatisticas[alias] = resumir_pool(conexao.pool.get_stats())
+    return estatisticas
+
+
+def resumir_pool(dados):
+    """Converte o ``get_stats()`` do psycopg_pool (só traz chaves não nulas)."""
+    tamanho = dados.get("pool_size", 0)
+    requisicoes = dados.get("requests_num", 0)
+    return {
+        "min_size": dados.get("pool_min", 0),
+        "max_size": dados.get("pool_max", 0),
+        "size": tamanho,
+        "in_use": tamanho - dados.get("pool_available", 0),
+        "waiting": dados.get("requests_waiting", 0),
+        "requests": requisicoes,
+        "requests_queued": dados.get("requests_queued", 0),
+        "timeouts": dados.get("requests_errors", 0),
+        "wait_ms_total": dados.get("requests_wait_ms", 0),
+        "wait_ms_avg": round(dados.get("requests_wait_ms", 0) / (requisicoes or 1), 2),
+        "usage_ms_avg": round(dados.get("usage_ms", 0) / (requisicoes or 1), 2),
+    }
@@ -0,0 +1,242 @@
+"""
+Cache em duas camadas: LRU local por processo (L1) na frente do Redis (L2).
+
+O L2 é o cache compartilhado entre os workers (configurado em ``OPTIONS["L2"]``
+como um ``CACHES`` comum). O L1 guarda, por no máximo ``L1_TIMEOUT``
+segundos e ``L1_MAX_ENTRIES`` entradas, apenas as chaves que começam com um
+dos ``L1_PREFIXOS``: valores que não mudam sob a mesma chave, como a
+listagem de profissionais (a chave traz a versão da listagem) e os tokens JWT
+verificados. Contadores, throttles, blacklist e a própria chave de versão
+ficam fora do L1 e vão sempre ao Redis, então continuam consistentes entre os
+workers.
+
+Invalidação por versão: como no cache do Django, a versão (``version=``,
+``incr_version``) faz parte da chave, então uma versão nova nunca acerta uma
+entrada antiga do L1. ``clear()`` troca a geração gravada no L2, e cada
+processo descarta o seu L1 ao notar a troca (verificada a cada
+``L1_INTERVALO_GERACAO`` segundos).
+
+``estatisticas()`` devolve os acertos e falhas de cada camada no processo.
+"""
+
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+_AUSENTE = object()
+
+
+def chave_pronta(key, key_prefix, version):
+    """``KEY_FUNCTION`` do L2: recebe as chaves já montadas pelo L1."""
+    return key
+
+
+class CacheDuasCamadas(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        opcoes = params.get("OPTIONS", {})
+        l2 = dict(opcoes["L2"])
+        backend = import_string(l2.pop("BACKEND"))
+        self.l2 = backend(
+            l2.pop("LOCATION", ""),
+            {
+                **l2,
+                "TIMEOUT": self.default_timeout,
+                "KEY_FUNCTION": chave_pronta,
+            },
+        )
+        self.l1_max_entradas = int(opcoes.get("L1_MAX_ENTRIES", 1000))
+        self.l1_timeout = float(opcoes.get("L1_TIMEOUT", 5))
+        self.l1_prefixos = tuple(opcoes.get("L1_PREFIXOS", ()))
+        self.intervalo_geracao = float(opcoes.get("L1_INTERVALO_GERACAO", 1))
+        self._chave_geracao = self.make_key("cache:l1:geracao")
+        self._l1 = OrderedDict()
+        self._lock = threading.Lock()
+        self._geracao = None
+        self._proxima_verificacao = 0.0
+        self.limpar_estatisticas()
+
+    # L1
+
+    def _no_l1(self, key):
+        return self.l1_timeout > 0 and key.startswith(self.l1_prefixos)
+
+    def _verificar_geracao(self):
+        agora = time.monotonic()
+        if agora < self._proxima_verificacao:
+            return
+        self._proxima_verificacao = agora + self.intervalo_geracao
+        geracao = self.l2.get(self._chave_geracao)
+        if geracao is None:
+            self.l2.add(self._chave_geracao, time.time_ns(), None)
+            geracao = self.l2.get(self._chave_geracao)
+        if geracao != self._geracao:
+            with self._lock:
+                self._l1.clear()
+                self._geracao = geracao
+
+    def _l1_obter(self, chave):
+        with self._lock:
+            entrada = self._l1.get(chave)
+            if entrada is None:
+                self.l1_falhas += 1
+                return _AUSENTE
+            dados, expira_em = entrada
+            if expira_em <= time.monotonic():
+                del self._l1[chave]
+                self.l1_falhas += 1
+                return _AUSENTE
+            self._l1.move_to_end(chave)
+            self.l1_acertos += 1
+        # Cópia a cada leitura, como no LocMemCache: quem recebe pode alterar.
+        return pickle.loads(dados)  # nosec B301
+
+    def _l1_guardar(self, chave, valor, timeout=DEFAULT_TIMEOUT):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        ttl = self.l1_timeout if timeout is None else min(timeout, self.l1_timeout)
+        if ttl <= 0:
+            self._l1_remover(chave)
+            return
+        dados = pickle.dumps(valor, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._l1[chave] = (dados, time.monotonic() + ttl)
+            self._l1.move_to_end(chave)
+            while len(self._l1) > self.l1_max_entradas:
+                self._l1.popitem(last=False)
+
+    def _l1_remover(self, chave):
+        with self._lock:
+            self._l1.pop(chave, None)
+
+    # L2
+
+    def _l2_obter(self, chave):
+        valor = self.l2.get(chave, _AUSENTE)
+        with self._lock:
+            if valor is _AUSENTE:
+                self.l2_falhas += 1
+            else:
+                self.l2_acertos += 1
+        return valor
+
+    def _timeout_l2(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    # API do cache
+
+    def get(self, key, default=None, version=None):
+        chave = self.make_and_validate_key(key, version=version)
+        if self._no_l1(key):
+            self._verificar_geracao()
+            valor = self._l1_obter(chave)
+            if valor is not _AUSENTE:
+                return valor
+            valor = self._l2_obter(chave)
+            if valor is not _AUSENTE:
+                self._l1_guardar(chave, valor)
+        else:
+            valor = self._l2_obter(chave)
+        return default if valor is _AUSENTE else valor
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        chave = self.make_and_validate_key(key, version=version)
+        self.l2.set(chave, value, self._timeout_l2(timeout))
+        if self._no_l1(key):
+            self._l1_guardar(chave, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        chave = self.make_and_validate_key(key, version=version)
+        adicionado = self.l2.add(chave, value, self._timeout_l2(timeout))
+        if adicionado and self._no_l1(key):
+            self._l1_guardar(chave, value, timeout)
+        return adicionado
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        chave = self.make_and_validate_key(key, version=version)
+        self._l1_remover(chave)
+        return self.l2.touch(chave, self._timeout_l2(timeout))
+
+    def delete(self, key, version=None):
+        chave = self.make_and_validate_key(key, version=version)
+        self._l1_remover(chave)
+        return self.l2.delete(chave)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _AUSENTE, version=version) is not _AUSENTE
+
+    def incr(self, key, delta=1, version=None):
+        chave = self.make_and_validate_key(key, version=version)
+        self._l1_remover(chave)
+        return self.l2.incr(chave, delta)
+
+    def get_many(self, keys, version=None):
+        encontrados = {}
+        for key in keys:
+            valor = self.get(key, _AUSENTE, version=version)
+            if valor is not _AUSENTE:
+                encontrados[key] = valor
+        return encontrados
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        for key, value in data.items():
+            self.set(key, value, timeout, version=version)
+        return []
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.delete(key, version=version)
+
+    def clear(self):
+        self.l2.clear()
+        self.l2.set(self._chave_geracao, time.time_ns(), None)
+        with self._lock:
+            self._l1.clear()
+            self._geracao = None
+        self._proxima_verificacao = 0.0
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+    # Métricas
+
+    def limpar_estatisticas(self):
+        with self._lock:
+            self.l1_acertos = 0
+            self.l1_falhas = 0
+            self.l2_acertos = 0
+            self.l2_falhas = 0
+            self.desde = time.time()
+
+    def estatisticas(self):
+        def camada(acertos, falhas):
+            total = acertos + falhas
+            return {
+                "acertos": acertos,
+                "falhas": falhas,
+                "taxa_acerto": round(acertos / total, 4) if total else None,
+            }
+
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "desde": self.desde,
+                "l1": {
+                    **camada(self.l1_acertos, self.l1_falhas),
+                    "entradas": len(self._l1),
+                    "max_entradas": self.l1_max_entradas,
+                    "timeout": self.l1_timeout,
+                    "prefixos": list(self.l1_prefixos),
+                },
+                "l2": {
+                    **camada(self.l2_acertos, self.l2_falhas),
+                    "backend": (
+                        f"{type(self.l2).__module__}.{type(self.l2).__qualname__}"
+                    ),
+                },
+            }
@@ -0,0 +1,264 @@
+"""
+Compressão negociada das respostas da API (gzip, brotli e zstd).
+
+``CompressaoMiddleware`` escolhe, entre os ``ALGORITMOS`` configurados e
+disponíveis, o primeiro que o cliente aceita em ``Accept-Encoding`` (respeitando
+``q=0``). gzip vem da biblioteca padrão; brotli e zstd dependem dos pacotes
+``brotli`` e ``zstandard`` e são ignorados sem eles.
+
+- Só são comprimidos os tipos de ``TIPOS`` (JSON, HTML da API navegável, NDJSON
+  e CSV da exportação). Respostas abaixo de ``TAMANHO_MINIMO`` bytes, que já têm
+  ``Content-Encoding`` ou ``Cache-Control: no-transform`` passam intactas.
+- Respostas em streaming (exportação de consultas) são comprimidas bloco a
+  bloco, com flush a cada bloco para o cliente continuar recebendo os dados
+  conforme são gerados.
+- Respostas com ``ETag`` (listagem e detalhe, inclusive as servidas do cache
+  da listagem) têm o corpo comprimido guardado em um LRU local por worker,
+  com até ``CACHE_ENTRADAS`` entradas e chave no digest do corpo: os mesmos
+  bytes não são comprimidos de novo a cada requisição. O HTML da API
+  navegável (com o token CSRF da requisição) nunca é guardado. O ``ETag``
+  enviado passa a ser fraco (``W/``), como no ``GZipMiddleware`` do Django.
+
+Configurado por ``API_COMPRESSAO`` e ``API_COMPRESSAO_OPCOES``; os arquivos
+estáticos continuam com o WhiteNoise, que responde antes deste middleware.
+"""
+
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _gzip_fluxo(nivel):
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return (
+        lambda dados: compressor.compress(dados) + compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+
+def _brotli_fluxo(nivel):
+    compressor = brotli.Compressor(quality=nivel)
+    return (
+        lambda dados: compressor.process(dados) + compressor.flush(),
+        compressor.finish,
+    )
+
+
+def _zstd_fluxo(nivel):
+    compressor = zstandard.ZstdCompressor(level=nivel).compressobj()
+    return (
+        lambda dados: compressor.compress(dados)
+        + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+        compressor.flush,
+    )
+
+
+# Nome no Accept-Encoding: (compressão do corpo inteiro, compressão em fluxo)
+CODIFICADORES = {
+    "gzip": (
+        lambda dados, nivel: gzip.compress(dados, compresslevel=nivel, mtime=0),
+        _gzip_fluxo,
+    ),
+}
+if brotli is not None:
+    CODIFICADORES["br"] = (
+        lambda dados, nivel: brotli.compress(dados, quality=nivel),
+        _brotli_fluxo,
+    )
+if zstandard is not None:
+    CODIFICADORES["zstd"] = (
+        lambda dados, nivel: zstandard.ZstdCompressor(level=nivel).compress(dados),
+        _zstd_fluxo,
+    )
+
+
+def aceitas(accept_encoding):
+    """Codificações de ``Accept-Encoding`` com o seu ``q`` (``*`` incluído)."""
+    resultado = {}
+    for item in accept_encoding.split(","):
+        nome, _, parametros = item.partition(";")
+        nome = nome.strip().lower()
+        if not nome:
+            continue
+        q = 1.0
+        for parametro in parametros.split(";"):
+            chave, _, valor = parametro.partition("=")
+            if chave.strip().lower() == "q":
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        resultado[nome] = q
+    return resultado
+
+
+def negociar(accept_encoding, algoritmos):
+    """Primeiro de ``algoritmos`` aceito pelo cliente, ou ``None``."""
+    if not accept_encoding:
+        return None
+    pedidas = aceitas(accept_encoding)
+    melhor, melhor_q = None, 0.0
+    for nome in algoritmos:
+        q = pedidas.get(nome, pedidas.get("*", 0.0))
+        if q > melhor_q:
+            melhor, melhor_q = nome, q
+    return melhor
+
+
+class CacheComprimidos:
+    """LRU local (por worker) de corpos já comprimidos."""
+
+    def __init__(self, max_entradas):
+        self.max_entradas = max_entradas
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        with self._lock:
+            valor = self._dados.get(chave)
+            if valor is not None:
+                self._dados.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor):
+        if self.max_entradas <= 0:
+            return
+        with self._lock:
+            self._dados[chave] = valor
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+
+
+class CompressaoMiddleware:
+    """Comprime as respostas da API conforme o ``Accept-Encoding``."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.API_COMPRESSAO:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+        opcoes = settings.API_COMPRESSAO_OPCOES
+        self.algoritmos = [
+            nome for nome in opcoes["ALGORITMOS"] if nome in CODIFICADORES
+        ]
+        self.niveis = opcoes["NIVEIS"]
+        self.tamanho_minimo = opcoes["TAMANHO_MINIMO"]
+        self.tipos = tuple(opcoes["TIPOS"])
+        self.cache = CacheComprimidos(opcoes["CACHE_ENTRADAS"])
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        return self.comprimir(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.comprimir(request, await self.get_response(request))
+
+    def elegivel(self, response):
+        tipo = response.get("Content-Type", "").split(";")[0].strip().lower()
+        if not tipo.startswith(self.tipos) or response.has_header("Content-Encoding"):
+            return False
+        if "no-transform" in response.get("Cache-Control", "").lower():
+            return False
+        return response.streaming or len(response.content) >= self.tamanho_minimo
+
+    def comprimir(self, request, response):
+        if not self.elegivel(response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        codificacao = negociar(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), self.algoritmos
+        )
+        if codificacao is None:
+            return response
+
+        unico, fluxo = CODIFICADORES[codificacao]
+        nivel = self.niveis[codificacao]
+        if response.streaming:
+            response.streaming_content = self._fluxo(response, fluxo(nivel))
+            del response["Content-Length"]
+        else:
+            response.content = self._corpo(response, codificacao, unico, nivel)
+            response["Content-Length"] = str(len(response.content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = codificacao
+        return response
+
+    def _corpo(self, response, codificacao, unico, nivel):
+        if not response.has_header("ETag") or not self._reaproveitavel(response):
+            return unico(response.content, nivel)
+
+        # O ETag identifica a versão dos dados, não os bytes: a chave é o
+        # digest do próprio corpo (bem mais barato que comprimi-lo).
+        chave = (
+            hashlib.blake2b(response.content, digest_size=16).digest(),
+            codificacao,
+            nivel,
+        )
+        comprimido = self.cache.get(chave)
+        if comprimido is None:
+            comprimido = unico(response.content, nivel)
+            self.cache.set(chave, comprimido)
+        return comprimido
+
+    def _reaproveitavel(self, response):
+        # O HTML da API navegável traz o token CSRF mascarado de cada
+        # requisição: nunca se repete e não deve ser guardado.
+        tipo = response.get("Content-Type", "").split(";")[0].strip().lower()
+        return tipo != "text/html"
+
+    def _fluxo(self, response, compressor):
+        comprimir, finalizar = compressor
+        conteudo = response.streaming_content
+        if response.is_async:
+
+            async def blocos():
+                async for bloco in conteudo:
+                    dados = comprimir(bloco)
+                    if dados:
+                        yield dados
+                yield finalizar()
+
+        else:
+
+            def blocos():
+                for bloco in conteudo:
+                    dados = comprimir(bloco)
+                    if dados:
+                        yield dados
+                yield finalizar()
+
+        return blocos()
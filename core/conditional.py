@@ -0,0 +1,196 @@
+"""
+Suporte a GET condicional (ETag / Last-Modified) para os viewsets.
+"""
+
+import hashlib
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from rest_framework.response import Response
+
+from django.db.models import Count, Max
+from django.http import HttpResponseNotModified
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+class ConditionalGetMixin:
+    """
+    Adiciona validadores HTTP às ações ``list`` e ``retrieve``.
+
+    Em listagens paginadas, o ETag é derivado das linhas da própria página
+    (``pk`` e ``atualizado_em``), que já precisam ser buscadas, sem nenhuma
+    query extra. Sem paginação, é derivado de ``MAX(atualizado_em)`` e da
+    quantidade de linhas do queryset filtrado. Em ambos os casos a query
+    string (filtros e cursor) faz parte do ETag. No detalhe, usa-se o
+    ``atualizado_em`` do próprio objeto e dos relacionados que a
+    representação embute (``modificacoes_objeto``). Quando o cliente já possui
+    a versão atual, a resposta é ``304 Not Modified`` e nada é serializado.
+
+    Com ``projecao_listagem`` (ver ``core.projecao``), a listagem lê apenas as
+    colunas do serializer com ``values_list`` e monta os dicts sem passar pelo
+    serializer; a página leva junto ``pk``, ``campo_modificacao`` e os campos
+    de ordenação do cursor, usados pelos validadores e pela paginação.
+    """
+
+    campo_modificacao = "atualizado_em"
+    projecao_listagem = None
+
+    def _calcular_etag(self, *partes):
+        conteudo = ":".join(str(parte) for parte in partes)
+        return '"%s"' % hashlib.sha256(conteudo.encode()).hexdigest()[:40]
+
+    def _parametros(self):
+        return urlencode(sorted(self.request.query_params.lists()), doseq=True)
+
+    def _agregados_listagem(self):
+        return {"ultima": Max(self.campo_modificacao), "total": Count("pk")}
+
+    def validadores_listagem(self, queryset):
+        agregados = queryset.aggregate(**self._agregados_listagem())
+        return self._validadores_agregados(queryset, agregados)
+
+    async def avalidadores_listagem(self, queryset):
+        agregados = await queryset.aaggregate(**self._agregados_listagem())
+        return self._validadores_agregados(queryset, agregados)
+
+    def _validadores_agregados(self, queryset, agregados):
+        etag = self._calcular_etag(
+            queryset.model._meta.label,
+            self.action,
+            self._parametros(),
+            agregados["ultima"].isoformat() if agregados["ultima"] else "",
+            agregados["total"],
+        )
+        return etag, self._timestamp(agregados["ultima"])
+
+    def validadores_pagina(self, queryset, page):
+        modificacoes = [getattr(obj, self.campo_modificacao) for obj in page]
+        itens = ",".join(
+            f"{obj.pk}@{modificacao.isoformat()}"
+            for obj, modificacao in zip(page, modificacoes)
+        )
+        etag = self._calcular_etag(
+            queryset.model._meta.label,
+            self.action,
+            self._parametros(),
+            itens,
+            self.paginator.get_next_link(),
+            self.paginator.get_previous_link(),
+        )
+        return etag, self._timestamp(max(modificacoes, default=None))
+
+    def modificacoes_objeto(self, obj):
+        """
+        Datas de modificação que compõem os validadores do detalhe.
+
+        Viewsets cujo serializer de detalhe embute campos de objetos
+        relacionados acrescentam as datas desses objetos (já carregados pelo
+        ``select_related`` do queryset).
+        """
+        return [getattr(obj, self.campo_modificacao)]
+
+    def validadores_objeto(self, obj):
+        modificacoes = self.modificacoes_objeto(obj)
+        etag = self._calcular_etag(
+            obj._meta.label,
+            self.action,
+            obj.pk,
+            *(modificacao.isoformat() for modificacao in modificacoes),
+        )
+        return etag, self._timestamp(max(modificacoes))
+
+    def _timestamp(self, data_hora):
+        return int(data_hora.timestamp()) if data_hora else None
+
+    def resposta_condicional(self, request, etag, last_modified):
+        resposta = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if isinstance(resposta, HttpResponseNotModified):
+            self.aplicar_validadores(resposta, etag, last_modified)
+        return resposta
+
+    def aplicar_validadores(self, response, etag, last_modified):
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def projetar(self, queryset, nomeada=False):
+        if self.projecao_listagem is None:
+            return queryset
+        ordenacao = getattr(self.paginator, "ordering", None) or ()
+        if isinstance(ordenacao, str):
+            ordenacao = (ordenacao,)
+        extras = ("pk", self.campo_modificacao)
+        extras += tuple(campo.lstrip("-") for campo in ordenacao)
+        return self.projecao_listagem.aplicar(queryset, extras, nomeada)
+
+    def dados_listagem(self, linhas):
+        if self.projecao_listagem is None:
+            return self.get_serializer(linhas, many=True).data
+        return self.projecao_listagem.dados(linhas)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(self.projetar(queryset, nomeada=True))
+        if page is None:
+            etag, last_modified = self.validadores_listagem(queryset)
+        else:
+            etag, last_modified = self.validadores_pagina(queryset, page)
+
+        condicional = self.resposta_condicional(request, etag, last_modified)
+        if condicional is not None:
+            return condicional
+
+        if page is None:
+            response = Response(self.dados_listagem(self.projetar(queryset)))
+        else:
+            response = self.get_paginated_response(self.dados_listagem(page))
+        return self.aplicar_validadores(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.validadores_objeto(instance)
+        condicional = self.resposta_condicional(request, etag, last_modified)
+        if condicional is not None:
+            return condicional
+
+        serializer = self.get_serializer(instance)
+        return self.aplicar_validadores(Response(serializer.data), etag, last_modified)
+
+    # Versões assíncronas de list e retrieve (ver core.assincrono).
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is None:
+            page = None
+            etag, last_modified = await self.avalidadores_listagem(queryset)
+        else:
+            # As paginações do DRF são síncronas.
+            page = await sync_to_async(self.paginate_queryset)(
+                self.projetar(queryset, nomeada=True)
+            )
+            etag, last_modified = self.validadores_pagina(queryset, page)
+
+        condicional = self.resposta_condicional(request, etag, last_modified)
+        if condicional is not None:
+            return condicional
+
+        if page is None:
+            linhas = [linha async for linha in self.projetar(queryset)]
+            response = Response(self.dados_listagem(linhas))
+        else:
+            response = self.get_paginated_response(self.dados_listagem(page))
+        return self.aplicar_validadores(response, etag, last_modified)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        etag, last_modified = self.validadores_objeto(instance)
+        condicional = self.resposta_condicional(request, etag, last_modified)
+        if condicional is not None:
+            return condicional
+
+        serializer = self.get_serializer(instance)
+        return self.aplicar_validadores(Response(serializer.data), etag, last_modified)
@@ -4,11 +4,19 @@ Views de debug para diagnóstico de problemas na aplicação.
 
 import os
 
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
 from django.conf import settings
 from django.core.cache import cache
 from django.http import JsonResponse
 from django.views import View
 
+from authentication.hashing import obter_pool
+from core.throttling import metricas
+from profissionais.cache import estatisticas_listagem
+
 
 class HealthCheckView(View):
     """
@@ -116,3 +124,81 @@ class CacheTestView(View):
                 },
                 status=500,
             )
+
+
+class ProfissionaisCacheStatsView(APIView):
+    """
+    Contadores de acerto/falha do cache da listagem de profissionais (apenas
+    staff).
+    """
+
+    permission_classes = [IsAdminUser]
+    throttle_classes = []
+
+    def get(self, request):
+        return Response(estatisticas_listagem())
+
+
+class ThrottleMetricsView(APIView):
+    """
+    Métricas dos throttles do worker que atende a requisição (apenas staff).
+
+    ``?top=N`` controla quantas chaves mais próximas do limite são listadas;
+    ``DELETE`` zera os contadores.
+    """
+
+    permission_classes = [IsAdminUser]
+    throttle_classes = []
+
+    def get(self, request):
+        try:
+            top = min(max(int(request.query_params.get("top", 10)), 1), 100)
+        except ValueError:
+            top = 10
+        dados = metricas.instantaneo(top=top)
+        dados["taxas"] = settings.REST_FRAMEWORK.get("DEFAULT_THROTTLE_RATES", {})
+        return Response(dados)
+
+    def delete(self, request):
+        metricas.limpar()
+        return Response(status=204)
+
+
+class HashingMetricsView(APIView):
+    """
+    Fila e tempos do pool de hash de senhas do worker (apenas staff).
+
+    ``DELETE`` zera os contadores.
+    """
+
+    permission_classes = [IsAdminUser]
+    throttle_classes = []
+
+    def get(self, request):
+        return Response(obter_pool().instantaneo())
+
+    def delete(self, request):
+        obter_pool().limpar()
+        return Response(status=204)
+
+
+class CacheCamadasMetricsView(APIView):
+    """
+    Acertos e falhas por camada do cache padrão no worker (apenas staff).
+
+    Só existe com ``core.cache_camadas.CacheDuasCamadas``; ``DELETE`` zera os
+    contadores.
+    """
+
+    permission_classes = [IsAdminUser]
+    throttle_classes = []
+
+    def get(self, request):
+        if not hasattr(cache, "estatisticas"):
+            return Response({"detail": "O cache padrão não tem camadas."}, status=404)
+        return Response(cache.estatisticas())
+
+    def delete(self, request):
+        if hasattr(cache, "limpar_estatisticas"):
+            cache.limpar_estatisticas()
+        return Response(status=204)
@@ -1,11 +1,16 @@
 import logging
 
+from asgiref.sync import sync_to_async
+
+from django.apps import apps
 from django.conf import settings
 from django.db import connection
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
+from core.banco import estatisticas_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,50 +22,101 @@ def health_check(request):
     """
     try:
         # Health check rápido com timeout
-        from django.db import connection
+        verificar_banco()
+    except Exception as e:
+        return _resposta_saude(e)
+    return _resposta_saude()
+
 
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            cursor.fetchone()
-        db_status = "healthy"
+@csrf_exempt
+@require_http_methods(["GET", "HEAD"])
+async def ahealth_check(request):
+    """
+    Versão assíncrona do health check, usada no modo ASGI
+    """
+    try:
+        await sync_to_async(verificar_banco)()
     except Exception as e:
-        logger.error(f"Database health check failed: {e}")
+        return _resposta_saude(e)
+    return _resposta_saude()
+
+
+def verificar_banco():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+
+
+def _resposta_saude(erro=None):
+    if erro is not None:
+        logger.error(f"Database health check failed: {erro}")
         # Em caso de erro de DB, ainda retorna 200 para evitar restart em loop
         return JsonResponse(
-            {"status": "degraded", "database": "unhealthy", "error": str(e)}, status=200
+            _com_pool(
+                {"status": "degraded", "database": "unhealthy", "error": str(erro)}
+            ),
+            status=200,
         )
-
     return JsonResponse(
-        {
-            "status": "healthy",
-            "database": db_status,
-            "debug": settings.DEBUG,
-            "version": "1.0.0",
-        }
+        _com_pool(
+            {
+                "status": "healthy",
+                "database": "healthy",
+                "debug": settings.DEBUG,
+                "version": "1.0.0",
+            }
+        )
     )
 
 
+def _com_pool(dados):
+    # Uso do pool de conexões (espera, conexões em uso), quando há pool
+    pool = estatisticas_pool()
+    if pool:
+        dados["database_pool"] = pool
+    return dados
+
+
 def readiness_check(request):
     """
     Readiness check simplificado para ECS - Evita timeouts
     """
     try:
         # Check básico se Django está funcionando
-        from django.apps import apps
-
         if not apps.ready:
-            return JsonResponse(
-                {"status": "not_ready", "reason": "Apps not ready"}, status=503
-            )
+            return _resposta_nao_pronto()
 
         # Check rápido de DB (sem queries complexas)
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            cursor.fetchone()
+        verificar_banco()
+        return _resposta_pronto()
+
+    except Exception as e:
+        return _resposta_pronto(e)
 
-        return JsonResponse({"status": "ready", "database": "connected"})
+
+async def areadiness_check(request):
+    """
+    Versão assíncrona do readiness check, usada no modo ASGI
+    """
+    try:
+        if not apps.ready:
+            return _resposta_nao_pronto()
+        await sync_to_async(verificar_banco)()
+        return _resposta_pronto()
 
     except Exception as e:
-        logger.error(f"Readiness check failed: {e}")
+        return _resposta_pronto(e)
+
+
+def _resposta_nao_pronto():
+    return JsonResponse({"status": "not_ready", "reason": "Apps not ready"}, status=503)
+
+
+def _resposta_pronto(erro=None):
+    if erro is not None:
+        logger.error(f"Readiness check failed: {erro}")
         # Retorna 200 para evitar restart loops no ECS
-        return JsonResponse({"status": "ready", "note": "degraded mode"}, status=200)
+        return JsonResponse(
+            _com_pool({"status": "ready", "note": "degraded mode"}), status=200
+        )
+    return JsonResponse(_com_pool({"status": "ready", "database": "connected"}))
@@ -0,0 +1,84 @@
+"""
+Renderer e parser JSON da API com orjson.
+
+``OrjsonRenderer`` produz os mesmos bytes que o ``JSONRenderer`` do DRF no
+modo padrão (compacto, UTF-8, ``STRICT_JSON``): datas e horas, ``Decimal``,
+textos lazy e os demais tipos que o orjson não trata passam pelo
+``JSONEncoder`` do DRF, e ``U+2028``/``U+2029`` são escapados como lá. Com
+indentação (API navegável, ``; indent=``), ``UNICODE_JSON`` ou
+``COMPACT_JSON`` desligados, ou quando o orjson recusa o dado (inteiros além
+de 64 bits, por exemplo), o renderer do DRF é usado. Única diferença
+conhecida: ``float`` em notação científica sai como ``1e16`` em vez de
+``1e+16`` (mesmo valor) e ``NaN`` sai como ``null`` em vez de erro.
+
+``OrjsonParser`` faz o mesmo na entrada: corpos UTF-8 são lidos pelo orjson e,
+se ele recusar, o ``JSONParser`` do DRF reprocessa o corpo, o que mantém as
+mensagens de erro e os casos que só o ``json`` aceita. Inteiros além de 64
+bits chegam como ``float`` (o ``json`` os lê como ``int``).
+
+Selecionados em ``REST_FRAMEWORK`` por ``API_JSON_ORJSON``; sem o pacote
+``orjson`` instalado, ambos se comportam como as classes do DRF.
+"""
+
+import decimal
+import io
+import json
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from django.conf import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+def _padrao(obj):
+    if isinstance(obj, decimal.Decimal):
+        # O DRF converte para float e o json formata com repr.
+        return orjson.Fragment(json.dumps(float(obj), allow_nan=False))
+    return _encoder.default(obj)
+
+
+class OrjsonRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            orjson is None
+            or self.get_indent(accepted_media_type, renderer_context or {})
+            or self.ensure_ascii
+            or not self.compact
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=_padrao,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class OrjsonParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        corpo = stream.read()
+        try:
+            return orjson.loads(corpo)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(corpo), media_type, parser_context)
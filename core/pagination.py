@@ -0,0 +1,38 @@
+"""
+Classes de paginação compartilhadas pelas APIs.
+"""
+
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ConsultaCursorPagination(CursorPagination):
+    """
+    Paginação por cursor (keyset) para a listagem de consultas.
+
+    A posição é dada por ``data_hora`` (desempate por ``id``), os dois em ordem
+    decrescente: o banco percorre o índice ``(-data_hora, -id)`` (ou
+    ``(profissional, data_hora)`` no filtro por profissional) já na ordem do
+    cursor, sem ordenar, e o custo de qualquer página fica igual ao da
+    primeira. O cursor é opaco
+    (codificado em base64) e o tamanho da página é limitado por
+    ``max_page_size``.
+    """
+
+    ordering = ("-data_hora", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class BuscaPagination(PageNumberPagination):
+    """
+    Paginação por número de página para resultados de busca.
+
+    Os resultados são ordenados por relevância, que não é um campo estável
+    para cursor; como a busca é seletiva, o ``COUNT`` e o ``OFFSET`` são
+    baratos.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
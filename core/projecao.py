@@ -0,0 +1,89 @@
+"""
+Listagens sem serializer: projeção compilada a partir do serializer.
+
+Serializar uma listagem instancia um objeto do modelo por linha e passa cada
+campo pelo ``to_representation`` do serializer. ``Projecao`` lê os campos do
+serializer uma única vez e monta um ``values_list`` com as colunas
+correspondentes; campos calculados (``SerializerMethodField``) viram
+expressões SQL em ``anotacoes``. Cada linha vira um ``dict`` com as mesmas
+chaves, na mesma ordem, e só os campos cuja representação difere do valor do
+banco (datas, por exemplo) passam pelo ``to_representation`` do campo.
+"""
+
+from rest_framework import serializers
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+
+# Campos cuja representação é o próprio valor lido do banco.
+CAMPOS_IDENTIDADE = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class Projecao:
+    def __init__(self, serializer_class, anotacoes=None):
+        self.serializer_class = serializer_class
+        self.anotacoes = anotacoes or {}
+        self._compilada = None
+
+    def compilar(self):
+        """Nomes de saída, colunas do ``values_list`` e conversores."""
+        if self._compilada is not None:
+            return self._compilada
+
+        model = self.serializer_class.Meta.model
+        nomes, colunas, conversores = [], [], []
+        for nome, campo in self.serializer_class().fields.items():
+            if campo.write_only:
+                continue
+            nomes.append(nome)
+            if nome in self.anotacoes:
+                colunas.append(nome)
+                continue
+            if isinstance(campo, serializers.SerializerMethodField):
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{nome} precisa de uma anotação."
+                )
+            colunas.append(self._coluna(model, nome, campo.source))
+            if not isinstance(campo, CAMPOS_IDENTIDADE):
+                conversores.append((nome, campo.to_representation))
+
+        self._compilada = (tuple(nomes), tuple(colunas), tuple(conversores))
+        return self._compilada
+
+    def _coluna(self, model, nome, source):
+        try:
+            campo_modelo = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(
+                f"{self.serializer_class.__name__}.{nome} não é uma coluna de "
+                f"{model.__name__}."
+            )
+        # Relações são projetadas pela chave (profissional -> profissional_id).
+        return campo_modelo.attname
+
+    def aplicar(self, queryset, extras=(), nomeada=False):
+        """
+        ``values_list`` das colunas projetadas. ``extras`` acrescenta colunas
+        usadas pela paginação e pelos validadores HTTP (ignoradas na saída);
+        ``nomeada`` devolve linhas com atributos em vez de tuplas simples.
+        """
+        _, colunas, _ = self.compilar()
+        extras = [extra for extra in dict.fromkeys(extras) if extra not in colunas]
+        return queryset.annotate(**self.anotacoes).values_list(
+            *colunas, *extras, named=nomeada
+        )
+
+    def dados(self, linhas):
+        """Linhas do ``values_list`` no formato do serializer."""
+        nomes, _, conversores = self.compilar()
+        # zip para nas colunas projetadas: as extras ficam de fora.
+        dados = [dict(zip(nomes, linha)) for linha in linhas]
+        for item in dados:
+            for nome, converter in conversores:
+                valor = item[nome]
+                if valor is not None:
+                    item[nome] = converter(valor)
+        return dados
@@ -0,0 +1,258 @@
+"""
+Roteamento de leituras para réplicas do PostgreSQL.
+
+Com ``DATABASE_REPLICAS`` configurado (ver ``DATABASE_REPLICA_URLS``), as
+ações de ``acoes_replica`` dos viewsets com ``LeituraReplicaMixin`` (listagem
+e detalhe públicos) leem de uma réplica; todo o resto, inclusive autenticação
+e throttles, continua no primário.
+
+- Leia o que escreveu: uma requisição que escreve no banco fixa o cliente (o
+  mesmo identificador dos throttles) no primário por ``FIXAR_PRIMARIO``
+  segundos, gravado no cache.
+- Atraso e falhas: cada worker verifica o atraso de replicação de cada réplica
+  a cada ``INTERVALO_VERIFICACAO`` segundos e ignora as que passam de
+  ``MAX_ATRASO`` ou não respondem. Se uma query na réplica falha no meio da
+  requisição, a réplica é marcada como indisponível e a view é executada de
+  novo no primário.
+
+O estado da requisição fica em um ``ContextVar`` criado por
+``ReplicaMiddleware``, visível também nas threads do ``sync_to_async``. Sem
+réplicas configuradas, o middleware e o roteador não fazem nada.
+"""
+
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import (
+    async_to_sync,
+    iscoroutinefunction,
+    markcoroutinefunction,
+)
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+_estado = ContextVar("leitura_replica", default=None)
+
+
+class EstadoLeitura:
+    """Estado de roteamento de uma requisição."""
+
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self.usar_replica = False
+        self.sem_replica = False
+        self.replica = None
+        self.escreveu = False
+        self.view = None
+
+
+def chave_primario(cliente):
+    return f"replicas:primario:{cliente}"
+
+
+def medir_atraso(alias):
+    """Atraso de replicação da réplica, em segundos (0 fora do PostgreSQL)."""
+    conexao = connections[alias]
+    if conexao.vendor != "postgresql":
+        return 0.0
+    with conexao.cursor() as cursor:
+        # Sem WAL pendente a réplica está em dia, mesmo que o último replay
+        # seja antigo (primário sem escritas).
+        cursor.execute(
+            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+            "THEN 0 ELSE COALESCE(EXTRACT(EPOCH FROM "
+            "now() - pg_last_xact_replay_timestamp()), 0) END"
+        )
+        return float(cursor.fetchone()[0])
+
+
+class SaudeReplicas:
+    """Disponibilidade das réplicas no processo, verificada periodicamente."""
+
+    def __init__(self):
+        self.limpar()
+
+    def limpar(self):
+        self._verificacoes = {}
+
+    def disponiveis(self):
+        configuracao = settings.DATABASE_REPLICA_ROUTING
+        agora = time.monotonic()
+        replicas = []
+        for alias in settings.DATABASE_REPLICAS:
+            disponivel, verificada_em = self._verificacoes.get(alias, (False, None))
+            if (
+                verificada_em is None
+                or agora - verificada_em >= configuracao["INTERVALO_VERIFICACAO"]
+            ):
+                disponivel = self.verificar(alias, configuracao["MAX_ATRASO"])
+            if disponivel:
+                replicas.append(alias)
+        return replicas
+
+    def verificar(self, alias, max_atraso):
+        try:
+            atraso = medir_atraso(alias)
+        except DatabaseError as e:
+            logger.warning(f"Réplica {alias} indisponível: {e}")
+            disponivel = False
+        else:
+            disponivel = atraso <= max_atraso
+            if not disponivel:
+                logger.warning(f"Réplica {alias} atrasada {atraso:.1f}s")
+        self._verificacoes[alias] = (disponivel, time.monotonic())
+        return disponivel
+
+    def marcar_falha(self, alias):
+        self._verificacoes[alias] = (False, time.monotonic())
+
+
+saude = SaudeReplicas()
+
+
+def liberar_replica():
+    """Permite ler de uma réplica no restante da requisição atual."""
+    estado = _estado.get()
+    if estado is None or estado.sem_replica:
+        return
+    if cache.get(chave_primario(estado.cliente)):
+        return
+    estado.usar_replica = True
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        estado = _estado.get()
+        if estado is None or not estado.usar_replica:
+            return None
+        if estado.replica is None:
+            replicas = saude.disponiveis()
+            if not replicas:
+                estado.usar_replica = False
+                return None
+            estado.replica = random.choice(replicas)  # nosec B311
+        return estado.replica
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None:
+            estado.escreveu = True
+            estado.usar_replica = False
+        if settings.DATABASE_REPLICAS:
+            # Objetos lidos de uma réplica também são gravados no primário.
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bancos = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in bancos and obj2._state.db in bancos:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Cria o estado de roteamento e fixa no primário quem escreveu."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        estado = EstadoLeitura(BaseThrottle().get_ident(request))
+        token = _estado.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado.reset(token)
+        if estado.escreveu:
+            cache.set(
+                chave_primario(estado.cliente),
+                True,
+                settings.DATABASE_REPLICA_ROUTING["FIXAR_PRIMARIO"],
+            )
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        estado = EstadoLeitura(BaseThrottle().get_ident(request))
+        token = _estado.set(estado)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _estado.reset(token)
+        if estado.escreveu:
+            await cache.aset(
+                chave_primario(estado.cliente),
+                True,
+                settings.DATABASE_REPLICA_ROUTING["FIXAR_PRIMARIO"],
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        estado = _estado.get()
+        if estado is not None:
+            estado.view = (view_func, view_args, view_kwargs)
+
+    def process_exception(self, request, exception):
+        estado = _estado.get()
+        if (
+            estado is None
+            or estado.replica is None
+            or not isinstance(exception, DatabaseError)
+        ):
+            return None
+
+        logger.warning(f"Falha na réplica {estado.replica}, repetindo no primário")
+        saude.marcar_falha(estado.replica)
+        estado.replica = None
+        estado.usar_replica = False
+        estado.sem_replica = True
+        view, args, kwargs = estado.view
+        if iscoroutinefunction(view):
+            return async_to_sync(view)(request, *args, **kwargs)
+        return view(request, *args, **kwargs)
+
+
+class LeituraReplicaMixin:
+    """
+    Lê de uma réplica nas ações de ``acoes_replica`` (GET/HEAD).
+
+    ``pode_ler_da_replica`` pode ser sobrescrito para manter no primário
+    leituras que vão para um cache compartilhado: uma página montada a partir
+    de uma réplica atrasada ficaria guardada sob a versão nova até o timeout.
+    """
+
+    acoes_replica = ("list", "retrieve")
+
+    def pode_ler_da_replica(self):
+        return self.action in self.acoes_replica
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and self.pode_ler_da_replica():
+            liberar_replica()
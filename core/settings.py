@@ -16,7 +16,7 @@ from datetime import timedelta
 from pathlib import Path
 
 import dj_database_url
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -50,6 +50,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "corsheaders",
     "rest_framework",
     "rest_framework_simplejwt",
@@ -66,6 +67,7 @@ IS_TESTING = "test" in sys.argv or os.getenv("GITHUB_ACTIONS") == "true"
 # Base middleware sem WhiteNoise
 BASE_MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.compressao.CompressaoMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -73,6 +75,8 @@ BASE_MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.replicas.ReplicaMiddleware",
+    "authentication.hashing.HashingIndisponivelMiddleware",
 ]
 
 # Adicionar WhiteNoise apenas se disponível e não em teste
@@ -103,6 +107,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "core.wsgi.application"
+ASGI_APPLICATION = "core.asgi.application"
+
+# Modo ASGI (gunicorn com workers uvicorn): list/retrieve dos viewsets e os
+# health checks passam a ser views assíncronas
+ASGI_MODE = config("ASGI_MODE", default=False, cast=bool)
 
 
 # Database
@@ -114,6 +123,64 @@ DATABASES = {
     )
 }
 
+# Réplicas de leitura (opcional): URLs separadas por vírgula, expostas como
+# replica_1, replica_2... Listagem e detalhe públicos de profissionais e
+# consultas leem delas (core.replicas.ReplicaRouter); o resto usa o primário
+DATABASE_REPLICA_URLS = config("DATABASE_REPLICA_URLS", default="", cast=Csv())
+DATABASE_REPLICAS = []
+for _indice, _url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    DATABASES[f"replica_{_indice}"] = dj_database_url.parse(_url)
+    DATABASES[f"replica_{_indice}"]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(f"replica_{_indice}")
+
+if IS_TESTING and not DATABASE_REPLICAS:
+    # Alias espelho do banco de teste, para os testes do roteamento (que
+    # ligam DATABASE_REPLICAS com override_settings)
+    DATABASES["replica_1"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+
+DATABASE_ROUTERS = ["core.replicas.ReplicaRouter"]
+
+# FIXAR_PRIMARIO: segundos em que um cliente lê do primário depois de escrever
+# (leia o que escreveu; deve cobrir MAX_ATRASO); MAX_ATRASO: atraso de
+# replicação (s) acima do qual a réplica é ignorada; INTERVALO_VERIFICACAO:
+# segundos entre verificações de atraso e de falha de cada réplica, por worker
+DATABASE_REPLICA_ROUTING = {
+    "FIXAR_PRIMARIO": config("DATABASE_REPLICA_PIN_SECONDS", default=5.0, cast=float),
+    "MAX_ATRASO": config("DATABASE_REPLICA_MAX_LAG", default=2.0, cast=float),
+    "INTERVALO_VERIFICACAO": config(
+        "DATABASE_REPLICA_CHECK_INTERVAL", default=5.0, cast=float
+    ),
+}
+
+# Pool de conexões do psycopg 3 (por worker): as requisições pegam uma conexão
+# já aberta em vez de conectar ao Postgres. MAX_SIZE deve cobrir as threads do
+# worker (--threads do gunicorn); TIMEOUT é a espera máxima (s) por uma conexão
+# livre. Só vale para PostgreSQL com psycopg[pool] instalado e dispensa
+# CONN_MAX_AGE (o Django recusa as duas opções juntas)
+DATABASE_POOL = config("DATABASE_POOL", default=True, cast=bool)
+DATABASE_POOL_OPTIONS = {
+    "min_size": config("DATABASE_POOL_MIN_SIZE", default=2, cast=int),
+    "max_size": config("DATABASE_POOL_MAX_SIZE", default=4, cast=int),
+    "timeout": config("DATABASE_POOL_TIMEOUT", default=5.0, cast=float),
+    "max_waiting": config("DATABASE_POOL_MAX_WAITING", default=0, cast=int),
+    "max_idle": config("DATABASE_POOL_MAX_IDLE", default=600.0, cast=float),
+    "max_lifetime": config("DATABASE_POOL_MAX_LIFETIME", default=1800.0, cast=float),
+}
+
+if DATABASE_POOL:
+    try:
+        import psycopg_pool  # noqa: F401
+
+        for _banco in DATABASES.values():
+            if _banco["ENGINE"] == "django.db.backends.postgresql":
+                _banco["CONN_MAX_AGE"] = 0
+                _banco["OPTIONS"] = {
+                    **_banco.get("OPTIONS", {}),
+                    "pool": dict(DATABASE_POOL_OPTIONS),
+                }
+    except ImportError:
+        pass
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -133,6 +200,24 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hash de senhas (PBKDF2) calculado em um pool de threads limitado por worker;
+# com a fila cheia, login e registro respondem 503 em vez de prender threads.
+# TRABALHADORES + MAX_FILA deve ficar abaixo de --threads do gunicorn, para
+# que sempre sobre thread para as demais rotas
+PASSWORD_HASHERS = [
+    "authentication.hashing.PooledPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+PASSWORD_HASHING_POOL = {
+    "TRABALHADORES": config("PASSWORD_HASHING_WORKERS", default=1, cast=int),
+    "MAX_FILA": config("PASSWORD_HASHING_MAX_FILA", default=2, cast=int),
+    "TIMEOUT": config("PASSWORD_HASHING_TIMEOUT", default=5.0, cast=float),
+}
+
 # Cache Settings
 # Usar LocMemCache para desenvolvimento e testes (funciona com throttling)
 CACHES = {
@@ -165,6 +250,48 @@ if not DEBUG and not IS_TESTING:
             }
         }
 
+# Redis dos throttles (script Lua atômico); sem ele, usa o cache padrão
+THROTTLE_REDIS_URL = config("THROTTLE_REDIS_URL", default=None)
+THROTTLE_REDIS_TIMEOUT = config("THROTTLE_REDIS_TIMEOUT", default=0.1, cast=float)
+
+# Pré-filtro local dos throttles de listagem (por worker)
+# MAX_EXCESSO: fração do limite que cada worker admite sem consultar o
+# contador compartilhado (0 desabilita); INTERVALO: segundos máximos entre
+# sincronizações de uma mesma chave
+THROTTLE_PRE_FILTRO = {
+    "MAX_EXCESSO": config("THROTTLE_PRE_FILTRO_MAX_EXCESSO", default=0.02, cast=float),
+    "INTERVALO": config("THROTTLE_PRE_FILTRO_INTERVALO", default=10.0, cast=float),
+}
+
+# Cache do usuário autenticado por JWT (segundos; 0 desabilita)
+JWT_AUTH_CACHE_TIMEOUT = config("JWT_AUTH_CACHE_TIMEOUT", default=300, cast=int)
+
+# Cache da listagem pública de profissionais (segundos; 0 desabilita). Só é
+# usado com um cache compartilhado entre os workers (Redis), não com LocMem
+PROFISSIONAIS_LIST_CACHE_TIMEOUT = config(
+    "PROFISSIONAIS_LIST_CACHE_TIMEOUT", default=300, cast=int
+)
+
+# Quantidade máxima de consultas por requisição de criação em lote
+CONSULTAS_LOTE_MAX_ITENS = config("CONSULTAS_LOTE_MAX_ITENS", default=500, cast=int)
+
+# Linhas buscadas por vez (cursor do servidor) na exportação de consultas
+CONSULTAS_EXPORTACAO_CHUNK_SIZE = config(
+    "CONSULTAS_EXPORTACAO_CHUNK_SIZE", default=2000, cast=int
+)
+
+# Disponibilidade de profissionais (horários livres)
+# EXPEDIENTE: dia da semana (0 = segunda-feira) -> janelas de atendimento
+DISPONIBILIDADE = {
+    "TIMEZONE": config("DISPONIBILIDADE_TIMEZONE", default="America/Sao_Paulo"),
+    "DURACAO_PADRAO_MINUTOS": 30,
+    "DURACAO_CONSULTA_MINUTOS": 30,
+    "DURACAO_MINIMA_MINUTOS": 10,
+    "DURACAO_MAXIMA_MINUTOS": 240,
+    "MAX_DIAS": 92,
+    "EXPEDIENTE": {dia: [("08:00", "12:00"), ("13:00", "18:00")] for dia in range(5)},
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -199,14 +326,14 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Django REST Framework configuration
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "authentication.autenticacao.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "core.throttling.AnonSlidingWindowThrottle",
+        "core.throttling.UserSlidingWindowThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "100/hour",
@@ -222,8 +349,44 @@ REST_FRAMEWORK = {
     },
 }
 
-# Desabilitar throttling nos testes para evitar falhas
+# JSON da API com orjson (mesma saída do JSONRenderer do DRF, ver
+# core.json_rapido); False volta para o renderer e o parser do DRF
+API_JSON_ORJSON = config("API_JSON_ORJSON", default=True, cast=bool)
+if API_JSON_ORJSON:
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
+        "core.json_rapido.OrjsonRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ]
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"] = [
+        "core.json_rapido.OrjsonParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ]
+
+# Compressão das respostas da API (ver core.compressao): o primeiro de
+# ALGORITMOS aceito pelo cliente (br e zstd só com os pacotes brotli e
+# zstandard); respostas menores que TAMANHO_MINIMO bytes não são comprimidas.
+# NIVEIS troca CPU por banda: gzip 1-9, br 0-11, zstd 1-22
+API_COMPRESSAO = config("API_COMPRESSAO", default=True, cast=bool)
+API_COMPRESSAO_OPCOES = {
+    "ALGORITMOS": config(
+        "API_COMPRESSAO_ALGORITMOS", default="zstd,br,gzip", cast=Csv()
+    ),
+    "NIVEIS": {
+        "gzip": config("API_COMPRESSAO_NIVEL_GZIP", default=6, cast=int),
+        "br": config("API_COMPRESSAO_NIVEL_BR", default=4, cast=int),
+        "zstd": config("API_COMPRESSAO_NIVEL_ZSTD", default=3, cast=int),
+    },
+    "TAMANHO_MINIMO": config("API_COMPRESSAO_TAMANHO_MINIMO", default=1024, cast=int),
+    "TIPOS": ["application/json", "application/x-ndjson", "text/html", "text/csv"],
+    "CACHE_ENTRADAS": config("API_COMPRESSAO_CACHE_ENTRADAS", default=128, cast=int),
+}
+
+# Desabilitar throttling e caches (listagem, autenticação) nos testes
 if IS_TESTING:
+    PROFISSIONAIS_LIST_CACHE_TIMEOUT = 0
+    JWT_AUTH_CACHE_TIMEOUT = 0
+    THROTTLE_REDIS_URL = None
     REST_FRAMEWORK["DEFAULT_THROTTLE_CLASSES"] = []
     # Manter os rates para não quebrar as classes específicas
     REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] = {
@@ -273,6 +436,7 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_EXP_CLAIM": "refresh_exp",
     "SLIDING_TOKEN_LIFETIME": timedelta(minutes=5),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
+    "TOKEN_REFRESH_SERIALIZER": "authentication.serializers.TokenAtualizarSerializer",
 }
 
 # Configurações de Segurança
@@ -20,17 +20,36 @@ CORS_ALLOWED_ORIGINS = [
     "https://www.desafio-lacrei.com",
 ]
 
-# Cache em memória
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "production-cache",
-        "OPTIONS": {
-            "MAX_ENTRIES": 1000,
-            "CULL_FREQUENCY": 3,
-        },
+# Cache em duas camadas: Redis compartilhado entre os workers (throttles,
+# blacklist, versões) com um LRU local na frente para valores imutáveis sob a
+# mesma chave (ver core.cache_camadas). Sem REDIS_URL, cache em memória
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "core.cache_camadas.CacheDuasCamadas",
+            "KEY_PREFIX": "lacrei_cache",
+            "OPTIONS": {
+                "L2": {
+                    "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                    "LOCATION": os.environ["REDIS_URL"],
+                },
+                "L1_MAX_ENTRIES": int(os.environ.get("CACHE_L1_MAX_ENTRIES", "1000")),
+                "L1_TIMEOUT": float(os.environ.get("CACHE_L1_TIMEOUT", "5")),
+                "L1_PREFIXOS": ["auth:jwt:", "profissionais:lista:dados:"],
+            },
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "production-cache",
+            "OPTIONS": {
+                "MAX_ENTRIES": 1000,
+                "CULL_FREQUENCY": 3,
+            },
+        }
     }
-}
 
 # Configurações de logging para produção - Console only para ECS
 LOGGING = {
@@ -108,13 +127,17 @@ ADMINS = [
 RATELIMIT_ENABLE = True
 RATELIMIT_USE_CACHE = "default"
 
-CONN_MAX_AGE = 60
+# Conexões persistentes só sem o pool do psycopg (ver DATABASE_POOL)
+for _banco in DATABASES.values():  # noqa: F405
+    if "pool" not in _banco.get("OPTIONS", {}):
+        _banco["CONN_MAX_AGE"] = 60
 
-# Django REST Framework para produção
+# Django REST Framework para produção (mantém autenticação e permissões da base)
 REST_FRAMEWORK = {
+    **REST_FRAMEWORK,  # noqa: F405
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "core.throttling.AnonSlidingWindowThrottle",
+        "core.throttling.UserSlidingWindowThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "300/hour",
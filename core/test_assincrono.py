@@ -0,0 +1,151 @@
+"""
+Testes das views assíncronas do modo ASGI.
+"""
+
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from django.contrib.auth.models import User
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from consultas.models import Consulta
+from consultas.views import ConsultaViewSet
+from core import health
+from profissionais.models import Profissional
+from profissionais.views import ProfissionalViewSet
+
+
+class AsyncViewSetTest(TestCase):
+    """Paridade entre as versões síncrona e assíncrona de list e retrieve"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profissional = Profissional.objects.create(
+            nome="Dra. Ana",
+            especialidade="Cardiologia",
+            email="ana@example.com",
+            telefone="(11)99999-9999",
+        )
+        inicio = timezone.now() + timedelta(days=1)
+        for hora in range(3):
+            Consulta.objects.create(
+                profissional=cls.profissional,
+                paciente_nome=f"Paciente {hora}",
+                data_hora=inicio + timedelta(hours=hora),
+            )
+
+    def views(self, viewset, acoes):
+        sincrona = viewset.as_view(acoes)
+        with override_settings(ASGI_MODE=True):
+            assincrona = viewset.as_view(acoes)
+        return sincrona, assincrona
+
+    async def comparar(self, viewset, acoes, caminho, **kwargs):
+        sincrona, assincrona = self.views(viewset, acoes)
+        esperado = await sync_to_async(sincrona)(
+            APIRequestFactory().get(caminho), **kwargs
+        )
+        esperado.render()
+        response = await assincrona(AsyncRequestFactory().get(caminho), **kwargs)
+        response.render()
+        self.assertEqual(response.status_code, esperado.status_code)
+        self.assertEqual(json.loads(response.content), json.loads(esperado.content))
+        self.assertEqual(response.get("ETag"), esperado.get("ETag"))
+        return response
+
+    def test_view_so_e_assincrona_no_modo_asgi(self):
+        sincrona, assincrona = self.views(ProfissionalViewSet, {"get": "list"})
+        self.assertFalse(iscoroutinefunction(sincrona))
+        self.assertTrue(iscoroutinefunction(assincrona))
+        self.assertTrue(assincrona.csrf_exempt)
+
+    async def test_listagem_de_profissionais(self):
+        await self.comparar(ProfissionalViewSet, {"get": "list"}, "/")
+        await self.comparar(ProfissionalViewSet, {"get": "list"}, "/?q=ana")
+
+    async def test_detalhe_de_profissional(self):
+        await self.comparar(
+            ProfissionalViewSet, {"get": "retrieve"}, "/", pk=self.profissional.pk
+        )
+        response = await self.comparar(
+            ProfissionalViewSet, {"get": "retrieve"}, "/", pk=999999
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_listagem_e_detalhe_de_consultas(self):
+        await self.comparar(ConsultaViewSet, {"get": "list"}, "/")
+        await self.comparar(
+            ConsultaViewSet,
+            {"get": "list"},
+            f"/?profissional_id={self.profissional.pk}",
+        )
+        response = await self.comparar(
+            ConsultaViewSet, {"get": "list"}, "/?profissional_id=999999"
+        )
+        self.assertEqual(response.status_code, 404)
+
+        consulta = await Consulta.objects.afirst()
+        await self.comparar(ConsultaViewSet, {"get": "retrieve"}, "/", pk=consulta.pk)
+
+    async def test_get_condicional(self):
+        _, assincrona = self.views(ProfissionalViewSet, {"get": "list"})
+        response = await assincrona(AsyncRequestFactory().get("/"))
+        response = await assincrona(
+            AsyncRequestFactory().get("/", headers={"If-None-Match": response["ETag"]})
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_acoes_sincronas_mantem_permissoes(self):
+        _, assincrona = self.views(ProfissionalViewSet, {"post": "create"})
+        response = await assincrona(AsyncRequestFactory().post("/", {}))
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(PROFISSIONAIS_LIST_CACHE_TIMEOUT=300)
+    @patch("authentication.tokens.cache_compartilhado", return_value=True)
+    async def test_listagem_com_cache(self, _):
+        _, assincrona = self.views(ProfissionalViewSet, {"get": "list"})
+        primeira = await assincrona(AsyncRequestFactory().get("/?cache=async"))
+        segunda = await assincrona(AsyncRequestFactory().get("/?cache=async"))
+        self.assertEqual(primeira["X-Cache"], "MISS")
+        self.assertEqual(segunda["X-Cache"], "HIT")
+        self.assertEqual(segunda.data, primeira.data)
+
+    @override_settings(CONSULTAS_EXPORTACAO_CHUNK_SIZE=1)
+    async def test_exportacao_em_streaming_assincrono(self):
+        usuario = await User.objects.acreate(username="exportador")
+        sincrona, assincrona = self.views(ConsultaViewSet, {"get": "exportar"})
+        requisicoes = []
+        for fabrica in (APIRequestFactory(), AsyncRequestFactory()):
+            request = fabrica.get("/?formato=csv")
+            force_authenticate(request, usuario)
+            requisicoes.append(request)
+
+        esperado = await sync_to_async(sincrona)(requisicoes[0])
+        esperado = await sync_to_async(b"".join)(esperado.streaming_content)
+
+        response = await assincrona(requisicoes[1])
+        self.assertEqual(response.status_code, 200)
+        # Iterador assíncrono: o Django não o converte em lista antes de enviar.
+        self.assertTrue(response.is_async)
+        blocos = [bloco async for bloco in response.streaming_content]
+        self.assertEqual(len(blocos), 4)  # cabeçalho + uma linha por bloco
+        self.assertEqual(b"".join(blocos), esperado)
+
+
+class AsyncHealthCheckTest(TestCase):
+    """Testes dos health checks assíncronos"""
+
+    async def test_health_check(self):
+        response = await health.ahealth_check(AsyncRequestFactory().get("/health/"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["database"], "healthy")
+
+    async def test_readiness_check(self):
+        response = await health.areadiness_check(AsyncRequestFactory().get("/ready/"))
+        self.assertEqual(json.loads(response.content)["status"], "ready")
+        self.assertEqual(json.loads(response.content)["database"], "connected")
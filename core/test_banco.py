@@ -0,0 +1,78 @@
+"""
+Testes das estatísticas do pool de conexões nos health checks.
+"""
+
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import RequestFactory, TestCase
+
+from core import health
+from core.banco import estatisticas_pool, resumir_pool
+
+try:
+    import psycopg_pool
+except ImportError:
+    psycopg_pool = None
+
+ESTATISTICAS = {
+    "pool_min": 2,
+    "pool_max": 4,
+    "pool_size": 3,
+    "pool_available": 1,
+    "requests_num": 10,
+    "requests_queued": 2,
+    "requests_wait_ms": 50,
+    "usage_ms": 120,
+}
+
+
+def conexao_com_pool(estatisticas):
+    return SimpleNamespace(
+        vendor="postgresql",
+        settings_dict={"OPTIONS": {"pool": {"max_size": 4}}},
+        pool=SimpleNamespace(get_stats=lambda: estatisticas),
+    )
+
+
+class PoolConexoesTest(TestCase):
+    """Resumo do psycopg_pool exposto em /health/ e /ready/"""
+
+    def test_resumo_do_pool(self):
+        resumo = resumir_pool(ESTATISTICAS)
+        self.assertEqual(resumo["in_use"], 2)
+        self.assertEqual(resumo["requests"], 10)
+        self.assertEqual(resumo["requests_queued"], 2)
+        self.assertEqual(resumo["timeouts"], 0)
+        self.assertEqual(resumo["wait_ms_avg"], 5.0)
+        self.assertEqual(resumo["usage_ms_avg"], 12.0)
+
+    def test_sem_pool_nao_ha_estatisticas(self):
+        self.assertEqual(estatisticas_pool(), {})
+        response = health.health_check(RequestFactory().get("/health/"))
+        self.assertNotIn("database_pool", json.loads(response.content))
+
+    def test_health_checks_exibem_o_pool(self):
+        conexoes = {"default": conexao_com_pool(ESTATISTICAS)}
+        with patch("core.banco.connections", conexoes):
+            saude = json.loads(
+                health.health_check(RequestFactory().get("/health/")).content
+            )
+            pronto = json.loads(
+                health.readiness_check(RequestFactory().get("/ready/")).content
+            )
+        self.assertEqual(saude["database"], "healthy")
+        self.assertEqual(saude["database_pool"]["default"]["size"], 3)
+        self.assertEqual(pronto["database_pool"]["default"]["in_use"], 2)
+
+    @unittest.skipUnless(psycopg_pool, "psycopg_pool não instalado")
+    def test_resumo_de_um_pool_real(self):
+        pool = psycopg_pool.ConnectionPool(
+            "", min_size=2, max_size=4, open=False, timeout=5
+        )
+        resumo = resumir_pool(pool.get_stats())
+        self.assertEqual(resumo["min_size"], 2)
+        self.assertEqual(resumo["max_size"], 4)
+        self.assertEqual(resumo["requests"], 0)
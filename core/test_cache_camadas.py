@@ -0,0 +1,133 @@
+"""
+Testes do cache em duas camadas.
+
+Dois ``CacheDuasCamadas`` com o mesmo ``LocMemCache`` como L2 fazem o papel
+de dois workers compartilhando o Redis.
+"""
+
+from unittest.mock import patch
+
+from rest_framework.test import APIClient
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.cache_camadas import CacheDuasCamadas
+
+L2 = {
+    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    "LOCATION": "teste-cache-camadas",
+}
+
+
+def worker(**opcoes):
+    return CacheDuasCamadas(
+        "",
+        {
+            "KEY_PREFIX": "teste",
+            "OPTIONS": {
+                "L2": L2,
+                "L1_PREFIXOS": ["imutavel:"],
+                "L1_INTERVALO_GERACAO": 0,
+                **opcoes,
+            },
+        },
+    )
+
+
+class CacheDuasCamadasTest(SimpleTestCase):
+    """L1 local na frente do L2 compartilhado"""
+
+    def setUp(self):
+        self.a = worker()
+        self.b = worker()
+        self.a.clear()
+
+    def test_leitura_repetida_vem_do_l1(self):
+        self.a.set("imutavel:1", {"nome": "Ana"})
+        self.assertEqual(self.b.get("imutavel:1"), {"nome": "Ana"})
+        self.assertEqual(self.b.get("imutavel:1"), {"nome": "Ana"})
+        estatisticas = self.b.estatisticas()
+        self.assertEqual(estatisticas["l1"]["acertos"], 1)
+        self.assertEqual(estatisticas["l1"]["falhas"], 1)
+        self.assertEqual(estatisticas["l2"]["acertos"], 1)
+        self.assertEqual(estatisticas["l1"]["taxa_acerto"], 0.5)
+
+    def test_chaves_fora_dos_prefixos_sao_compartilhadas(self):
+        self.a.set("throttle_anon_1", [1])
+        self.assertEqual(self.b.get("throttle_anon_1"), [1])
+        self.a.set("throttle_anon_1", [1, 2])
+        self.assertEqual(self.b.get("throttle_anon_1"), [1, 2])
+        self.assertEqual(self.b.estatisticas()["l1"]["entradas"], 0)
+
+    def test_incr_e_delete_nao_deixam_valor_antigo(self):
+        self.a.set("imutavel:contador", 1)
+        self.assertEqual(self.a.incr("imutavel:contador"), 2)
+        self.assertEqual(self.a.get("imutavel:contador"), 2)
+        self.a.delete("imutavel:contador")
+        self.assertIsNone(self.a.get("imutavel:contador"))
+        self.assertTrue(self.a.add("imutavel:contador", 5))
+        self.assertFalse(self.b.add("imutavel:contador", 6))
+        self.assertEqual(self.b.get("imutavel:contador"), 5)
+
+    def test_valor_do_l1_e_uma_copia(self):
+        self.a.set("imutavel:lista", [1, 2])
+        self.a.get("imutavel:lista").append(3)
+        self.assertEqual(self.a.get("imutavel:lista"), [1, 2])
+
+    def test_entrada_do_l1_expira(self):
+        self.a.set("imutavel:1", "v1")
+        self.b.get("imutavel:1")
+        self.a.set("imutavel:1", "v2")
+        self.assertEqual(self.b.get("imutavel:1"), "v1")
+        with patch("core.cache_camadas.time.monotonic", return_value=1e12):
+            self.assertEqual(self.b.get("imutavel:1"), "v2")
+
+    def test_versao_nova_nao_acerta_entrada_antiga(self):
+        self.a.set("imutavel:1", "v1")
+        self.b.get("imutavel:1")
+        self.a.set("imutavel:1", "v2", version=2)
+        self.assertEqual(self.b.get("imutavel:1", version=2), "v2")
+        self.assertEqual(self.a.incr_version("imutavel:1", version=2), 3)
+        self.assertEqual(self.b.get("imutavel:1", version=3), "v2")
+
+    def test_clear_invalida_o_l1_dos_outros_workers(self):
+        self.a.set("imutavel:1", "v1")
+        self.assertEqual(self.b.get("imutavel:1"), "v1")
+        self.a.clear()
+        self.assertIsNone(self.b.get("imutavel:1"))
+
+    def test_l1_descarta_a_menos_usada(self):
+        cache = worker(L1_MAX_ENTRIES=2)
+        cache.set("imutavel:1", 1)
+        cache.set("imutavel:2", 2)
+        cache.get("imutavel:1")
+        cache.set("imutavel:3", 3)
+        self.assertEqual(cache.estatisticas()["l1"]["entradas"], 2)
+        cache.limpar_estatisticas()
+        cache.get("imutavel:2")
+        self.assertEqual(cache.estatisticas()["l1"]["falhas"], 1)
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "core.cache_camadas.CacheDuasCamadas",
+            "OPTIONS": {"L2": L2, "L1_PREFIXOS": ["imutavel:"]},
+        }
+    }
+)
+class CacheCamadasMetricsViewTest(TestCase):
+    """Endpoint de métricas por camada"""
+
+    def test_apenas_staff(self):
+        client = APIClient()
+        url = reverse("debug-cache-camadas")
+        self.assertEqual(client.get(url).status_code, 401)
+
+        client.force_authenticate(User.objects.create_user("admin", is_staff=True))
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {"pid", "desde", "l1", "l2"})
+        self.assertEqual(client.delete(url).status_code, 204)
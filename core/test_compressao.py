@@ -0,0 +1,230 @@
+"""
+Testes da compressão negociada das respostas.
+"""
+
+import gzip
+import unittest
+from unittest.mock import Mock, patch
+
+from rest_framework.test import APIClient
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import compressao
+from core.compressao import CompressaoMiddleware, brotli, negociar, zstandard
+from profissionais.models import Profissional
+
+CORPO = b'{"nome": "Profissional"}' * 100
+
+
+def middleware(resposta, **opcoes):
+    with override_settings(
+        API_COMPRESSAO_OPCOES={
+            "ALGORITMOS": ["br", "zstd", "gzip"],
+            "NIVEIS": {"gzip": 6, "br": 4, "zstd": 3},
+            "TAMANHO_MINIMO": 1024,
+            "TIPOS": ["application/json", "text/csv"],
+            "CACHE_ENTRADAS": 8,
+            **opcoes,
+        }
+    ):
+        return CompressaoMiddleware(lambda request: resposta())
+
+
+def get(accept_encoding):
+    return RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+
+
+def json(corpo=CORPO, **cabecalhos):
+    response = HttpResponse(corpo, content_type="application/json")
+    for nome, valor in cabecalhos.items():
+        response[nome] = valor
+    return response
+
+
+class NegociacaoTest(SimpleTestCase):
+    """Escolha da codificação pelo Accept-Encoding"""
+
+    def test_ordem_do_servidor_entre_as_aceitas(self):
+        algoritmos = ["br", "zstd", "gzip"]
+        self.assertEqual(negociar("gzip, deflate, br", algoritmos), "br")
+        self.assertEqual(negociar("gzip, zstd", algoritmos), "zstd")
+        self.assertEqual(negociar("gzip;q=0.5, br;q=0", algoritmos), "gzip")
+        self.assertEqual(negociar("br;q=0.2, gzip", algoritmos), "gzip")
+        self.assertEqual(negociar("*", algoritmos), "br")
+        self.assertEqual(negociar("*, br;q=0", algoritmos), "zstd")
+
+    def test_sem_codificacao_aceita(self):
+        self.assertIsNone(negociar("", ["gzip"]))
+        self.assertIsNone(negociar("identity", ["gzip"]))
+        self.assertIsNone(negociar("gzip;q=0", ["gzip"]))
+        self.assertIsNone(negociar("deflate", ["br", "gzip"]))
+
+
+class CompressaoMiddlewareTest(SimpleTestCase):
+    """Compressão, limites e cache dos corpos comprimidos"""
+
+    def test_gzip(self):
+        response = middleware(json, ALGORITMOS=["gzip"])(get("gzip"))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), CORPO)
+
+    @unittest.skipUnless(brotli, "brotli não instalado")
+    def test_brotli(self):
+        response = middleware(json)(get("gzip, br"))
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), CORPO)
+
+    @unittest.skipUnless(zstandard, "zstandard não instalado")
+    def test_zstd(self):
+        response = middleware(json)(get("gzip, zstd"))
+        self.assertEqual(response["Content-Encoding"], "zstd")
+        self.assertEqual(
+            zstandard.ZstdDecompressor().decompress(response.content), CORPO
+        )
+
+    def test_respostas_que_passam_intactas(self):
+        casos = {
+            "pequena": lambda: json(b"{}"),
+            "ja_codificada": lambda: json(**{"Content-Encoding": "gzip"}),
+            "no_transform": lambda: json(**{"Cache-Control": "no-transform"}),
+            "outro_tipo": lambda: HttpResponse(CORPO, content_type="image/png"),
+        }
+        for nome, resposta in casos.items():
+            with self.subTest(nome):
+                response = middleware(resposta)(get("gzip"))
+                self.assertEqual(
+                    response.get("Content-Encoding"),
+                    resposta().get("Content-Encoding"),
+                )
+                self.assertEqual(response.content, resposta().content)
+
+    def test_sem_accept_encoding_so_varia(self):
+        response = middleware(json)(get(""))
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response.content, CORPO)
+
+    def test_streaming(self):
+        linhas = [f"{i};Paciente {i}\n".encode() for i in range(200)]
+
+        def exportacao():
+            return StreamingHttpResponse(iter(linhas), content_type="text/csv")
+
+        response = middleware(exportacao, ALGORITMOS=["gzip"])(get("gzip"))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        blocos = list(response.streaming_content)
+        self.assertGreater(len(blocos), 1)
+        self.assertEqual(gzip.decompress(b"".join(blocos)), b"".join(linhas))
+
+    def test_etag_reaproveita_o_corpo_comprimido(self):
+        instancia = middleware(lambda: json(ETag='"v1"'), ALGORITMOS=["gzip"])
+        with patch.dict(
+            compressao.CODIFICADORES,
+            gzip=(
+                Mock(wraps=compressao.CODIFICADORES["gzip"][0]),
+                compressao.CODIFICADORES["gzip"][1],
+            ),
+        ):
+            primeira = instancia(get("gzip"))
+            segunda = instancia(get("gzip"))
+            contador = compressao.CODIFICADORES["gzip"][0]
+            self.assertEqual(contador.call_count, 1)
+        self.assertEqual(primeira.content, segunda.content)
+        self.assertEqual(segunda["ETag"], 'W/"v1"')
+
+    def test_mesmo_etag_com_corpo_diferente(self):
+        corpos = iter([CORPO, CORPO.replace(b"Profissional", b"Profissionxl")])
+        instancia = middleware(
+            lambda: json(next(corpos), ETag='"v1"'), ALGORITMOS=["gzip"]
+        )
+        primeira = gzip.decompress(instancia(get("gzip")).content)
+        segunda = gzip.decompress(instancia(get("gzip")).content)
+        self.assertNotEqual(primeira, segunda)
+
+    async def test_modo_assincrono(self):
+        async def linhas():
+            for i in range(50):
+                yield f"{i};Paciente {i}\n".encode()
+
+        async def get_response(request):
+            return StreamingHttpResponse(linhas(), content_type="text/csv")
+
+        with override_settings(
+            API_COMPRESSAO_OPCOES={
+                **settings.API_COMPRESSAO_OPCOES,
+                "ALGORITMOS": ["gzip"],
+            }
+        ):
+            instancia = CompressaoMiddleware(get_response)
+        response = await instancia(get("gzip"))
+        blocos = [bloco async for bloco in response.streaming_content]
+        esperado = "".join(f"{i};Paciente {i}\n" for i in range(50)).encode()
+        self.assertEqual(gzip.decompress(b"".join(blocos)), esperado)
+
+    @override_settings(API_COMPRESSAO=False)
+    def test_desligado(self):
+        with self.assertRaises(compressao.MiddlewareNotUsed):
+            CompressaoMiddleware(lambda request: json())
+
+
+class CompressaoApiTest(TestCase):
+    """Listagem e exportação comprimidas pela API"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Profissional.objects.bulk_create(
+            Profissional(
+                nome=f"Profissional {i}",
+                especialidade="Clínica Geral",
+                email=f"profissional{i}@example.com",
+                telefone="(11)99999-9999",
+            )
+            for i in range(50)
+        )
+
+    def test_listagem_comprimida_e_etag_fraco_valido(self):
+        client = APIClient()
+        url = reverse("profissional-list")
+        response = client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertIn(response["Content-Encoding"], {"gzip", "br", "zstd"})
+        self.assertTrue(response["ETag"].startswith("W/"))
+
+        condicional = client.get(
+            url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(condicional.status_code, 304)
+
+    def test_exportacao_em_streaming(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("admin"))
+        response = client.get(
+            reverse("consulta-exportar"),
+            {"formato": "csv"},
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        corpo = gzip.decompress(b"".join(response.streaming_content))
+        self.assertTrue(corpo.startswith(b"id"))
+
+    def test_html_da_api_navegavel_nao_e_compartilhado(self):
+        # Um só client (um só handler e middleware) para clientes diferentes.
+        client = APIClient()
+        url = reverse("profissional-list")
+        corpos = []
+        for token in ("a" * 32, "b" * 32):
+            client.cookies["csrftoken"] = token
+            response = client.get(
+                url, HTTP_ACCEPT="text/html", HTTP_ACCEPT_ENCODING="gzip"
+            )
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            corpos.append(gzip.decompress(response.content))
+        self.assertNotEqual(corpos[0], corpos[1])
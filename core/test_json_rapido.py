@@ -0,0 +1,141 @@
+"""
+Testes de paridade do renderer e do parser com orjson.
+"""
+
+import datetime
+import decimal
+import io
+import unittest
+import uuid
+from datetime import timedelta
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from consultas.models import Consulta
+from consultas.serializers import ConsultaSerializer
+from core.json_rapido import OrjsonParser, OrjsonRenderer, orjson
+from profissionais.models import Profissional
+from profissionais.serializers import ProfissionalListSerializer
+
+
+@unittest.skipUnless(orjson, "orjson não instalado")
+class OrjsonRendererTest(TestCase):
+    """Mesmos bytes do JSONRenderer do DRF"""
+
+    def assertMesmaSaida(self, dados, media_type=None, contexto=None):
+        esperado = JSONRenderer().render(dados, media_type, contexto)
+        self.assertEqual(OrjsonRenderer().render(dados, media_type, contexto), esperado)
+
+    def test_datas_e_horas(self):
+        fuso = datetime.timezone(timedelta(hours=-3))
+        self.assertMesmaSaida(
+            {
+                "utc": datetime.datetime(2025, 1, 2, 3, 4, 5, tzinfo=datetime.UTC),
+                "micro": datetime.datetime(
+                    2025, 1, 2, 3, 4, 5, 123456, tzinfo=datetime.UTC
+                ),
+                "fuso": datetime.datetime(2025, 1, 2, 3, 4, 5, tzinfo=fuso),
+                "ingenuo": datetime.datetime(2025, 1, 2, 3, 4, 5),
+                "data": datetime.date(2025, 1, 2),
+                "hora": datetime.time(3, 4, 5, 123456),
+                "duracao": timedelta(minutes=30),
+            }
+        )
+
+    def test_decimal_e_textos_lazy(self):
+        self.assertMesmaSaida(
+            {
+                "valor": decimal.Decimal("150.50"),
+                "pequeno": decimal.Decimal("0.00001"),
+                "grande": decimal.Decimal("1E+16"),
+                "lazy": gettext_lazy("Este campo é obrigatório."),
+                "lista": [gettext_lazy("Não encontrado.")],
+            }
+        )
+
+    def test_outros_tipos(self):
+        self.assertMesmaSaida(
+            {
+                "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+                "separadores": "linha\u2028paragrafo\u2029fim",
+                "acentos": "São Paulo – Clínica",
+                1: "chave inteira",
+                "tupla": (1, 2.5, None, True),
+                "bytes": b"abc",
+                "enorme": 2**70,
+            }
+        )
+        self.assertEqual(OrjsonRenderer().render(None), b"")
+
+    def test_indentacao_usa_o_renderer_do_drf(self):
+        self.assertMesmaSaida({"a": [1, 2]}, "application/json; indent=4")
+        self.assertMesmaSaida({"a": [1, 2]}, None, {"indent": 2})
+
+    def test_listagens_reais(self):
+        profissional = Profissional.objects.create(
+            nome="Dra. Ana",
+            nome_social="Ana",
+            especialidade="Cardiologia",
+            email="ana@example.com",
+            telefone="(11)99999-9999",
+        )
+        Profissional.objects.create(
+            nome="Dr. José",
+            especialidade="Clínica Geral",
+            email="jose@example.com",
+            telefone="(11)98888-8888",
+        )
+        for hora in range(3):
+            Consulta.objects.create(
+                profissional=profissional,
+                paciente_nome=f"Paciente {hora}",
+                data_hora=timezone.now() + timedelta(days=1, hours=hora),
+                observacoes="Retorno ✓",
+            )
+        self.assertMesmaSaida(
+            ProfissionalListSerializer(Profissional.objects.all(), many=True).data
+        )
+        self.assertMesmaSaida(
+            ConsultaSerializer(Consulta.objects.all(), many=True).data
+        )
+
+    def test_configurado_na_api(self):
+        response = APIClient().get(reverse("profissional-list"))
+        self.assertIsInstance(response.accepted_renderer, OrjsonRenderer)
+
+
+@unittest.skipUnless(orjson, "orjson não instalado")
+class OrjsonParserTest(TestCase):
+    """Mesmo resultado e mesmos erros do JSONParser do DRF"""
+
+    def parse(self, parser, corpo, **contexto):
+        return parser.parse(io.BytesIO(corpo), "application/json", contexto)
+
+    def test_mesmo_resultado(self):
+        corpo = '{"nome": "José", "valor": 1.5, "itens": [1, null, true]}'.encode()
+        self.assertEqual(
+            self.parse(OrjsonParser(), corpo), self.parse(JSONParser(), corpo)
+        )
+
+    def test_mesmo_erro(self):
+        for corpo in (b"{", b'{"a": NaN}', b""):
+            with self.subTest(corpo=corpo):
+                with self.assertRaises(ParseError) as esperado:
+                    self.parse(JSONParser(), corpo)
+                with self.assertRaises(ParseError) as recebido:
+                    self.parse(OrjsonParser(), corpo)
+                self.assertEqual(str(recebido.exception), str(esperado.exception))
+
+    def test_outras_codificacoes_usam_o_parser_do_drf(self):
+        corpo = '{"nome": "José"}'.encode("latin-1")
+        self.assertEqual(
+            self.parse(OrjsonParser(), corpo, encoding="latin-1"), {"nome": "José"}
+        )
@@ -0,0 +1,8 @@
+class QueryCountTestMixin:
+    """Mixin para fixar a quantidade de queries de cada endpoint nos testes"""
+
+    def assertEndpointQueries(self, num, url, method="get", **kwargs):
+        """Executa a requisição e falha se o número de queries for diferente"""
+        with self.assertNumQueries(num):
+            response = getattr(self.client, method)(url, **kwargs)
+        return response
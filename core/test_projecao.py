@@ -0,0 +1,145 @@
+"""
+Testes de paridade das listagens projetadas com os serializers.
+"""
+
+from datetime import timedelta
+
+from rest_framework.test import APIClient
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from consultas.models import Consulta
+from consultas.serializers import ConsultaSerializer
+from consultas.views import ConsultaViewSet
+from core.projecao import Projecao
+from profissionais.models import Profissional
+from profissionais.serializers import (
+    ProfissionalDetalheSerializer,
+    ProfissionalListSerializer,
+)
+from profissionais.views import ProfissionalViewSet
+
+
+class ProjecaoTest(TestCase):
+    """Mesmos dicts que o serializer, com as chaves na mesma ordem"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profissionais = [
+            Profissional.objects.create(
+                nome="Dra. Ana",
+                nome_social=nome_social,
+                especialidade="Cardiologia",
+                email=f"ana{i}@example.com",
+                telefone="(11)99999-9999",
+            )
+            for i, nome_social in enumerate(["Ana", None, ""])
+        ]
+        inicio = timezone.now().replace(microsecond=123456) + timedelta(days=1)
+        for i in range(4):
+            Consulta.objects.create(
+                profissional=cls.profissionais[i % 2],
+                paciente_nome=f"Paciente {i}",
+                data_hora=inicio + timedelta(hours=i),
+                observacoes="" if i % 2 else "Retorno",
+            )
+
+    def assertParidade(self, projecao, serializer_class, queryset):
+        esperado = serializer_class(queryset, many=True).data
+        obtido = projecao.dados(projecao.aplicar(queryset))
+        self.assertEqual(
+            [list(item.items()) for item in obtido],
+            [list(item.items()) for item in esperado],
+        )
+
+    def test_profissionais(self):
+        self.assertParidade(
+            ProfissionalViewSet.projecao_listagem,
+            ProfissionalListSerializer,
+            Profissional.objects.order_by("id"),
+        )
+
+    def test_consultas(self):
+        self.assertParidade(
+            ConsultaViewSet.projecao_listagem,
+            ConsultaSerializer,
+            Consulta.objects.order_by("id"),
+        )
+
+    @override_settings(TIME_ZONE="America/Sao_Paulo")
+    def test_consultas_em_outro_fuso(self):
+        self.assertParidade(
+            Projecao(ConsultaSerializer),
+            ConsultaSerializer,
+            Consulta.objects.order_by("id"),
+        )
+
+    def test_colunas_extras_ficam_fora_da_saida(self):
+        projecao = ConsultaViewSet.projecao_listagem
+        linhas = projecao.aplicar(
+            Consulta.objects.all(), ("pk", "atualizado_em", "id"), nomeada=True
+        )
+        self.assertIsNotNone(linhas[0].atualizado_em)
+        self.assertNotIn("atualizado_em", projecao.dados(linhas)[0])
+
+    def test_campo_calculado_sem_anotacao(self):
+        with self.assertRaises(ImproperlyConfigured):
+            Projecao(ProfissionalListSerializer).compilar()
+        with self.assertRaises(ImproperlyConfigured):
+            Projecao(ProfissionalDetalheSerializer).compilar()
+
+
+@override_settings(PROFISSIONAIS_LIST_CACHE_TIMEOUT=0)
+class ListagemProjetadaTest(TestCase):
+    """Respostas da API iguais às do serializer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profissional = Profissional.objects.create(
+            nome="Dr. José",
+            nome_social="",
+            especialidade="Clínica Geral",
+            email="jose@example.com",
+            telefone="(11)98888-8888",
+        )
+        inicio = timezone.now() + timedelta(days=1)
+        for i in range(3):
+            Consulta.objects.create(
+                profissional=cls.profissional,
+                paciente_nome=f"Paciente {i}",
+                data_hora=inicio + timedelta(hours=i),
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_listagem_de_profissionais(self):
+        response = self.client.get(reverse("profissional-list"))
+        self.assertEqual(
+            response.json(),
+            ProfissionalListSerializer(Profissional.objects.all(), many=True).data,
+        )
+
+    def test_busca_paginada_de_profissionais(self):
+        response = self.client.get(reverse("profissional-list"), {"q": "José"})
+        self.assertEqual(response.json()["results"][0]["nome_exibicao"], "Dr. José")
+
+    def test_paginas_de_consultas(self):
+        esperado = ConsultaSerializer(
+            Consulta.objects.order_by("-data_hora", "-id"), many=True
+        ).data
+        url = reverse("consulta-list")
+        primeira = self.client.get(url, {"page_size": 2})
+        segunda = self.client.get(primeira.json()["next"])
+        self.assertEqual(
+            primeira.json()["results"] + segunda.json()["results"], esperado
+        )
+        self.assertIsNone(segunda.json()["next"])
+
+        condicional = self.client.get(
+            url, {"page_size": 2}, HTTP_IF_NONE_MATCH=primeira["ETag"]
+        )
+        self.assertEqual(condicional.status_code, 304)
@@ -0,0 +1,157 @@
+"""
+Testes do roteamento de leituras para réplicas.
+
+``replica_1`` é um alias espelho do banco de teste (ver ``core.settings``), ou
+a primeira réplica de ``DATABASE_REPLICA_URLS``: as queries nele mostram que a
+leitura foi para a réplica.
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from rest_framework.test import APIClient
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import OperationalError, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from consultas.models import Consulta
+from core.replicas import ReplicaRouter, saude
+from profissionais.models import Profissional
+
+REPLICA = "replica_1"
+
+
+@override_settings(
+    DATABASE_REPLICAS=[REPLICA],
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "teste-replicas",
+        }
+    },
+)
+class ReplicaRouterTest(TransactionTestCase):
+    """Listagem e detalhe públicos lidos da réplica, com fallback no primário"""
+
+    databases = {"default", REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        saude.limpar()
+        self.client = APIClient()
+        self.profissional = Profissional.objects.create(
+            nome="Dra. Ana",
+            especialidade="Cardiologia",
+            email="ana@example.com",
+            telefone="(11)99999-9999",
+        )
+        Consulta.objects.create(
+            profissional=self.profissional,
+            paciente_nome="Paciente",
+            data_hora=timezone.now() + timedelta(days=1),
+        )
+        self.urls = [
+            reverse("profissional-list"),
+            reverse("profissional-detail", kwargs={"pk": self.profissional.pk}),
+            reverse("consulta-list") + f"?profissional_id={self.profissional.pk}",
+        ]
+
+    def get(self, url):
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(replica)
+
+    def test_leituras_publicas_vao_para_a_replica(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                _, queries_replica = self.get(url)
+                self.assertGreater(queries_replica, 0)
+
+    def test_sem_replicas_tudo_vai_para_o_primario(self):
+        with override_settings(DATABASE_REPLICAS=[]):
+            _, queries_replica = self.get(self.urls[0])
+        self.assertEqual(queries_replica, 0)
+
+    def test_cliente_que_escreveu_le_do_primario(self):
+        self.client.force_authenticate(User.objects.create_user("escritor"))
+        response = self.client.post(
+            reverse("profissional-list"),
+            {
+                "nome": "Dr. Novo",
+                "especialidade": "Dermatologia",
+                "email": "novo@example.com",
+                "telefone": "(11)98888-8888",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+        response, queries_replica = self.get(self.urls[0])
+        self.assertEqual(queries_replica, 0)
+        self.assertIn("Dr. Novo", [item["nome_exibicao"] for item in response.data])
+
+    @override_settings(PROFISSIONAIS_LIST_CACHE_TIMEOUT=300)
+    @patch("authentication.tokens.cache_compartilhado", return_value=True)
+    def test_cache_da_listagem_preenchido_pelo_primario(self, _):
+        # Réplica atrasada: ainda não recebeu a escrita de outro cliente, que
+        # já trocou a versão do cache da listagem.
+        Profissional.objects.create(
+            nome="Dr. Novo",
+            especialidade="Dermatologia",
+            email="novo@example.com",
+            telefone="(11)98888-8888",
+        )
+
+        def atrasada(execute, sql, params, many, context):
+            raise AssertionError("listagem do cache lida da réplica")
+
+        with connections[REPLICA].execute_wrapper(atrasada):
+            response = self.client.get(self.urls[0])
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertIn("Dr. Novo", [item["nome_exibicao"] for item in response.data])
+
+        # O detalhe, fora do cache, continua na réplica.
+        _, queries_replica = self.get(self.urls[1])
+        self.assertGreater(queries_replica, 0)
+
+    def test_replica_atrasada_e_ignorada(self):
+        with patch("core.replicas.medir_atraso", return_value=30.0), self.assertLogs(
+            "core.replicas", "WARNING"
+        ):
+            _, queries_replica = self.get(self.urls[0])
+        self.assertEqual(queries_replica, 0)
+
+    def test_replica_indisponivel_e_ignorada(self):
+        with patch(
+            "core.replicas.medir_atraso", side_effect=OperationalError("sem conexão")
+        ), self.assertLogs("core.replicas", "WARNING"):
+            _, queries_replica = self.get(self.urls[0])
+        self.assertEqual(queries_replica, 0)
+
+    def test_falha_na_replica_repete_no_primario(self):
+        def falhar(execute, sql, params, many, context):
+            raise OperationalError("conexão perdida")
+
+        saude.verificar(REPLICA, max_atraso=1)
+        with connections[REPLICA].execute_wrapper(falhar), self.assertLogs(
+            "core.replicas", "WARNING"
+        ):
+            response = self.client.get(self.urls[1])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["nome"], "Dra. Ana")
+        self.assertEqual(saude.disponiveis(), [])
+
+    def test_escritas_e_migracoes_no_primario(self):
+        router = ReplicaRouter()
+        self.profissional._state.db = REPLICA
+        self.assertEqual(
+            router.db_for_write(Profissional, instance=self.profissional), "default"
+        )
+        self.assertFalse(router.allow_migrate(REPLICA, "profissionais"))
+        self.assertIsNone(router.allow_migrate("default", "profissionais"))
@@ -0,0 +1,273 @@
+"""
+Testes do contador de janela deslizante usado pelos throttles.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock, skipUnless
+
+import redis
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from authentication.test_mixins import AuthenticatedTestMixin
+from core.throttling import (
+    ListingRateThrottle,
+    LoginRateThrottle,
+    MetricasThrottle,
+    PreFiltroLocal,
+    SlidingWindowThrottleMixin,
+    avaliar_janela,
+    metricas,
+    pre_filtro,
+)
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+
+class AvaliarJanelaTest(SimpleTestCase):
+    """Testes para o algoritmo de janela deslizante"""
+
+    def _sequencia(self, instantes, duracao=60, limite=3):
+        estado = None
+        decisoes = []
+        for agora in instantes:
+            permitida, novo_estado, _ = avaliar_janela(estado, agora, duracao, limite)
+            if permitida:
+                estado = novo_estado
+            decisoes.append(permitida)
+        return decisoes, estado
+
+    def test_limite_na_mesma_janela(self):
+        decisoes, estado = self._sequencia([0, 1, 2, 3])
+        self.assertEqual(decisoes, [True, True, True, False])
+        self.assertEqual(estado, (0, 3, 0))
+
+    def test_janela_anterior_pondera(self):
+        # 3 na janela 0; aos 75s (25% da janela 1) a anterior pesa 0.75 * 3
+        decisoes, _ = self._sequencia([0, 1, 2, 75, 105])
+        self.assertEqual(decisoes, [True, True, True, False, True])
+
+    def test_janelas_antigas_sao_descartadas(self):
+        decisoes, estado = self._sequencia([0, 1, 2, 200])
+        self.assertEqual(decisoes, [True, True, True, True])
+        self.assertEqual(estado, (3, 1, 0))
+
+    def test_espera_ate_caber_no_limite(self):
+        estado = (0, 3, 0)
+        permitida, _, espera = avaliar_janela(estado, 30, 60, 3)
+        self.assertFalse(permitida)
+        # Próxima janela começa em 60s; em 80s o peso da anterior é 2/3 * 3 = 2
+        self.assertAlmostEqual(espera, 50)
+        self.assertTrue(avaliar_janela(estado, 30 + espera + 0.01, 60, 3)[0])
+        self.assertFalse(avaliar_janela(estado, 30 + espera - 1, 60, 3)[0])
+
+
+class SlidingWindowThrottleTest(TestCase):
+    """Testes para as classes de throttle com janela deslizante"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def tearDown(self):
+        cache.clear()
+
+    def _permitir(self, ip="10.0.0.1"):
+        throttle = ListingRateThrottle()
+        throttle.rate = "2/min"
+        throttle.num_requests, throttle.duration = throttle.parse_rate(throttle.rate)
+        request = self.factory.get("/", REMOTE_ADDR=ip)
+        request.user = AnonymousUser()
+        return throttle, throttle.allow_request(request, None)
+
+    def test_respeita_taxa_do_escopo(self):
+        self.assertTrue(self._permitir()[1])
+        self.assertTrue(self._permitir()[1])
+        throttle, permitida = self._permitir()
+        self.assertFalse(permitida)
+        self.assertGreater(throttle.wait(), 0)
+        # Outro cliente tem o próprio contador
+        self.assertTrue(self._permitir(ip="10.0.0.2")[1])
+
+    def test_estado_de_tamanho_fixo(self):
+        throttle, _ = self._permitir()
+        self._permitir()
+        self.assertEqual(cache.get(throttle.key)[1:], (2, 0))
+
+
+@skipUnless(fakeredis, "fakeredis[lua] não instalado")
+class RedisThrottleTest(TestCase):
+    """Testes para o throttling atômico via script Lua no Redis"""
+
+    def setUp(self):
+        cache.clear()
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch("core.throttling.obter_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = APIRequestFactory()
+
+    def _permitir(self, ip="10.0.0.1", taxa="2/min"):
+        throttle = ListingRateThrottle()
+        throttle.rate = taxa
+        throttle.num_requests, throttle.duration = throttle.parse_rate(taxa)
+        request = self.factory.get("/", REMOTE_ADDR=ip)
+        request.user = AnonymousUser()
+        return throttle, throttle.allow_request(request, None)
+
+    def test_limite_no_redis(self):
+        throttle, permitida = self._permitir()
+        self.assertTrue(permitida)
+        self.assertTrue(self._permitir()[1])
+        bloqueado, permitida = self._permitir()
+        self.assertFalse(permitida)
+        self.assertGreater(bloqueado.wait(), 0)
+        self.assertEqual(int(self.redis.hget(throttle.key, "atual")), 2)
+        self.assertLessEqual(self.redis.ttl(throttle.key), 120)
+        # Nada gravado no cache local
+        self.assertIsNone(cache.get(throttle.key))
+
+    def test_concorrencia_nao_ultrapassa_limite(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            decisoes = list(
+                executor.map(lambda _: self._permitir(taxa="10/hour")[1], range(40))
+            )
+        self.assertEqual(sum(decisoes), 10)
+
+    def test_falha_do_redis_usa_cache_local(self):
+        with mock.patch.object(
+            self.redis, "evalsha", side_effect=redis.ConnectionError
+        ), self.assertLogs("core.throttling", level="WARNING"):
+            throttle, permitida = self._permitir()
+        self.assertTrue(permitida)
+        self.assertEqual(cache.get(throttle.key)[1], 1)
+
+
+@override_settings(THROTTLE_PRE_FILTRO={"MAX_EXCESSO": 0.02, "INTERVALO": 60})
+class PreFiltroLocalTest(TestCase):
+    """Testes para o pré-filtro local por worker dos throttles de listagem"""
+
+    def setUp(self):
+        cache.clear()
+        pre_filtro.limpar()
+        self.factory = APIRequestFactory()
+
+    def tearDown(self):
+        cache.clear()
+        pre_filtro.limpar()
+
+    def _throttle(self, taxa):
+        throttle = ListingRateThrottle()
+        throttle.rate = taxa
+        throttle.num_requests, throttle.duration = throttle.parse_rate(taxa)
+        return throttle
+
+    def _requisicoes(self, quantidade, taxa="500/hour"):
+        request = self.factory.get("/", REMOTE_ADDR="10.0.0.1")
+        request.user = AnonymousUser()
+        with mock.patch.object(
+            SlidingWindowThrottleMixin,
+            "_permitir_compartilhado",
+            autospec=True,
+            side_effect=SlidingWindowThrottleMixin._permitir_compartilhado,
+        ) as compartilhado:
+            decisoes = [
+                self._throttle(taxa).allow_request(request, None)
+                for _ in range(quantidade)
+            ]
+        return decisoes, compartilhado.call_count
+
+    def test_reduz_acessos_ao_contador_compartilhado(self):
+        # lote = 2% de 500 = 10 admissões locais por sincronização
+        decisoes, acessos = self._requisicoes(110)
+        self.assertTrue(all(decisoes))
+        self.assertEqual(acessos, 10)
+        throttle = self._throttle("500/hour")
+        throttle.key = throttle.cache_format % {"scope": "listing", "ident": "10.0.0.1"}
+        # Tudo o que foi admitido localmente chega ao contador compartilhado
+        self.assertEqual(cache.get(throttle.key)[1] + 10, 110)
+
+    def test_limite_respeitado_entre_workers(self):
+        workers = [PreFiltroLocal(), PreFiltroLocal()]
+        request = self.factory.get("/", REMOTE_ADDR="10.0.0.2")
+        request.user = AnonymousUser()
+        admitidas = 0
+        for indice in range(300):
+            with mock.patch("core.throttling.pre_filtro", workers[indice % 2]):
+                admitidas += self._throttle("100/hour").allow_request(request, None)
+        # lote = 2 por worker
+        self.assertGreaterEqual(admitidas, 100)
+        self.assertLessEqual(admitidas, 100 + 2 * 2)
+
+    def test_limites_baixos_nao_usam_pre_filtro(self):
+        decisoes, acessos = self._requisicoes(12, taxa="10/hour")
+        self.assertEqual(acessos, 12)
+        self.assertEqual(sum(decisoes), 10)
+
+
+class ThrottleMetricsTest(AuthenticatedTestMixin, APITestCase):
+    """Testes para as métricas de throttling e o endpoint de debug"""
+
+    def setUp(self):
+        cache.clear()
+        metricas.limpar()
+        self.factory = APIRequestFactory()
+        self.url = reverse("debug-throttling")
+
+    def tearDown(self):
+        cache.clear()
+        metricas.limpar()
+
+    def _verificar(self, ip, quantidade):
+        request = self.factory.get("/", REMOTE_ADDR=ip)
+        request.user = AnonymousUser()
+        for _ in range(quantidade):
+            throttle = LoginRateThrottle()
+            throttle.rate = "3/min"
+            throttle.num_requests, throttle.duration = throttle.parse_rate("3/min")
+            throttle.allow_request(request, None)
+
+    def test_contadores_por_escopo_e_chaves(self):
+        self._verificar("10.0.0.1", 5)
+        self._verificar("10.0.0.2", 1)
+        dados = metricas.instantaneo(top=1)
+        self.assertEqual(dados["escopos"]["login"]["permitidas"], 4)
+        self.assertEqual(dados["escopos"]["login"]["negadas"], 2)
+        self.assertGreater(dados["escopos"]["login"]["tempo_medio_us"], 0)
+        self.assertEqual(len(dados["chaves_mais_ativas"]), 1)
+        mais_ativa = dados["chaves_mais_ativas"][0]
+        self.assertIn("10.0.0.1", mais_ativa["chave"])
+        self.assertEqual(mais_ativa["requisicoes"], 5)
+        self.assertEqual(mais_ativa["uso_do_limite"], 1.0)
+
+    def test_chaves_limitadas(self):
+        pequenas = MetricasThrottle(max_chaves=4)
+        for indice in range(10):
+            pequenas.registrar("listing", f"chave{indice}", True, 0.0, 0.1)
+        self.assertLessEqual(
+            len(pequenas.instantaneo(top=100)["chaves_mais_ativas"]), 4
+        )
+
+    def test_endpoint_apenas_staff(self):
+        self.authenticate_user()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        admin = self.create_test_user(username="admin", email="admin@example.com")
+        admin.is_staff = True
+        admin.save()
+        self.authenticate_user(admin)
+        self._verificar("10.0.0.1", 1)
+        resp = self.client.get(self.url, {"top": 5})
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("login", resp.data["escopos"])
+        self.assertIn("listing", resp.data["taxas"])
+
+        self.assertEqual(self.client.delete(self.url).status_code, 204)
+        self.assertEqual(metricas.instantaneo()["escopos"], {})
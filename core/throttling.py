@@ -1,25 +1,442 @@
+"""
+Throttles da API.
+
+Todas as classes usam contador de janela deslizante (sliding window counter)
+em vez da lista de timestamps do ``SimpleRateThrottle`` do DRF. Por chave, o
+cache guarda apenas ``(janela, contagem_atual, contagem_anterior)``: o
+índice da janela fixa corrente e as contagens dela e da anterior. A taxa
+estimada é a contagem atual somada à anterior ponderada pela fração da
+janela anterior que ainda cabe na janela deslizante. Cada verificação custa
+O(1) e o valor gravado tem tamanho fixo, qualquer que seja o limite.
+
+Com ``THROTTLE_REDIS_URL`` configurado, a verificação e o incremento são
+feitos no Redis por um único script Lua (``EVALSHA``): uma ida e volta por
+requisição e sem corrida entre workers, já que o script executa de forma
+atômica. Sem Redis, ou se ele falhar, o estado fica no cache do Django
+(``get`` seguido de ``set``, não atômico entre processos).
+
+Throttles com ``pre_filtro_local = True`` (as listagens) passam antes por
+um pré-filtro em memória em cada worker. Enquanto o cliente está longe do
+limite, o worker admite até ``lote`` requisições localmente, a partir da
+última estimativa vista no contador compartilhado, e as envia todas de uma
+vez na sincronização seguinte. ``lote`` é a fração
+``THROTTLE_PRE_FILTRO["MAX_EXCESSO"]`` do limite: é o máximo que cada worker
+pode admitir além do limite global. Limites baixos (lote < 2) não usam o
+pré-filtro.
+
+Cada verificação é registrada em ``metricas`` (por worker): decisões por
+escopo, tempo gasto e as chaves mais ativas com o uso estimado do limite.
+"""
+
+import functools
+import heapq
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import redis
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Mesmo algoritmo de avaliar_janela, usando o relógio do Redis para que todos
+# os workers vejam as mesmas janelas. Estado em um hash: janela/atual/anterior.
+SCRIPT_JANELA = """
+local duracao = tonumber(ARGV[1])
+local limite = tonumber(ARGV[2])
+local pendentes = tonumber(ARGV[3] or 0)
+local tempo = redis.call('TIME')
+local agora = tonumber(tempo[1]) + tonumber(tempo[2]) / 1000000
+local janela = math.floor(agora / duracao)
+local posicao = (agora % duracao) / duracao
+
+local estado = redis.call('HMGET', KEYS[1], 'janela', 'atual', 'anterior')
+local salva = tonumber(estado[1])
+local atual, anterior = 0, 0
+if salva == janela then
+    atual = tonumber(estado[2])
+    anterior = tonumber(estado[3])
+elseif salva == janela - 1 then
+    anterior = tonumber(estado[2])
+end
+atual = atual + pendentes
+
+local permitida = 0
+local espera = 0
+if anterior * (1 - posicao) + atual + 1 <= limite then
+    permitida = 1
+    atual = atual + 1
+else
+    local livres = limite - 1 - atual
+    if livres >= 0 then
+        espera = (1 - livres / anterior - posicao) * duracao
+    else
+        local necessaria = 1
+        if limite > 0 then
+            necessaria = 1 - (limite - 1) / atual
+        end
+        espera = (1 - posicao + necessaria) * duracao
+    end
+end
+
+if permitida == 1 or pendentes > 0 then
+    redis.call('HSET', KEYS[1], 'janela', janela, 'atual', atual,
+        'anterior', anterior)
+    redis.call('EXPIRE', KEYS[1], 2 * duracao)
+end
+local estimativa = math.ceil(anterior * (1 - posicao) + atual)
+return {permitida, math.ceil(espera * 1000), estimativa}
+"""
+
+
+def avaliar_janela(estado, agora, duracao, limite, pendentes=0):
+    """
+    Decide uma requisição pelo contador de janela deslizante.
+
+    ``pendentes`` são requisições já admitidas pelo pré-filtro local e ainda
+    não contabilizadas; entram na contagem antes da decisão.
+
+    Retorna ``(permitida, novo_estado, espera)``. ``novo_estado`` só precisa
+    ser gravado quando a requisição é permitida ou há pendentes; ``espera``
+    é o tempo, em segundos, até a próxima requisição caber no limite (0 se
+    permitida).
+    """
+    janela = int(agora // duracao)
+    posicao = (agora % duracao) / duracao
+
+    atual = anterior = 0
+    if estado is not None:
+        janela_salva, contagem, contagem_anterior = estado
+        if janela_salva == janela:
+            atual, anterior = contagem, contagem_anterior
+        elif janela_salva == janela - 1:
+            anterior = contagem
+    atual += pendentes
+
+    if anterior * (1 - posicao) + atual + 1 <= limite:
+        return True, (janela, atual + 1, anterior), 0.0
+    return (
+        False,
+        (janela, atual, anterior),
+        _espera(atual, anterior, posicao, duracao, limite),
+    )
+
+
+def estimar(estado, agora, duracao):
+    """Taxa estimada na janela deslizante que termina em ``agora``."""
+    if estado is None:
+        return 0
+    janela_salva, atual, anterior = estado
+    janela = int(agora // duracao)
+    if janela_salva == janela:
+        return anterior * (1 - (agora % duracao) / duracao) + atual
+    if janela_salva == janela - 1:
+        return atual * (1 - (agora % duracao) / duracao)
+    return 0
+
+
+def _espera(atual, anterior, posicao, duracao, limite):
+    livres = limite - 1 - atual
+    if livres >= 0:
+        # Ainda nesta janela, quando o peso da anterior tiver caído o bastante.
+        necessaria = 1 - livres / anterior
+        return (necessaria - posicao) * duracao
+    # Só na próxima janela, quando a contagem atual virar a anterior.
+    necessaria = 1 - (limite - 1) / atual if limite > 0 else 1
+    return (1 - posicao + necessaria) * duracao
+
+
+@functools.lru_cache(maxsize=None)
+def _cliente_redis(url, timeout):
+    return redis.Redis.from_url(
+        url, socket_timeout=timeout, socket_connect_timeout=timeout
+    )
+
+
+def obter_redis():
+    """Cliente Redis dos throttles, ou ``None`` se não configurado."""
+    if not settings.THROTTLE_REDIS_URL:
+        return None
+    return _cliente_redis(settings.THROTTLE_REDIS_URL, settings.THROTTLE_REDIS_TIMEOUT)
+
+
+@functools.lru_cache(maxsize=None)
+def _script_janela(cliente):
+    return cliente.register_script(SCRIPT_JANELA)
+
+
+class _EntradaLocal:
+    __slots__ = ("base", "pendentes", "sincronizado_em")
+
+    def __init__(self, base, sincronizado_em):
+        self.base = base
+        self.pendentes = 0
+        self.sincronizado_em = sincronizado_em
+
+
+class PreFiltroLocal:
+    """
+    Contadores por chave mantidos em memória no worker.
+
+    ``base`` é a última estimativa lida do contador compartilhado e
+    ``pendentes``, as requisições admitidas localmente desde então. O
+    número de chaves é limitado (as menos usadas são descartadas).
+    """
+
+    def __init__(self, max_chaves=10000):
+        self.max_chaves = max_chaves
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def admitir(self, chave, agora, limite, lote, intervalo):
+        """
+        Admite localmente se possível, retornando a contagem estimada da
+        chave; ``None`` pede sincronização com o contador compartilhado.
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if (
+                entrada is None
+                or agora - entrada.sincronizado_em >= intervalo
+                or entrada.pendentes >= lote
+                or entrada.base + entrada.pendentes + 1 > limite
+            ):
+                return None
+            entrada.pendentes += 1
+            self._entradas.move_to_end(chave)
+            return entrada.base + entrada.pendentes
+
+    def retirar_pendentes(self, chave):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return 0
+            pendentes, entrada.pendentes = entrada.pendentes, 0
+            return pendentes
+
+    def sincronizar(self, chave, base, agora):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self._entradas[chave] = _EntradaLocal(base, agora)
+                if len(self._entradas) > self.max_chaves:
+                    self._entradas.popitem(last=False)
+            else:
+                entrada.base = base
+                entrada.sincronizado_em = agora
+                self._entradas.move_to_end(chave)
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+
+pre_filtro = PreFiltroLocal()
+
+
+class MetricasThrottle:
+    """
+    Contadores das verificações de throttle no worker.
+
+    Por escopo: requisições permitidas e negadas e o tempo gasto nas
+    verificações. Por chave: requisições vistas e o último uso estimado do
+    limite (0 a 1+). As chaves são limitadas a ``max_chaves``; ao estourar,
+    mantém-se a metade mais ativa.
+    """
+
+    def __init__(self, max_chaves=1000):
+        self.max_chaves = max_chaves
+        self._lock = threading.Lock()
+        self.limpar()
+
+    def limpar(self):
+        with self._lock:
+            self._escopos = {}
+            self._chaves = {}
+            self.desde = time.time()
+
+    def registrar(self, escopo, chave, permitida, duracao, uso):
+        with self._lock:
+            dados = self._escopos.get(escopo)
+            if dados is None:
+                dados = self._escopos[escopo] = {
+                    "permitidas": 0,
+                    "negadas": 0,
+                    "tempo_total": 0.0,
+                    "tempo_max": 0.0,
+                }
+            dados["permitidas" if permitida else "negadas"] += 1
+            dados["tempo_total"] += duracao
+            dados["tempo_max"] = max(dados["tempo_max"], duracao)
+
+            entrada = self._chaves.get(chave)
+            if entrada is None:
+                if len(self._chaves) >= self.max_chaves:
+                    self._descartar_menos_ativas()
+                entrada = self._chaves[chave] = [escopo, 0, 0.0]
+            entrada[1] += 1
+            entrada[2] = uso
+
+    def _descartar_menos_ativas(self):
+        mantidas = heapq.nlargest(
+            self.max_chaves // 2, self._chaves.items(), key=lambda item: item[1][1]
+        )
+        self._chaves = dict(mantidas)
+
+    def instantaneo(self, top=10):
+        with self._lock:
+            escopos = {}
+            for escopo, dados in sorted(self._escopos.items()):
+                total = dados["permitidas"] + dados["negadas"]
+                escopos[escopo] = {
+                    "permitidas": dados["permitidas"],
+                    "negadas": dados["negadas"],
+                    "taxa_negacao": round(dados["negadas"] / total, 4),
+                    "tempo_medio_us": round(dados["tempo_total"] / total * 1e6, 1),
+                    "tempo_max_us": round(dados["tempo_max"] * 1e6, 1),
+                }
+            mais_ativas = heapq.nlargest(
+                top, self._chaves.items(), key=lambda item: (item[1][2], item[1][1])
+            )
+            return {
+                "pid": os.getpid(),
+                "desde": self.desde,
+                "escopos": escopos,
+                "chaves_mais_ativas": [
+                    {
+                        "chave": chave,
+                        "escopo": escopo,
+                        "requisicoes": requisicoes,
+                        "uso_do_limite": round(uso, 3),
+                    }
+                    for chave, (escopo, requisicoes, uso) in mais_ativas
+                ],
+            }
+
+
+metricas = MetricasThrottle()
+
+
+class SlidingWindowThrottleMixin:
+    """
+    Substitui o algoritmo de ``SimpleRateThrottle`` mantendo escopos, taxas
+    (``DEFAULT_THROTTLE_RATES``) e chaves de cache.
+    """
+
+    pre_filtro_local = False
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        inicio = time.perf_counter()
+        permitida = self._decidir()
+        metricas.registrar(
+            self.scope,
+            self.key,
+            permitida,
+            time.perf_counter() - inicio,
+            self.estimativa / self.num_requests if self.num_requests else 1.0,
+        )
+        return permitida
+
+    def _decidir(self):
+        self.now = self.timer()
+        self.espera = 0.0
+        lote = self.tamanho_lote_local()
+        if lote < 2:
+            return self._permitir_compartilhado()
+
+        configuracao = settings.THROTTLE_PRE_FILTRO
+        estimativa = pre_filtro.admitir(
+            self.key, self.now, self.num_requests, lote, configuracao["INTERVALO"]
+        )
+        if estimativa is not None:
+            self.estimativa = estimativa
+            return True
+        pendentes = pre_filtro.retirar_pendentes(self.key)
+        permitida = self._permitir_compartilhado(pendentes)
+        pre_filtro.sincronizar(self.key, self.estimativa, self.now)
+        return permitida
+
+    def tamanho_lote_local(self):
+        if not self.pre_filtro_local:
+            return 0
+        return int(self.num_requests * settings.THROTTLE_PRE_FILTRO["MAX_EXCESSO"])
+
+    def _permitir_compartilhado(self, pendentes=0):
+        cliente = obter_redis()
+        if cliente is not None:
+            try:
+                return self._permitir_redis(cliente, pendentes)
+            except redis.RedisError:
+                logger.warning(
+                    "Redis indisponível para throttling; usando o cache local.",
+                    exc_info=True,
+                )
+        return self._permitir_cache(pendentes)
+
+    def _permitir_redis(self, cliente, pendentes=0):
+        permitida, espera_ms, self.estimativa = _script_janela(cliente)(
+            keys=[self.key], args=[self.duration, self.num_requests, pendentes]
+        )
+        self.espera = espera_ms / 1000
+        return bool(permitida)
+
+    def _permitir_cache(self, pendentes=0):
+        permitida, estado, self.espera = avaliar_janela(
+            self.cache.get(self.key),
+            self.now,
+            self.duration,
+            self.num_requests,
+            pendentes,
+        )
+        if permitida or pendentes:
+            # Expira quando deixa de influenciar a janela seguinte.
+            self.cache.set(self.key, estado, 2 * self.duration)
+        self.estimativa = estimar(estado, self.now, self.duration)
+        return permitida
+
+    def wait(self):
+        return self.espera
+
+
+class AnonSlidingWindowThrottle(SlidingWindowThrottleMixin, AnonRateThrottle):
+    pass
+
+
+class UserSlidingWindowThrottle(SlidingWindowThrottleMixin, UserRateThrottle):
+    pass
+
 
-class ListingRateThrottle(AnonRateThrottle):
+class ListingRateThrottle(AnonSlidingWindowThrottle):
     scope = "listing"
+    pre_filtro_local = True
 
 
-class LoginRateThrottle(AnonRateThrottle):
+class LoginRateThrottle(AnonSlidingWindowThrottle):
     scope = "login"
 
 
-class RegistrationRateThrottle(AnonRateThrottle):
+class RegistrationRateThrottle(AnonSlidingWindowThrottle):
     scope = "registration"
 
 
-class ConsultaCreateRateThrottle(UserRateThrottle):
+class ConsultaCreateRateThrottle(UserSlidingWindowThrottle):
     scope = "consulta_create"
 
 
-class ProfissionalCreateRateThrottle(UserRateThrottle):
+class ProfissionalCreateRateThrottle(UserSlidingWindowThrottle):
     scope = "profissional_create"
 
 
-class SensitiveDataRateThrottle(UserRateThrottle):
+class SensitiveDataRateThrottle(UserSlidingWindowThrottle):
     scope = "sensitive_data"
@@ -25,7 +25,14 @@ from django.contrib import admin
 from django.urls import include, path, re_path
 
 from . import health
-from .debug_views import CacheTestView, HealthCheckView
+from .debug_views import (
+    CacheCamadasMetricsView,
+    CacheTestView,
+    HashingMetricsView,
+    HealthCheckView,
+    ProfissionaisCacheStatsView,
+    ThrottleMetricsView,
+)
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -41,6 +48,12 @@ schema_view = get_schema_view(
     authentication_classes=[],
 )
 
+# No modo ASGI, os health checks usam as versões assíncronas
+if settings.ASGI_MODE:
+    health_check, readiness_check = health.ahealth_check, health.areadiness_check
+else:
+    health_check, readiness_check = health.health_check, health.readiness_check
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     re_path(
@@ -51,10 +64,22 @@ urlpatterns = [
     re_path(
         r"^redoc/$", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"
     ),
-    path("health/", health.health_check, name="health-check"),
-    path("ready/", health.readiness_check, name="readiness-check"),
+    path("health/", health_check, name="health-check"),
+    path("ready/", readiness_check, name="readiness-check"),
     path("debug/health/", HealthCheckView.as_view(), name="debug-health"),
     path("debug/cache/", CacheTestView.as_view(), name="debug-cache"),
+    path(
+        "debug/cache/profissionais/",
+        ProfissionaisCacheStatsView.as_view(),
+        name="debug-cache-profissionais",
+    ),
+    path(
+        "debug/cache/camadas/",
+        CacheCamadasMetricsView.as_view(),
+        name="debug-cache-camadas",
+    ),
+    path("debug/throttling/", ThrottleMetricsView.as_view(), name="debug-throttling"),
+    path("debug/hashing/", HashingMetricsView.as_view(), name="debug-hashing"),
     path("api/auth/", include("authentication.urls")),
     path("api/", include("profissionais.urls")),
     path("api/", include("consultas.urls")),
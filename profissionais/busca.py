@@ -0,0 +1,60 @@
+"""
+Busca textual de profissionais por nome, nome social e especialidade.
+
+Os três campos são mantidos, já normalizados (minúsculas e sem acentos), na
+coluna ``busca``, atualizada a cada gravação. A normalização é feita em
+Python, então a comparação ignora acentos em qualquer banco, e o índice não
+depende de ``unaccent`` (que não é ``IMMUTABLE`` no PostgreSQL).
+
+No PostgreSQL a coluna tem um índice GIN ``gin_trgm_ops`` (``pg_trgm``), que
+atende tanto o ``LIKE '%termo%'`` de cada palavra quanto a semelhança por
+trigramas (``%>``) usada para tolerar erros de digitação; o resultado é
+ordenado por ``word_similarity``. Nos demais bancos, todas as palavras
+precisam aparecer e os nomes que começam pelo termo vêm primeiro.
+"""
+
+import unicodedata
+
+from django.db import connection
+from django.db.models import Case, FloatField, Q, Value, When
+
+TAMANHO_MAXIMO_TERMO = 100
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos e com espaços simples."""
+    decomposto = unicodedata.normalize("NFKD", texto or "")
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.casefold().split())
+
+
+def texto_busca(nome, nome_social, especialidade):
+    return normalizar(" ".join(filter(None, [nome, nome_social, especialidade])))
+
+
+def buscar(queryset, termo):
+    """Filtra ``queryset`` pelo termo e o ordena por relevância."""
+    termo = normalizar(termo)[:TAMANHO_MAXIMO_TERMO]
+    palavras = termo.split()
+    if not palavras:
+        return queryset.none()
+
+    todas_as_palavras = Q()
+    for palavra in palavras:
+        todas_as_palavras &= Q(busca__contains=palavra)
+
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        queryset = queryset.filter(
+            todas_as_palavras | Q(busca__trigram_word_similar=termo)
+        ).annotate(relevancia=TrigramWordSimilarity(termo, "busca"))
+    else:
+        queryset = queryset.filter(todas_as_palavras).annotate(
+            relevancia=Case(
+                When(busca__startswith=termo, then=Value(1.0)),
+                default=Value(0.5),
+                output_field=FloatField(),
+            )
+        )
+    return queryset.order_by("-relevancia", "nome", "id")
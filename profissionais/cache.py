@@ -0,0 +1,90 @@
+"""
+Cache versionado da listagem pública de profissionais.
+
+Cada combinação de parâmetros da query string tem sua própria entrada, sempre
+prefixada pela versão atual da listagem. Qualquer escrita em ``Profissional``
+troca a versão (ver ``signals.py``), tornando todas as entradas anteriores
+inalcançáveis sem precisar apagá-las uma a uma.
+
+O cache só é usado com um backend compartilhado entre os workers
+(``tokens.cache_compartilhado``): em um cache por processo, a troca de versão
+feita pelo worker que recebeu a escrita não chega aos demais, que seguiriam
+servindo a listagem antiga até o timeout.
+"""
+
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+from authentication import tokens
+
+CHAVE_VERSAO = "profissionais:lista:versao"
+CHAVE_ACERTOS = "profissionais:lista:acertos"
+CHAVE_FALHAS = "profissionais:lista:falhas"
+
+
+def cache_listagem_ativo():
+    return (
+        settings.PROFISSIONAIS_LIST_CACHE_TIMEOUT > 0 and tokens.cache_compartilhado()
+    )
+
+
+def _versao_atual():
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        # Versão nova e única: nunca reaproveita entradas de uma versão antiga
+        # caso a chave de versão tenha sido descartada pelo cache.
+        cache.add(CHAVE_VERSAO, time.time_ns(), timeout=None)
+        versao = cache.get(CHAVE_VERSAO)
+    return versao
+
+
+def chave_listagem(query_params):
+    """
+    Monta a chave da listagem para os parâmetros informados.
+
+    A chave deve ser calculada antes da consulta ao banco e reutilizada ao
+    salvar, para que uma escrita concorrente não grave dados antigos sob a
+    versão nova.
+    """
+    parametros = urlencode(sorted(query_params.lists()), doseq=True)
+    resumo = hashlib.sha256(parametros.encode()).hexdigest()[:32]
+    return f"profissionais:lista:dados:{_versao_atual()}:{resumo}"
+
+
+def _incrementar(chave):
+    try:
+        cache.incr(chave)
+    except ValueError:
+        if not cache.add(chave, 1, timeout=None):
+            cache.incr(chave)
+
+
+def obter_listagem(chave):
+    dados = cache.get(chave)
+    _incrementar(CHAVE_ACERTOS if dados is not None else CHAVE_FALHAS)
+    return dados
+
+
+def salvar_listagem(chave, dados):
+    cache.set(chave, dados, timeout=settings.PROFISSIONAIS_LIST_CACHE_TIMEOUT)
+
+
+def invalidar_listagem():
+    cache.set(CHAVE_VERSAO, time.time_ns(), timeout=None)
+
+
+def estatisticas_listagem():
+    acertos = cache.get(CHAVE_ACERTOS, 0)
+    falhas = cache.get(CHAVE_FALHAS, 0)
+    total = acertos + falhas
+    return {
+        "ativo": cache_listagem_ativo(),
+        "timeout": settings.PROFISSIONAIS_LIST_CACHE_TIMEOUT,
+        "acertos": acertos,
+        "falhas": falhas,
+        "taxa_acerto": round(acertos / total, 4) if total else None,
+    }
@@ -0,0 +1,160 @@
+"""
+Cálculo de horários livres de profissionais.
+
+O cálculo trabalha com intervalos, nunca minuto a minuto: o expediente de
+cada dia vira uma lista de intervalos, as consultas marcadas são buscadas em
+uma única varredura do índice ``(profissional, data_hora)`` e mescladas, e os
+intervalos livres resultantes são fatiados em horários pela aritmética da
+duração do slot. O custo é proporcional a dias + consultas + horários
+devolvidos.
+"""
+
+from datetime import datetime, time, timedelta
+from itertools import groupby
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+
+from consultas.models import Consulta
+
+
+def _configuracao():
+    return settings.DISPONIBILIDADE
+
+
+def fuso_expediente():
+    return ZoneInfo(_configuracao()["TIMEZONE"])
+
+
+def duracao_padrao():
+    return timedelta(minutes=_configuracao()["DURACAO_PADRAO_MINUTOS"])
+
+
+def duracao_consulta():
+    return timedelta(minutes=_configuracao()["DURACAO_CONSULTA_MINUTOS"])
+
+
+def intervalos_expediente(inicio, fim, expediente=None, fuso=None):
+    """
+    Intervalos de trabalho entre ``inicio`` e ``fim``.
+
+    ``expediente`` mapeia o dia da semana (0 = segunda-feira) para uma lista de
+    pares ``("HH:MM", "HH:MM")`` no fuso ``fuso``.
+    """
+    expediente = _configuracao()["EXPEDIENTE"] if expediente is None else expediente
+    fuso = fuso or fuso_expediente()
+
+    intervalos = []
+    dia = inicio.astimezone(fuso).date()
+    ultimo_dia = fim.astimezone(fuso).date()
+    while dia <= ultimo_dia:
+        for abertura, fechamento in expediente.get(dia.weekday(), []):
+            janela_inicio = datetime.combine(
+                dia, time.fromisoformat(abertura), tzinfo=fuso
+            )
+            janela_fim = datetime.combine(
+                dia, time.fromisoformat(fechamento), tzinfo=fuso
+            )
+            if janela_fim > inicio and janela_inicio < fim:
+                intervalos.append((janela_inicio, janela_fim))
+        dia += timedelta(days=1)
+    return intervalos
+
+
+def mesclar_ocupados(inicios, duracao):
+    """Converte inícios de consultas (ordenados) em intervalos ocupados mesclados."""
+    mesclados = []
+    for inicio in inicios:
+        fim = inicio + duracao
+        if mesclados and inicio <= mesclados[-1][1]:
+            if fim > mesclados[-1][1]:
+                mesclados[-1] = (mesclados[-1][0], fim)
+        else:
+            mesclados.append((inicio, fim))
+    return mesclados
+
+
+def horarios_livres(janelas, ocupados, duracao, inicio, fim):
+    """
+    Fatia as ``janelas`` de expediente em horários de ``duracao`` que não
+    colidem com os intervalos ``ocupados``.
+
+    Os horários ficam alinhados ao início de cada janela (08:00, 08:30, ...) e
+    dentro de ``[inicio, fim)``. ``janelas`` e ``ocupados`` devem estar
+    ordenados; a varredura é feita com dois ponteiros.
+    """
+    livres = []
+    indice = 0
+    for janela_inicio, janela_fim in janelas:
+        cursor = janela_inicio
+        limite = min(janela_fim, fim)
+        # Consultas que terminam antes da janela não interessam mais; as que
+        # atravessam o fim da janela continuam valendo para a próxima.
+        while indice < len(ocupados) and ocupados[indice][1] <= janela_inicio:
+            indice += 1
+        proximo = indice
+        while cursor < limite:
+            if proximo < len(ocupados) and ocupados[proximo][0] < limite:
+                livre_fim = ocupados[proximo][0]
+            else:
+                livre_fim = limite
+            livres.extend(
+                _fatiar(janela_inicio, max(cursor, inicio), livre_fim, duracao)
+            )
+            if livre_fim >= limite:
+                break
+            cursor = ocupados[proximo][1]
+            proximo += 1
+    return livres
+
+
+def _fatiar(origem, livre_inicio, livre_fim, duracao):
+    # Primeiro horário alinhado à grade da janela a partir de livre_inicio.
+    passos = -(-(livre_inicio - origem) // duracao)
+    primeiro = origem + passos * duracao
+    quantidade = (livre_fim - primeiro) // duracao
+    return [
+        (primeiro + i * duracao, primeiro + (i + 1) * duracao)
+        for i in range(max(quantidade, 0))
+    ]
+
+
+def consultas_por_profissional(profissional_ids, inicio, fim):
+    """
+    Inícios das consultas de cada profissional que podem ocupar ``[inicio, fim)``,
+    em uma única query ordenada pelo índice ``(profissional, data_hora)``.
+    """
+    linhas = (
+        Consulta.objects.filter(
+            profissional_id__in=profissional_ids,
+            data_hora__gt=inicio - duracao_consulta(),
+            data_hora__lt=fim,
+        )
+        .order_by("profissional_id", "data_hora")
+        .values_list("profissional_id", "data_hora")
+    )
+    agrupadas = {profissional_id: [] for profissional_id in profissional_ids}
+    for profissional_id, grupo in groupby(linhas, key=lambda linha: linha[0]):
+        agrupadas[profissional_id] = [data_hora for _, data_hora in grupo]
+    return agrupadas
+
+
+def calcular_disponibilidade(profissional_ids, inicio, fim, duracao=None):
+    """
+    Horários livres de cada profissional entre ``inicio`` e ``fim``.
+
+    Retorna um dicionário ``{profissional_id: [(inicio, fim), ...]}``.
+    """
+    duracao = duracao or duracao_padrao()
+    janelas = intervalos_expediente(inicio, fim)
+    ocupacao = consultas_por_profissional(profissional_ids, inicio, fim)
+    return {
+        profissional_id: horarios_livres(
+            janelas,
+            mesclar_ocupados(inicios, duracao_consulta()),
+            duracao,
+            inicio,
+            fim,
+        )
+        for profissional_id, inicios in ocupacao.items()
+    }
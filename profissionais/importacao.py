@@ -0,0 +1,224 @@
+"""
+Importação em massa de profissionais a partir de CSV ou NDJSON.
+
+Os registros são processados em lotes: cada linha passa pelas mesmas regras
+de campo do ``ProfissionalSerializer`` (com uma única instância de
+serializer reaproveitada), os emails são deduplicados em memória e contra o
+banco com uma query por lote, e as linhas válidas são carregadas de uma vez.
+No PostgreSQL a carga usa ``COPY`` para uma tabela temporária seguida de um
+``INSERT ... SELECT ... ON CONFLICT DO NOTHING``; nos demais bancos, um
+``bulk_create``.
+"""
+
+import csv
+import io
+import json
+import time
+from itertools import islice
+
+from rest_framework.exceptions import ValidationError
+
+from django.db import connection, transaction
+
+from .busca import texto_busca
+from .cache import invalidar_listagem
+from .models import Profissional
+from .serializers import ProfissionalImportacaoSerializer
+
+CAMPOS = ["nome", "nome_social", "especialidade", "email", "telefone"]
+# Colunas gravadas: os campos do arquivo mais a coluna de busca normalizada.
+COLUNAS = CAMPOS + ["busca"]
+
+
+class LinhaInvalida:
+    """Linha que não pôde ser lida como registro (JSON malformado no NDJSON)."""
+
+    def __init__(self, conteudo, erros):
+        self.conteudo = conteudo
+        self.erros = erros
+
+
+def ler_registros(arquivo, formato):
+    """
+    Gera dicionários a partir de um arquivo texto CSV (com cabeçalho) ou NDJSON.
+
+    Uma linha NDJSON malformada vira uma ``LinhaInvalida``, rejeitada pelo
+    importador como as demais, sem interromper a importação.
+    """
+    if formato == "csv":
+        for registro in csv.DictReader(arquivo):
+            yield {
+                campo: valor
+                for campo, valor in registro.items()
+                if campo in CAMPOS and valor != ""
+            }
+    elif formato == "ndjson":
+        for linha in arquivo:
+            linha = linha.strip()
+            if not linha:
+                continue
+            try:
+                yield json.loads(linha)
+            except json.JSONDecodeError as exc:
+                yield LinhaInvalida(
+                    linha,
+                    {
+                        "non_field_errors": [
+                            f"JSON inválido: {exc.msg} (coluna {exc.colno})."
+                        ]
+                    },
+                )
+    else:
+        raise ValueError(f"Formato não suportado: {formato}")
+
+
+def em_lotes(registros, tamanho):
+    iterador = iter(registros)
+    while lote := list(islice(iterador, tamanho)):
+        yield lote
+
+
+class ResultadoImportacao:
+    def __init__(self):
+        self.lidos = 0
+        self.inseridos = 0
+        self.invalidos = 0
+        self.duplicados = 0
+        self.inicio = time.perf_counter()
+
+    @property
+    def duracao(self):
+        return time.perf_counter() - self.inicio
+
+    @property
+    def linhas_por_segundo(self):
+        return self.lidos / self.duracao if self.duracao else 0.0
+
+
+class ImportadorProfissionais:
+    def __init__(self, tamanho_lote=5000, ao_rejeitar=None, ao_concluir_lote=None):
+        self.tamanho_lote = tamanho_lote
+        self.ao_rejeitar = ao_rejeitar
+        self.ao_concluir_lote = ao_concluir_lote
+        self.validador = ProfissionalImportacaoSerializer()
+        self.emails_vistos = set()
+        self.resultado = ResultadoImportacao()
+
+    def importar(self, registros):
+        try:
+            for numero, lote in enumerate(em_lotes(registros, self.tamanho_lote), 1):
+                self.processar_lote(lote)
+                if self.ao_concluir_lote:
+                    self.ao_concluir_lote(numero, self.resultado)
+        finally:
+            # A carga em massa não dispara post_save.
+            if self.resultado.inseridos:
+                invalidar_listagem()
+        return self.resultado
+
+    def processar_lote(self, lote):
+        validos = []
+        for registro in lote:
+            self.resultado.lidos += 1
+            linha = self.resultado.lidos
+            if isinstance(registro, LinhaInvalida):
+                self.resultado.invalidos += 1
+                self._rejeitar(linha, registro.conteudo, registro.erros)
+                continue
+            try:
+                dados = self.validador.run_validation(registro)
+            except ValidationError as exc:
+                self.resultado.invalidos += 1
+                self._rejeitar(linha, registro, exc.detail)
+                continue
+            if dados["email"] in self.emails_vistos:
+                self.resultado.duplicados += 1
+                self._rejeitar(
+                    linha, registro, {"email": ["Email repetido no arquivo."]}
+                )
+                continue
+            self.emails_vistos.add(dados["email"])
+            validos.append((linha, dados))
+
+        existentes = set(
+            Profissional.objects.filter(
+                email__in=[dados["email"] for _, dados in validos]
+            )
+            .order_by()
+            .values_list("email", flat=True)
+        )
+        novos = []
+        for linha, dados in validos:
+            if dados["email"] in existentes:
+                self.resultado.duplicados += 1
+                self._rejeitar(linha, dados, {"email": ["Email já cadastrado."]})
+            else:
+                novos.append(dados)
+
+        if novos:
+            self.resultado.inseridos += carregar(novos)
+
+    def _rejeitar(self, linha, registro, erros):
+        if self.ao_rejeitar:
+            self.ao_rejeitar(linha, registro, erros)
+
+
+def carregar(linhas):
+    """Insere as linhas já validadas e retorna quantas foram inseridas."""
+    # bulk_create e COPY não passam por Profissional.save().
+    for linha in linhas:
+        linha["busca"] = texto_busca(
+            linha.get("nome"), linha.get("nome_social"), linha.get("especialidade")
+        )
+    if connection.vendor == "postgresql":
+        return _carregar_com_copy(linhas)
+    # ignore_conflicts descarta em silêncio os emails gravados por uma escrita
+    # concorrente: conta as linhas do lote antes e depois, na mesma transação.
+    do_lote = Profissional.objects.filter(
+        email__in=[linha["email"] for linha in linhas]
+    )
+    with transaction.atomic():
+        antes = do_lote.count()
+        Profissional.objects.bulk_create(
+            [
+                Profissional(**{campo: linha.get(campo) for campo in COLUNAS})
+                for linha in linhas
+            ],
+            ignore_conflicts=True,
+        )
+        return do_lote.count() - antes
+
+
+def _carregar_com_copy(linhas):
+    tabela = connection.ops.quote_name(Profissional._meta.db_table)
+    colunas = ", ".join(COLUNAS)
+
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for linha in linhas:
+        # Campo ausente vira NULL (coluna vazia sem aspas no CSV do COPY).
+        escritor.writerow([linha.get(campo) for campo in COLUNAS])
+    buffer.seek(0)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS profissionais_importacao "
+            "(nome text, nome_social text, especialidade text, email text, "
+            "telefone text, busca text) ON COMMIT DROP"
+        )
+        cursor.execute("TRUNCATE profissionais_importacao")
+        comando_copy = (
+            f"COPY profissionais_importacao ({colunas}) FROM STDIN WITH (FORMAT csv)"
+        )
+        bruto = cursor.cursor
+        if hasattr(bruto, "copy_expert"):
+            bruto.copy_expert(comando_copy, buffer)
+        else:
+            with bruto.copy(comando_copy) as copy:
+                copy.write(buffer.getvalue())
+        cursor.execute(
+            f"INSERT INTO {tabela} ({colunas}, criado_em, atualizado_em, ativo) "
+            f"SELECT {colunas}, now(), now(), true FROM profissionais_importacao "
+            "ON CONFLICT (email) DO NOTHING"
+        )
+        return cursor.rowcount
@@ -0,0 +1,93 @@
+import json
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from profissionais.importacao import ImportadorProfissionais, ler_registros
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa profissionais em massa de um arquivo CSV (com cabeçalho) ou NDJSON, "
+        "com as mesmas validações da API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("arquivo", help="Caminho do arquivo ou '-' para stdin")
+        parser.add_argument(
+            "--formato",
+            choices=["csv", "ndjson"],
+            help="Formato do arquivo (padrão: deduzido pela extensão)",
+        )
+        parser.add_argument("--tamanho-lote", type=int, default=5000)
+        parser.add_argument(
+            "--relatorio-erros",
+            help="Grava as linhas rejeitadas, com os erros, em NDJSON neste caminho",
+        )
+
+    def handle(self, *args, **options):
+        formato = options["formato"] or self._deduzir_formato(options["arquivo"])
+        if options["tamanho_lote"] < 1:
+            raise CommandError("--tamanho-lote deve ser positivo.")
+
+        relatorio = None
+        if options["relatorio_erros"]:
+            relatorio = open(options["relatorio_erros"], "w", encoding="utf-8")
+
+        def ao_rejeitar(linha, registro, erros):
+            if relatorio:
+                relatorio.write(
+                    json.dumps(
+                        {"linha": linha, "registro": registro, "erros": erros},
+                        ensure_ascii=False,
+                        default=str,
+                    )
+                    + "\n"
+                )
+
+        def ao_concluir_lote(numero, resultado):
+            self.stdout.write(
+                f"Lote {numero}: {resultado.lidos} lidos, "
+                f"{resultado.inseridos} inseridos, {resultado.invalidos} inválidos, "
+                f"{resultado.duplicados} duplicados "
+                f"({resultado.linhas_por_segundo:.0f} linhas/s)"
+            )
+
+        importador = ImportadorProfissionais(
+            tamanho_lote=options["tamanho_lote"],
+            ao_rejeitar=ao_rejeitar,
+            ao_concluir_lote=ao_concluir_lote,
+        )
+        arquivo = self._abrir(options["arquivo"])
+        try:
+            resultado = importador.importar(ler_registros(arquivo, formato))
+        finally:
+            if arquivo is not sys.stdin:
+                arquivo.close()
+            if relatorio:
+                relatorio.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Importação concluída em {resultado.duracao:.1f}s: "
+                f"{resultado.inseridos} inseridos de {resultado.lidos} lidos "
+                f"({resultado.linhas_por_segundo:.0f} linhas/s)."
+            )
+        )
+
+    def _deduzir_formato(self, caminho):
+        extensao = Path(caminho).suffix.lower()
+        if extensao == ".csv":
+            return "csv"
+        if extensao in (".ndjson", ".jsonl"):
+            return "ndjson"
+        raise CommandError("Não foi possível deduzir o formato; use --formato.")
+
+    def _abrir(self, caminho):
+        if caminho == "-":
+            return sys.stdin
+        try:
+            return open(caminho, encoding="utf-8", newline="")
+        except OSError as exc:
+            raise CommandError(f"Não foi possível abrir {caminho}: {exc}") from exc
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.5 on 2026-10-17 11:57
+
+from django.db import migrations, models
+
+from profissionais.busca import texto_busca
+
+INDICE_TRIGRAMA = "profissionais_busca_trgm"
+
+
+def preencher_busca(apps, schema_editor):
+    Profissional = apps.get_model("profissionais", "Profissional")
+    lote = []
+    for profissional in Profissional.objects.only(
+        "nome", "nome_social", "especialidade"
+    ).iterator(chunk_size=2000):
+        profissional.busca = texto_busca(
+            profissional.nome, profissional.nome_social, profissional.especialidade
+        )
+        lote.append(profissional)
+        if len(lote) >= 2000:
+            Profissional.objects.bulk_update(lote, ["busca"])
+            lote = []
+    if lote:
+        Profissional.objects.bulk_update(lote, ["busca"])
+
+
+def criar_indice_trigrama(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    tabela = apps.get_model("profissionais", "Profissional")._meta.db_table
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDICE_TRIGRAMA} "
+        f"ON {schema_editor.quote_name(tabela)} USING gin (busca gin_trgm_ops)"
+    )
+
+
+def remover_indice_trigrama(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDICE_TRIGRAMA}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "profissionais",
+            "0003_alter_profissional_options_profissional_ativo_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profissional",
+            name="busca",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(preencher_busca, migrations.RunPython.noop),
+        migrations.RunPython(criar_indice_trigrama, remover_indice_trigrama),
+    ]
@@ -1,6 +1,8 @@
 from django.core.validators import RegexValidator
 from django.db import models
 
+from .busca import texto_busca
+
 
 class Profissional(models.Model):
     nome = models.CharField(max_length=100, db_index=True)
@@ -20,6 +22,9 @@ class Profissional(models.Model):
     atualizado_em = models.DateTimeField(auto_now=True)
     ativo = models.BooleanField(default=True)  # Soft delete
 
+    # nome, nome_social e especialidade normalizados para a busca (?q=)
+    busca = models.TextField(blank=True, default="", editable=False)
+
     class Meta:
         ordering = ["nome"]
         verbose_name = "Profissional"
@@ -30,6 +35,15 @@ class Profissional(models.Model):
             models.Index(fields=["email"]),
         ]
 
+    CAMPOS_BUSCA = ("nome", "nome_social", "especialidade")
+
+    def save(self, *args, **kwargs):
+        self.busca = texto_busca(self.nome, self.nome_social, self.especialidade)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and set(update_fields) & set(self.CAMPOS_BUSCA):
+            kwargs["update_fields"] = {*update_fields, "busca"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.nome_exibicao
 
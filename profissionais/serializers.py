@@ -1,8 +1,12 @@
 import re
+from datetime import timedelta
 
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
+from django.conf import settings
+from django.utils import timezone
+
 from .models import Profissional
 
 
@@ -58,6 +62,15 @@ class ProfissionalSerializer(serializers.ModelSerializer):
         return value
 
 
+class ProfissionalImportacaoSerializer(ProfissionalSerializer):
+    """
+    Mesmas regras do ``ProfissionalSerializer``, sem a consulta de unicidade
+    do email por linha: a importação deduplica os emails do lote de uma vez.
+    """
+
+    email = serializers.EmailField()
+
+
 class ProfissionalListSerializer(serializers.ModelSerializer):
     nome_exibicao = serializers.SerializerMethodField()
 
@@ -86,3 +99,51 @@ class ProfissionalDetalheSerializer(serializers.ModelSerializer):
 
     def get_nome_exibicao(self, obj):
         return obj.nome_social if obj.nome_social else obj.nome
+
+
+class DisponibilidadeParametrosSerializer(serializers.Serializer):
+    inicio = serializers.DateTimeField(required=False)
+    fim = serializers.DateTimeField(required=False)
+    duracao = serializers.IntegerField(required=False)
+
+    def validate_duracao(self, value):
+        config = settings.DISPONIBILIDADE
+        minimo = config["DURACAO_MINIMA_MINUTOS"]
+        maximo = config["DURACAO_MAXIMA_MINUTOS"]
+        if not minimo <= value <= maximo:
+            raise serializers.ValidationError(
+                f"A duração deve estar entre {minimo} e {maximo} minutos."
+            )
+        return value
+
+    def validate(self, attrs):
+        config = settings.DISPONIBILIDADE
+        agora = timezone.now()
+        # Horários no passado nunca estão disponíveis para agendamento.
+        inicio = max(attrs.get("inicio") or agora, agora)
+        fim = attrs.get("fim") or inicio + timedelta(days=7)
+        if fim <= inicio:
+            raise serializers.ValidationError(
+                "A data final deve ser posterior à data inicial."
+            )
+        if fim - inicio > timedelta(days=config["MAX_DIAS"]):
+            raise serializers.ValidationError(
+                f"O intervalo consultado não pode passar de {config['MAX_DIAS']} dias."
+            )
+        attrs["inicio"] = inicio
+        attrs["fim"] = fim
+        attrs["duracao"] = attrs.get("duracao") or config["DURACAO_PADRAO_MINUTOS"]
+        return attrs
+
+
+class HorarioLivreSerializer(serializers.Serializer):
+    inicio = serializers.DateTimeField()
+    fim = serializers.DateTimeField()
+
+
+class DisponibilidadeSerializer(serializers.Serializer):
+    profissional_id = serializers.IntegerField()
+    inicio = serializers.DateTimeField()
+    fim = serializers.DateTimeField()
+    duracao = serializers.IntegerField()
+    horarios = HorarioLivreSerializer(many=True)
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidar_listagem
+from .models import Profissional
+
+
+@receiver(post_save, sender=Profissional)
+@receiver(post_delete, sender=Profissional)
+def invalidar_cache_listagem(sender, **kwargs):
+    invalidar_listagem()
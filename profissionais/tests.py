@@ -1,13 +1,37 @@
 # tests.py para o app profissionais
 
+import json
+import tempfile
+from datetime import datetime, timedelta
+from datetime import timezone as dt_tz
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
 from authentication.test_mixins import AuthenticatedTestMixin
-
+from consultas.models import Consulta
+from core.test_mixins import QueryCountTestMixin
+
+from .busca import normalizar
+from .cache import estatisticas_listagem
+from .disponibilidade import (
+    calcular_disponibilidade,
+    horarios_livres,
+    intervalos_expediente,
+    mesclar_ocupados,
+)
+from .importacao import carregar
 from .models import Profissional
 
 
@@ -204,3 +228,553 @@ class ProfissionalAPITest(AuthenticatedTestMixin, APITestCase):
         response = self.client.post(self.list_url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("nome_social", response.data)
+
+
+@override_settings(PROFISSIONAIS_LIST_CACHE_TIMEOUT=300)
+class ProfissionalListCacheTest(AuthenticatedTestMixin, APITestCase):
+    """Testes para o cache versionado da listagem de profissionais"""
+
+    def setUp(self):
+        cache.clear()
+        # A listagem só é guardada em cache compartilhado (Redis).
+        compartilhado = patch(
+            "authentication.tokens.cache_compartilhado", return_value=True
+        )
+        compartilhado.start()
+        self.addCleanup(compartilhado.stop)
+        self.profissional = Profissional.objects.create(
+            nome="Maria Santos",
+            especialidade="Clínica Geral",
+            email="maria@teste.com",
+            telefone="(21)88888-8888",
+        )
+        self.list_url = reverse("profissional-list")
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_segunda_listagem_nao_consulta_banco(self):
+        response = self.client.get(self.list_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(len(response.data), 1)
+
+    def test_parametros_diferentes_usam_entradas_diferentes(self):
+        self.client.get(self.list_url)
+        response = self.client.get(self.list_url, {"especialidade": "x"})
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_escrita_invalida_cache(self):
+        self.client.get(self.list_url)
+
+        Profissional.objects.create(
+            nome="Ana Costa",
+            especialidade="Dermatologia",
+            email="ana@teste.com",
+            telefone="(31)77777-7777",
+        )
+        response = self.client.get(self.list_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.data), 2)
+
+        self.profissional.delete()
+        response = self.client.get(self.list_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.data), 1)
+
+    def test_atualizacao_via_api_invalida_cache(self):
+        self.client.get(self.list_url)
+        self.authenticate_user()
+        detail_url = reverse("profissional-detail", kwargs={"pk": self.profissional.pk})
+        self.client.patch(detail_url, {"especialidade": "Pediatria"}, format="json")
+
+        response = self.client.get(self.list_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data[0]["especialidade"], "Pediatria")
+
+    def test_estatisticas_de_acerto(self):
+        self.client.get(self.list_url)
+        self.client.get(self.list_url)
+        self.client.get(self.list_url)
+
+        estatisticas = estatisticas_listagem()
+        self.assertEqual(estatisticas["acertos"], 2)
+        self.assertEqual(estatisticas["falhas"], 1)
+
+        url = reverse("debug-cache-profissionais")
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.authenticate_user()
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        staff = self.create_test_user(username="staff", email="staff@teste.com")
+        staff.is_staff = True
+        staff.save()
+        self.authenticate_user(staff)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["acertos"], 2)
+
+
+@override_settings(
+    PROFISSIONAIS_LIST_CACHE_TIMEOUT=300,
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "teste-listagem-locmem",
+        }
+    },
+)
+class ProfissionalListCacheLocMemTest(APITestCase):
+    """Cache por processo: a listagem não é guardada entre requisições"""
+
+    def setUp(self):
+        cache.clear()
+        Profissional.objects.create(
+            nome="Maria Santos",
+            especialidade="Clínica Geral",
+            email="maria@teste.com",
+            telefone="(21)88888-8888",
+        )
+        self.list_url = reverse("profissional-list")
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_escrita_em_outro_worker_aparece_na_listagem(self):
+        self.client.get(self.list_url)
+        # update() não dispara post_save: como a invalidação feita por outro
+        # worker, que não chega ao cache deste processo.
+        Profissional.objects.update(especialidade="Pediatria")
+        response = self.client.get(self.list_url)
+        self.assertFalse(response.has_header("X-Cache"))
+        self.assertEqual(response.data[0]["especialidade"], "Pediatria")
+        self.assertFalse(estatisticas_listagem()["ativo"])
+
+
+class ProfissionalGetCondicionalTest(APITestCase):
+    """Testes para ETag / Last-Modified nos profissionais"""
+
+    def setUp(self):
+        cache.clear()
+        self.profissional = Profissional.objects.create(
+            nome="Maria Santos",
+            especialidade="Clínica Geral",
+            email="maria@teste.com",
+            telefone="(21)88888-8888",
+        )
+        self.list_url = reverse("profissional-list")
+        self.detail_url = reverse(
+            "profissional-detail", kwargs={"pk": self.profissional.pk}
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_listagem_nao_modificada(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detalhe_muda_etag_apos_atualizacao(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        self.profissional.especialidade = "Pediatria"
+        self.profissional.save()
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["especialidade"], "Pediatria")
+
+    @override_settings(PROFISSIONAIS_LIST_CACHE_TIMEOUT=300)
+    @patch("authentication.tokens.cache_compartilhado", return_value=True)
+    def test_listagem_em_cache_responde_304_sem_banco(self, _):
+        primeira = self.client.get(self.list_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.list_url, HTTP_IF_NONE_MATCH=primeira["ETag"]
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], primeira["ETag"])
+        self.assertEqual(response["Last-Modified"], primeira["Last-Modified"])
+
+
+class ProfissionalQueryCountTest(QueryCountTestMixin, APITestCase):
+    """Fixa o número de queries por endpoint para evitar regressões N+1"""
+
+    def setUp(self):
+        for i in range(5):
+            self.profissional = Profissional.objects.create(
+                nome=f"Prof {i}",
+                especialidade="Teste",
+                email=f"prof{i}@queries.com",
+                telefone="(11)11111-1111",
+            )
+
+    def test_listagem(self):
+        # validadores (ETag) + listagem
+        response = self.assertEndpointQueries(2, reverse("profissional-list"))
+        self.assertEqual(len(response.data), 5)
+
+    def test_detalhe(self):
+        url = reverse("profissional-detail", kwargs={"pk": self.profissional.pk})
+        self.assertEndpointQueries(1, url)
+
+
+class ProfissionalBuscaTest(QueryCountTestMixin, APITestCase):
+    """Testes para a busca ?q= de profissionais"""
+
+    def setUp(self):
+        self.jose = Profissional.objects.create(
+            nome="José da Conceição",
+            especialidade="Cardiologia",
+            email="jose@busca.com",
+            telefone="(11)11111-1111",
+        )
+        self.ana = Profissional.objects.create(
+            nome="Ana Souza",
+            nome_social="Aninha",
+            especialidade="Dermatologia",
+            email="ana@busca.com",
+            telefone="(11)11111-1111",
+        )
+        self.carlos = Profissional.objects.create(
+            nome="Carlos Joseph",
+            especialidade="Psicologia",
+            email="carlos@busca.com",
+            telefone="(11)11111-1111",
+        )
+        self.url = reverse("profissional-list")
+
+    def _ids(self, termo):
+        response = self.client.get(self.url, {"q": termo})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_normalizar(self):
+        self.assertEqual(normalizar("  JOSÉ  da   Conceição "), "jose da conceicao")
+        self.assertEqual(self.jose.busca, "jose da conceicao cardiologia")
+
+    def test_busca_ignora_acentos_e_caixa(self):
+        self.assertEqual(self._ids("CONCEICAO"), [self.jose.pk])
+        self.assertEqual(self._ids("dermatologia"), [self.ana.pk])
+
+    def test_busca_por_nome_social_e_varias_palavras(self):
+        self.assertEqual(self._ids("aninha"), [self.ana.pk])
+        self.assertEqual(self._ids("jose cardio"), [self.jose.pk])
+
+    def test_busca_ordenada_por_relevancia(self):
+        # "José..." começa pelo termo; "Carlos Joseph" apenas o contém
+        self.assertEqual(self._ids("jose"), [self.jose.pk, self.carlos.pk])
+
+    def test_busca_paginada(self):
+        response = self.client.get(self.url, {"q": "a", "page_size": 2})
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_sem_termo_mantem_listagem(self):
+        response = self.client.get(self.url, {"q": "  "})
+        self.assertEqual(len(response.data), 3)
+
+    def test_busca_atualizada_ao_salvar(self):
+        self.ana.especialidade = "Pediatria"
+        self.ana.save(update_fields=["especialidade"])
+        self.assertEqual(self._ids("pediatria"), [self.ana.pk])
+        self.assertEqual(self._ids("dermatologia"), [])
+
+    def test_busca_queries(self):
+        # COUNT + página
+        self.assertEndpointQueries(2, self.url, data={"q": "jose"})
+
+
+class DisponibilidadeMotorTest(TestCase):
+    """Testes para o cálculo de horários livres"""
+
+    def setUp(self):
+        self.fuso = ZoneInfo("UTC")
+        self.duracao = timedelta(minutes=30)
+        # Segunda-feira
+        self.dia = datetime(2030, 1, 7, tzinfo=self.fuso)
+
+    def _hora(self, horas, minutos=0, dias=0):
+        return self.dia + timedelta(days=dias, hours=horas, minutes=minutos)
+
+    def test_expediente_respeita_dias_da_semana(self):
+        expediente = {0: [("08:00", "12:00")], 2: [("14:00", "16:00")]}
+        janelas = intervalos_expediente(
+            self.dia, self._hora(0, dias=7), expediente, self.fuso
+        )
+        self.assertEqual(
+            janelas,
+            [
+                (self._hora(8), self._hora(12)),
+                (self._hora(14, dias=2), self._hora(16, dias=2)),
+            ],
+        )
+
+    def test_mesclar_ocupados(self):
+        inicios = [self._hora(8), self._hora(8, 15), self._hora(10)]
+        self.assertEqual(
+            mesclar_ocupados(inicios, self.duracao),
+            [
+                (self._hora(8), self._hora(8, 45)),
+                (self._hora(10), self._hora(10, 30)),
+            ],
+        )
+
+    def test_horarios_livres_descontam_consultas(self):
+        janelas = [(self._hora(8), self._hora(10))]
+        ocupados = [(self._hora(8, 30), self._hora(9, 10))]
+        livres = horarios_livres(
+            janelas, ocupados, self.duracao, self._hora(0), self._hora(23)
+        )
+        self.assertEqual(
+            livres,
+            [
+                (self._hora(8), self._hora(8, 30)),
+                (self._hora(9, 30), self._hora(10)),
+            ],
+        )
+
+    def test_consulta_atravessando_janelas(self):
+        janelas = [
+            (self._hora(8), self._hora(9)),
+            (self._hora(9, 30), self._hora(11)),
+        ]
+        ocupados = [(self._hora(8, 30), self._hora(10))]
+        livres = horarios_livres(
+            janelas, ocupados, self.duracao, self._hora(0), self._hora(23)
+        )
+        self.assertEqual(
+            livres,
+            [
+                (self._hora(8), self._hora(8, 30)),
+                (self._hora(10), self._hora(10, 30)),
+                (self._hora(10, 30), self._hora(11)),
+            ],
+        )
+
+    def test_horarios_respeitam_inicio_e_fim(self):
+        janelas = [(self._hora(8), self._hora(12))]
+        livres = horarios_livres(
+            janelas, [], self.duracao, self._hora(9, 10), self._hora(10, 30)
+        )
+        self.assertEqual(
+            livres,
+            [
+                (self._hora(9, 30), self._hora(10)),
+                (self._hora(10), self._hora(10, 30)),
+            ],
+        )
+
+    def test_uma_query_para_varios_profissionais(self):
+        profissionais = [
+            Profissional.objects.create(
+                nome=f"Prof {i}",
+                especialidade="Teste",
+                email=f"disp{i}@teste.com",
+                telefone="(11)11111-1111",
+            )
+            for i in range(3)
+        ]
+        ids = [profissional.pk for profissional in profissionais]
+        with self.assertNumQueries(1):
+            resultado = calcular_disponibilidade(
+                ids, self._hora(0), self._hora(0, dias=60)
+            )
+        self.assertEqual(set(resultado), set(ids))
+
+
+@override_settings(
+    DISPONIBILIDADE={
+        "TIMEZONE": "UTC",
+        "DURACAO_PADRAO_MINUTOS": 30,
+        "DURACAO_CONSULTA_MINUTOS": 30,
+        "DURACAO_MINIMA_MINUTOS": 10,
+        "DURACAO_MAXIMA_MINUTOS": 240,
+        "MAX_DIAS": 92,
+        "EXPEDIENTE": {dia: [("08:00", "10:00")] for dia in range(7)},
+    }
+)
+class DisponibilidadeAPITest(APITestCase):
+    """Testes para o endpoint de disponibilidade"""
+
+    def setUp(self):
+        self.profissional = Profissional.objects.create(
+            nome="Maria Santos",
+            especialidade="Clínica Geral",
+            email="maria@teste.com",
+            telefone="(21)88888-8888",
+        )
+        self.url = reverse(
+            "profissional-disponibilidade", kwargs={"pk": self.profissional.pk}
+        )
+        amanha = timezone.now().date() + timedelta(days=1)
+        self.inicio = datetime.combine(amanha, datetime.min.time(), tzinfo=dt_tz.utc)
+        self.fim = self.inicio + timedelta(days=1)
+
+    def _get(self, **params):
+        params.setdefault("inicio", self.inicio.isoformat())
+        params.setdefault("fim", self.fim.isoformat())
+        return self.client.get(self.url, params)
+
+    def test_horarios_livres(self):
+        Consulta.objects.create(
+            profissional=self.profissional,
+            paciente_nome="Paciente",
+            data_hora=self.inicio + timedelta(hours=9),
+        )
+        response = self._get()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        inicios = [horario["inicio"][11:16] for horario in response.data["horarios"]]
+        self.assertEqual(inicios, ["08:00", "08:30", "09:30"])
+        self.assertEqual(response.data["duracao"], 30)
+
+    def test_duracao_configuravel(self):
+        response = self._get(duracao=60)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["horarios"]), 2)
+
+    def test_duracao_invalida(self):
+        response = self._get(duracao=1)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("duracao", response.data)
+
+    def test_intervalo_muito_longo(self):
+        response = self._get(fim=(self.inicio + timedelta(days=365)).isoformat())
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_profissional_inexistente(self):
+        url = reverse("profissional-disponibilidade", kwargs={"pk": 999})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ImportProfissionaisCommandTest(TestCase):
+    """Testes para o comando import_profissionais"""
+
+    def setUp(self):
+        Profissional.objects.create(
+            nome="Existente",
+            especialidade="Clínica Geral",
+            email="existente@teste.com",
+            telefone="(21)88888-8888",
+        )
+        self.diretorio = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def _arquivo(self, nome, conteudo):
+        caminho = Path(self.diretorio.name) / nome
+        caminho.write_text(conteudo, encoding="utf-8")
+        return str(caminho)
+
+    def test_importar_csv(self):
+        caminho = self._arquivo(
+            "profissionais.csv",
+            "nome,nome_social,especialidade,email,telefone\n"
+            "Ana Costa,,Dermatologia,ana@teste.com,(31)77777-7777\n"
+            "Carlos Lima,Carla,Psiquiatria,carla@teste.com,(41)66666-6666\n"
+            "Sem Email,,Pediatria,,(41)66666-6666\n"
+            "Repetida,,Pediatria,ana@teste.com,(41)66666-6666\n"
+            "Existente,,Pediatria,existente@teste.com,(41)66666-6666\n",
+        )
+        relatorio = str(Path(self.diretorio.name) / "erros.ndjson")
+        saida = StringIO()
+        call_command(
+            "import_profissionais",
+            caminho,
+            "--tamanho-lote=2",
+            f"--relatorio-erros={relatorio}",
+            stdout=saida,
+        )
+
+        self.assertEqual(Profissional.objects.count(), 3)
+        carla = Profissional.objects.get(email="carla@teste.com")
+        self.assertEqual(carla.nome_exibicao, "Carla")
+        self.assertEqual(carla.busca, "carlos lima carla psiquiatria")
+        self.assertIn("Lote 3", saida.getvalue())
+        self.assertIn("2 inseridos de 5 lidos", saida.getvalue())
+
+        erros = [
+            json.loads(linha)
+            for linha in Path(relatorio).read_text(encoding="utf-8").splitlines()
+        ]
+        self.assertEqual([erro["linha"] for erro in erros], [3, 4, 5])
+        self.assertIn("email", erros[0]["erros"])
+
+    def test_importar_ndjson(self):
+        registros = [
+            {
+                "nome": f"Profissional {i}",
+                "especialidade": "Psicologia",
+                "email": f"prof{i}@teste.com",
+                "telefone": "(11)99999-9999",
+            }
+            for i in range(10)
+        ]
+        registros.append({"nome": "  ", "especialidade": "x", "email": "y@teste.com"})
+        caminho = self._arquivo(
+            "profissionais.ndjson",
+            "\n".join(json.dumps(registro) for registro in registros),
+        )
+        call_command("import_profissionais", caminho, stdout=StringIO())
+        self.assertEqual(Profissional.objects.count(), 11)
+
+    def test_linha_ndjson_malformada(self):
+        linhas = [
+            json.dumps(
+                {
+                    "nome": f"Profissional {i}",
+                    "especialidade": "Psicologia",
+                    "email": f"prof{i}@teste.com",
+                    "telefone": "(11)99999-9999",
+                }
+            )
+            for i in range(3)
+        ]
+        linhas.insert(1, '{"nome": "Cortada", "email": ')
+        caminho = self._arquivo("profissionais.ndjson", "\n".join(linhas))
+        relatorio = str(Path(self.diretorio.name) / "erros.ndjson")
+        saida = StringIO()
+        call_command(
+            "import_profissionais",
+            caminho,
+            "--tamanho-lote=2",
+            f"--relatorio-erros={relatorio}",
+            stdout=saida,
+        )
+
+        self.assertEqual(Profissional.objects.count(), 4)
+        self.assertIn("1 inválidos", saida.getvalue())
+        self.assertIn("3 inseridos de 4 lidos", saida.getvalue())
+        (erro,) = [
+            json.loads(linha)
+            for linha in Path(relatorio).read_text(encoding="utf-8").splitlines()
+        ]
+        self.assertEqual(erro["linha"], 2)
+        self.assertEqual(erro["registro"], '{"nome": "Cortada", "email":')
+        self.assertIn("JSON inválido", erro["erros"]["non_field_errors"][0])
+
+    def test_carga_conta_apenas_linhas_inseridas(self):
+        # "existente@teste.com" simula um cadastro concorrente gravado entre a
+        # checagem de duplicados do lote e a carga.
+        linhas = [
+            {
+                "nome": "Nova",
+                "especialidade": "Pediatria",
+                "email": email,
+                "telefone": "(41)66666-6666",
+            }
+            for email in ["existente@teste.com", "nova@teste.com"]
+        ]
+        self.assertEqual(carregar(linhas), 1)
+        self.assertEqual(Profissional.objects.count(), 2)
+
+    def test_formato_desconhecido(self):
+        caminho = self._arquivo("profissionais.txt", "")
+        with self.assertRaises(CommandError):
+            call_command("import_profissionais", caminho, stdout=StringIO())
@@ -1,32 +1,63 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 
+from django.db.models import Value
+from django.db.models.functions import Coalesce, NullIf
 from django.shortcuts import render
+from django.utils.http import parse_http_date_safe
 
+from core.assincrono import AsyncViewSetMixin
+from core.conditional import ConditionalGetMixin
+from core.pagination import BuscaPagination
+from core.projecao import Projecao
+from core.replicas import LeituraReplicaMixin
 from core.throttling import ListingRateThrottle, ProfissionalCreateRateThrottle
 
+from .busca import buscar
+from .cache import (
+    cache_listagem_ativo,
+    chave_listagem,
+    obter_listagem,
+    salvar_listagem,
+)
+from .disponibilidade import calcular_disponibilidade
 from .models import Profissional
 from .serializers import (
+    DisponibilidadeParametrosSerializer,
+    DisponibilidadeSerializer,
     ProfissionalDetalheSerializer,
     ProfissionalListSerializer,
     ProfissionalSerializer,
 )
 
 
-class ProfissionalViewSet(viewsets.ModelViewSet):
+class ProfissionalViewSet(
+    LeituraReplicaMixin, AsyncViewSetMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     queryset = Profissional.objects.all()
+    pagination_class = BuscaPagination
+    # nome_social vazio ou nulo cai no nome, como em get_nome_exibicao.
+    projecao_listagem = Projecao(
+        ProfissionalListSerializer,
+        anotacoes={"nome_exibicao": Coalesce(NullIf("nome_social", Value("")), "nome")},
+    )
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
 
     def get_permissions(self):
-        if self.action in ["list", "retrieve"]:
+        if self.action in ["list", "retrieve", "disponibilidade"]:
             permission_classes = [AllowAny]
         else:
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
 
     def get_throttles(self):
-        if self.action == "list":
+        if self.action in ["list", "disponibilidade"]:
             throttle_classes = [ListingRateThrottle]
         elif self.action in ["create", "update", "partial_update"]:
             throttle_classes = [ProfissionalCreateRateThrottle]
@@ -34,9 +65,104 @@ class ProfissionalViewSet(viewsets.ModelViewSet):
             throttle_classes = []
         return [throttle() for throttle in throttle_classes]
 
+    def termo_busca(self):
+        if self.action != "list":
+            return None
+        return self.request.query_params.get("q", "").strip() or None
+
+    @property
+    def paginator(self):
+        # Só a busca é paginada; a listagem completa mantém o formato atual.
+        if self.termo_busca() is None:
+            return None
+        return super().paginator
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        termo = self.termo_busca()
+        if termo is not None:
+            queryset = buscar(queryset, termo)
+        return queryset
+
     def get_serializer_class(self):
         if self.action == "retrieve":
             return ProfissionalDetalheSerializer
         elif self.action == "list":
             return ProfissionalListSerializer
         return ProfissionalSerializer
+
+    def pode_ler_da_replica(self):
+        # Com o cache ativo, a listagem só chega ao banco para preencher o
+        # cache: lê do primário para não guardar dados de uma réplica atrasada.
+        if self.action == "list" and cache_listagem_ativo():
+            return False
+        return super().pode_ler_da_replica()
+
+    def list(self, request, *args, **kwargs):
+        if not cache_listagem_ativo():
+            return super().list(request, *args, **kwargs)
+
+        chave = chave_listagem(request.query_params)
+        entrada = obter_listagem(chave)
+        if entrada is not None:
+            return self.resposta_do_cache(request, entrada)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            salvar_listagem(chave, self.entrada_cache(response))
+        response["X-Cache"] = "MISS"
+        return response
+
+    async def alist(self, request, *args, **kwargs):
+        if not cache_listagem_ativo():
+            return await super().alist(request, *args, **kwargs)
+
+        chave = await sync_to_async(chave_listagem)(request.query_params)
+        entrada = await sync_to_async(obter_listagem)(chave)
+        if entrada is not None:
+            return self.resposta_do_cache(request, entrada)
+
+        response = await super().alist(request, *args, **kwargs)
+        if response.status_code == 200:
+            await sync_to_async(salvar_listagem)(chave, self.entrada_cache(response))
+        response["X-Cache"] = "MISS"
+        return response
+
+    def resposta_do_cache(self, request, entrada):
+        dados, etag, last_modified = entrada
+        condicional = self.resposta_condicional(request, etag, last_modified)
+        if condicional is not None:
+            return condicional
+        response = Response(dados, headers={"X-Cache": "HIT"})
+        return self.aplicar_validadores(response, etag, last_modified)
+
+    def entrada_cache(self, response):
+        last_modified = parse_http_date_safe(response.get("Last-Modified"))
+        return response.data, response["ETag"], last_modified
+
+    @action(detail=True, methods=["get"])
+    def disponibilidade(self, request, pk=None):
+        parametros = DisponibilidadeParametrosSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        inicio = parametros.validated_data["inicio"]
+        fim = parametros.validated_data["fim"]
+        duracao = parametros.validated_data["duracao"]
+
+        profissional = self.get_object()
+        livres = calcular_disponibilidade(
+            [profissional.pk], inicio, fim, timedelta(minutes=duracao)
+        )[profissional.pk]
+
+        serializer = DisponibilidadeSerializer(
+            {
+                "profissional_id": profissional.pk,
+                "inicio": inicio,
+                "fim": fim,
+                "duracao": duracao,
+                "horarios": [
+                    {"inicio": horario_inicio, "fim": horario_fim}
+                    for horario_inicio, horario_fim in livres
+                ],
+            }
+        )
+        return Response(serializer.data)
@@ -15,8 +15,22 @@ python manage.py migrate --noinput
 
 # Verificar se há argumentos passados, senão usar comando padrão
 if [ $# -eq 0 ]; then
+    case "${ASGI_MODE:-False}" in
+        [Tt]rue|1) ASGI=true ;;
+        *) ASGI=false ;;
+    esac
+    if $ASGI && ! python -c "import uvicorn_worker" 2>/dev/null; then
+        echo "⚠️ ASGI_MODE is set but uvicorn-worker is not installed; falling back to WSGI..."
+        ASGI=false
+        export ASGI_MODE=False
+    fi
+
+    if $ASGI; then
+        echo "✅ Starting application server with Gunicorn + Uvicorn workers (ASGI)..."
+        exec gunicorn --bind 0.0.0.0:8000 --workers 2 --worker-class uvicorn_worker.UvicornWorker --timeout 120 --max-requests 1000 --preload core.asgi:application
+    fi
     echo "✅ Starting application server with default Gunicorn settings..."
-    exec gunicorn --bind 0.0.0.0:8000 --workers 2 --timeout 120 --max-requests 1000 --preload core.wsgi:application
+    exec gunicorn --bind 0.0.0.0:8000 --workers 2 --worker-class gthread --threads 4 --timeout 120 --max-requests 1000 --preload core.wsgi:application
 else
     echo "✅ Starting application server with custom command: $@"
     exec "$@"